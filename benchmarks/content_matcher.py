@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+# Scan time of ContentMatcher while the number of patterns grows, compared with one substring search per pattern.
+# Below ContentMatcher.MIN_AUTOMATON_PATTERNS the matcher does the same substring searches. From there on it searches
+# one alternation regex built from the trie of the patterns, whose scan time depends on the content and the branching
+# of the trie rather than the number of patterns. It pays off for patterns which are not on the page, patterns found
+# early are still faster with the substring search. The first run includes compiling the regex (and the smaller ones
+# without the already found patterns), later runs take them from the cache like a resident runner would.
+#
+# python3 benchmarks/content_matcher.py [--generate] [--repeat 3]
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_utils.Core.ContentMatcher import ContentMatcher
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'page.html.gz')
+PATTERN_COUNTS = [1, 10, 100, 1000]
+CHUNK_SIZE = 65536
+SEED = 13
+
+
+def get_words(generator, count):
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(generator.choice(alphabet) for character in range(0, generator.randint(3, 10)))
+            for word in range(0, count)]
+
+
+def generate():
+    # about 0.7 MB of HTML paragraphs built from a fixed vocabulary
+    generator = random.Random(SEED)
+    words = get_words(generator, 5000)
+    paragraphs = []
+    for paragraph in range(0, 2000):
+        paragraphs.append('<p class="text">' + ' '.join(generator.choice(words) for word in range(0, 50)) + '</p>')
+    return '<html><body>\n' + '\n'.join(paragraphs) + '\n</body></html>\n'
+
+
+def get_pattern_sets(content, count):
+    generator = random.Random(SEED + count)
+    # absent: never on the page -> every pattern has to be searched over the whole content
+    absent = [word + '-absent' for word in get_words(generator, count)]
+    # present: words of the page, most of them are found early
+    words = sorted(set(content.split(' ')[1:-1]))
+    present = generator.sample(words, count)
+    return [('absent', absent), ('present', present)]
+
+
+def scan_naive(content, patterns):
+    return {pattern for pattern in patterns if pattern in content}
+
+
+def scan_matcher(content, patterns):
+    matcher = ContentMatcher(patterns)
+    for offset in range(0, len(content), CHUNK_SIZE):
+        matcher.feed(content[offset:offset + CHUNK_SIZE])
+        if matcher.is_finished():
+            break
+    return matcher.get_found()
+
+
+def measure(function, content, patterns, repeat):
+    best = None
+    result = None
+    for run in range(0, repeat):
+        start = time.perf_counter()
+        result = function(content, patterns)
+        duration = time.perf_counter() - start
+        best = duration if None is best else min(best, duration)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ContentMatcher against one substring search per pattern')
+    parser.add_argument('--generate', dest='generate', action='store_true',
+                        help='Write the fixture again before the benchmark')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3, help='Runs per measurement, the best one counts')
+    args = parser.parse_args()
+
+    if args.generate or not os.path.exists(FIXTURE):
+        with gzip.GzipFile(FIXTURE, 'wb', mtime=0) as fixture:
+            fixture.write(generate().encode('utf-8'))
+
+    with gzip.open(FIXTURE, 'rt', encoding='utf-8') as fixture:
+        content = fixture.read()
+
+    print('content: %.1f MB' % (len(content) / 1048576))
+    print('%-8s %8s %12s %12s %12s' % ('set', 'patterns', 'naive s', 'matcher s', 'cached s'))
+    for count in PATTERN_COUNTS:
+        for name, patterns in get_pattern_sets(content, count):
+            expected, naive = measure(scan_naive, content, patterns, args.repeat)
+            found, first = measure(scan_matcher, content, patterns, 1)
+            found, cached = measure(scan_matcher, content, patterns, args.repeat)
+            if expected != found:
+                raise AssertionError('ContentMatcher found other patterns for ' + name + ' ' + str(count))
+            print('%-8s %8d %12.4f %12.4f %12.4f' % (name, count, naive, first, cached))
+
+
+if __name__ == '__main__':
+    main()
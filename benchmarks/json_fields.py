@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+# Peak memory and time of reading a few fields of large JSON responses: json.loads(run_get()) against run_get_json.
+# The fixtures are served by a local http.server process, so only the client side is traced.
+#
+# python3 benchmarks/json_fields.py [--generate]
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_utils.Checks.SecurityObservers.MozillaObservatory import MozillaObservatory
+from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
+from monitoring_utils.Core.StatusBuilder import StatusBuilder
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MODULES = ['Core/Executor', 'Core/Cache', 'Checks/DNS', 'Checks/SNMP', 'Checks/Web', 'Notifications/Matrix']
+PLATFORMS = ['linux-amd64', 'linux-arm64', 'darwin-amd64', 'darwin-arm64', 'windows-amd64']
+HEADERS = ["default-src 'self'", 'max-age=63072000; includeSubDomains', 'nosniff', 'DENY', 'same-origin',
+           'strict-origin-when-cross-origin']
+RELEASE_FIELDS = ['tag_name', 'html_url']
+
+
+def get_fixture(name):
+    return os.path.join(FIXTURES, name + '.json.gz')
+
+
+def generate_release():
+    # GitHub release with 20000 assets and a 3 MB changelog
+    return {
+        'url': 'https://api.github.com/repos/example/project/releases/1',
+        'html_url': 'https://github.com/example/project/releases/tag/v2.4.0',
+        'id': 1,
+        'tag_name': 'v2.4.0',
+        'name': 'Release 2.4.0',
+        'body': '\n'.join('* Fix issue #%d in module %s' % (line, MODULES[line % len(MODULES)])
+                          for line in range(0, 100000)),
+        'assets': [{
+            'url': 'https://api.github.com/repos/example/project/releases/assets/' + str(index),
+            'id': index,
+            'name': 'project-2.4.0-%d-%s.tar.gz' % (index, PLATFORMS[index % len(PLATFORMS)]),
+            'content_type': 'application/gzip',
+            'size': 1000 + index * 4099,
+            'download_count': index * 7 % 1000,
+            'browser_download_url': 'https://github.com/example/project/releases/download/v2.4.0/' + str(index),
+        } for index in range(0, 20000)],
+    }
+
+
+def move_to_end(release):
+    # worst case for the streaming reader -> the whole document has to be read
+    release['tag_name'] = release.pop('tag_name')
+    release['html_url'] = release.pop('html_url')
+    return release
+
+
+def generate_scan_results():
+    # getScanResults of the observatory with verbose test output
+    return {'test-%d' % index: {
+        'expectation': 'csp-implemented-with-no-unsafe',
+        'name': 'test-%d' % index,
+        'output': {'data': {'header-%d' % header: HEADERS[(index + header) % len(HEADERS)] for header in range(0, 200)}},
+        'pass': 0 == index % 3,
+        'result': 'csp-implemented-with-no-unsafe',
+        'score_description': 'Content Security Policy (CSP) implemented without unsafe-inline or unsafe-eval',
+        'score_modifier': -5 * (index % 4),
+    } for index in range(0, 1000)}
+
+
+def generate():
+    return {
+        'release': generate_release(),
+        'scan_results': generate_scan_results(),
+    }
+
+
+def start_server(directory):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen([sys.executable, '-m', 'http.server', '--bind', '127.0.0.1', '--directory', directory,
+                               str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for attempt in range(0, 50):
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError('http.server did not start')
+
+
+def create_executor(port):
+    logger = logging.getLogger('benchmark')
+    return WebExecutor(logger, None, StatusBuilder(logger, True), ssl=False, domain='127.0.0.1', port=port, uri='/')
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory of json.loads against run_get_json')
+    parser.add_argument('--generate', dest='generate', action='store_true',
+                        help='Write the fixtures again before the benchmark')
+    args = parser.parse_args()
+
+    if args.generate or not os.path.exists(get_fixture('release')) or not os.path.exists(get_fixture('scan_results')):
+        for name, document in generate().items():
+            with gzip.GzipFile(get_fixture(name), 'wb', mtime=0) as fixture:
+                fixture.write(json.dumps(document, indent=1).encode('utf-8'))
+
+    with gzip.open(get_fixture('release'), 'rb') as fixture:
+        release = json.loads(fixture.read())
+    with gzip.open(get_fixture('scan_results'), 'rb') as fixture:
+        scan_results = json.loads(fixture.read())
+    cases = [('release', RELEASE_FIELDS, release), ('release_tag_last', RELEASE_FIELDS, move_to_end(dict(release))),
+             ('scan_results', MozillaObservatory.TEST_FIELDS, scan_results)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, fields, document in cases:
+            with open(os.path.join(directory, name + '.json'), 'w') as served:
+                json.dump(document, served, indent=1)
+        del release, scan_results, document
+
+        server, port = start_server(directory)
+        try:
+            print('%-18s %8s %20s %20s' % ('fixture', 'MB', 'json.loads MB / s', 'run_get_json MB / s'))
+            for name, fields, document in cases:
+                uri = '/' + name + '.json'
+                executor = create_executor(port)
+                executor.run_get_json(fields, uri)
+
+                loaded, loads_time, loads_peak = measure(lambda: json.loads(executor.run_get(uri)))
+                values, fields_time, fields_peak = measure(lambda: executor.run_get_json(fields, uri))
+                for field in fields:
+                    if '*' not in field and values.get(field) != loaded.get(field):
+                        raise AssertionError('Other value of ' + field + ' in ' + name)
+
+                size = os.path.getsize(os.path.join(directory, name + '.json'))
+                print('%-18s %8.1f %11.1f / %6.2f %11.1f / %6.2f' % (
+                    name, size / 1048576, loads_peak / 1048576, loads_time, fields_peak / 1048576, fields_time))
+        finally:
+            server.terminate()
+            server.wait()
+            WebExecutor.close_sessions()
+
+
+if __name__ == '__main__':
+    main()
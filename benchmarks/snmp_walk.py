@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+# Replays snmpwalk output through SNMPExecutor.run to track rows per second and peak memory of the parser.
+# The snmpwalk subprocess is replaced by the fixture, so only the parsing is measured.
+# The fixtures are synthetic, not recorded from a device: generate() writes IF-MIB ifTable like rows in the format of
+# snmpwalk -On. They are written deterministically, so --generate reproduces the files in benchmarks/fixtures.
+#
+# python3 benchmarks/snmp_walk.py [--generate] [--repeat 5]
+
+import argparse
+import gzip
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_utils.Core.Executor import SNMPExecutor as SNMPExecutorModule
+from monitoring_utils.Core.Executor.SNMPExecutor import SNMPExecutor
+from monitoring_utils.Core.StatusBuilder import StatusBuilder
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SIZES = [1000, 10000, 100000]
+OID = '.1.3.6.1.2.1.2.2.1'
+
+
+def get_fixture(size):
+    return os.path.join(FIXTURES, 'snmpwalk_' + str(size) + '.txt.gz')
+
+
+def generate(size):
+    # IF-MIB ifTable like rows: one column after the other, like snmpwalk -On prints them
+    columns = [
+        (1, lambda index: 'INTEGER: ' + str(index)),
+        (2, lambda index: 'STRING: "GigabitEthernet1/0/' + str(index) + '"'),
+        (3, lambda index: 'INTEGER: 6'),
+        (4, lambda index: 'INTEGER: 1500'),
+        (5, lambda index: 'Gauge32: 1000000000'),
+        (6, lambda index: 'Hex-STRING: 00 1A 2B %02X %02X %02X' % (index >> 16 & 0xff, index >> 8 & 0xff, index & 0xff)),
+        (7, lambda index: 'INTEGER: 1'),
+        (8, lambda index: 'INTEGER: ' + str(1 + index % 2)),
+        (9, lambda index: 'Timeticks: (%d) 1 day, 2:03:04.05' % (9318405 + index)),
+        (10, lambda index: 'Counter32: ' + str(index * 7919 % 4294967296)),
+        (16, lambda index: 'Counter32: ' + str(index * 104729 % 4294967296)),
+        (22, lambda index: 'OID: .0.0'),
+    ]
+    rows = size // len(columns) + 1
+    lines = []
+    for column, value in columns:
+        for index in range(1, rows + 1):
+            lines.append(OID + '.' + str(column) + '.' + str(index) + ' = ' + value(index))
+    return lines[:size]
+
+
+class ReplayExecutor:
+    lines = []
+
+    def __init__(self, logger, status_builder, command_array):
+        pass
+
+    def run_stream(self):
+        return iter(ReplayExecutor.lines)
+
+
+def measure(lines, repeat):
+    logger = logging.getLogger('benchmark')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--timeout', dest='timeout', type=int, default=10)
+    executor = SNMPExecutor(logger, StatusBuilder(logger, True), parser, OID)
+    executor.add_args()
+    executor.configure(parser.parse_args(['-H', 'localhost', '--version', '2c', '--engine', 'snmpwalk']))
+
+    ReplayExecutor.lines = lines
+    SNMPExecutorModule.CLIExecutor = ReplayExecutor
+
+    best = None
+    for run in range(0, repeat):
+        start = time.perf_counter()
+        rows = executor.run_rows()
+        duration = time.perf_counter() - start
+        best = duration if None is best else min(best, duration)
+
+    tracemalloc.start()
+    rows = executor.run_rows()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return len(rows), best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the snmpwalk parser of SNMPExecutor')
+    parser.add_argument('--generate', dest='generate', action='store_true',
+                        help='Write the fixtures again before the benchmark')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=5, help='Runs per fixture, the best one counts')
+    args = parser.parse_args()
+
+    for size in SIZES:
+        if args.generate or not os.path.exists(get_fixture(size)):
+            with gzip.GzipFile(get_fixture(size), 'wb', mtime=0) as fixture:
+                fixture.write(('\n'.join(generate(size)) + '\n').encode('utf-8'))
+
+    print('%8s %8s %12s %12s' % ('lines', 'rows', 'rows/s', 'peak MB'))
+    for size in SIZES:
+        with gzip.open(get_fixture(size), 'rt', encoding='utf-8') as fixture:
+            lines = fixture.read().splitlines()
+        rows, duration, peak = measure(lines, args.repeat)
+        print('%8d %8d %12.0f %12.1f' % (len(lines), rows, rows / duration, peak / 1048576))
+
+
+if __name__ == '__main__':
+    main()
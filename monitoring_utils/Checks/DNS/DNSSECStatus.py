@@ -27,10 +27,13 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from monitoring_utils.Core.Deadline import Deadline
 from monitoring_utils.Core.Executor.DNSExecutor import DNSExecutor
 from monitoring_utils.Core.Plugin.Plugin import Plugin
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
 
 
 class DNSSECStatus(Plugin):
@@ -47,6 +50,17 @@ class DNSSECStatus(Plugin):
         self.__ignoretld = None
         self.__expire_dates = {}
         self.__executor = None
+        self.__workers = 16
+        self.__dns_cache_size = 0
+        self.__dns_cache_dir = None
+        self.__dns_transport = 'tcp'
+        self.__dns_tls_port = 853
+        self.__dns_tls_hostname = None
+        self.__dns_tls_ca_file = None
+        # RRSIGs and status of each zone resolved in advance
+        self.__resolved = {}
+        # zones which couldn't be resolved -> the zones below them are not checked
+        self.__failed = set()
 
         Plugin.__init__(self, 'Check DNSSEC status')
 
@@ -60,10 +74,14 @@ class DNSSECStatus(Plugin):
                                    help='Domains to check', default=[])
         self.__parser.add_argument('-r', '--resolver', dest='resolver', default='1.1.1.1',
                                    help='Resolver for DNS Queries')
+        DNSExecutor.add_cache_args(self.__parser)
+        DNSExecutor.add_transport_args(self.__parser)
         self.__parser.add_argument('--ignore-root', dest='ignoreroot', action='store_true',
                                    help='Ignore the root zone "."')
         self.__parser.add_argument('--ignore-tld', dest='ignoretld', action='store_true',
                                    help='Ignore the tld zones e.g. ".eu" or ".com" and also the root zone "."')
+        self.__parser.add_argument('--workers', dest='workers', type=int, default=16,
+                                   help='Number of zones resolved at the same time. Default: 16')
 
     def configure(self, args):
         self.__logger = self.get_logger()
@@ -75,25 +93,98 @@ class DNSSECStatus(Plugin):
         self.__resolver = args.resolver
         self.__ignoreroot = args.ignoreroot
         self.__ignoretld = args.ignoretld
-        self.__executor = DNSExecutor(self.__logger, self.__parser, self.__status_builder, self.__resolver)
+        self.__workers = args.workers
+        self.__dns_cache_size = args.dns_cache_size
+        self.__dns_cache_dir = args.dns_cache_dir
+        self.__dns_transport = args.dns_transport
+        self.__dns_tls_port = args.dns_tls_port
+        self.__dns_tls_hostname = args.dns_tls_hostname
+        self.__dns_tls_ca_file = args.dns_tls_ca_file
+        if 1 > self.__workers:
+            self.__status_builder.unknown('Number of workers must be at least 1')
+            self.__status_builder.exit()
+        self.__executor = self.__get_executor(self.__status_builder)
 
     def run(self):
 
+        self.resolve_zones()
         self.compute_expire_dates()
         self.compute_state()
 
         self.__status_builder.exit(all_outputs=True)
 
+    def get_zones(self, domain):
+        # zones from the root zone to the domain, e.g. [".", "com.", "example.com."]
+        zones = domain.split('.')
+        zones.append('.')
+        zones.reverse()
+
+        last_zone = None
+        current_zones = []
+        for zone in zones:
+            last_zone = zone if None == last_zone else zone + '.' + last_zone if '.' != last_zone else zone + '.'
+            current_zones.append(last_zone)
+        return current_zones
+
+    def resolve_zones(self):
+        # zones of the same depth are resolved at the same time, each zone once.
+        # parent zones are resolved before their children -> the children find the parents in the DNS cache
+        chains = [self.get_zones(domain) for domain in self.__domains]
+        ignored = 2 if self.__ignoretld else 1 if self.__ignoreroot else 0
+
+        deadline = Deadline.get_current()
+        if None is deadline and 0 <= self.get_signals().get_timeout():
+            deadline = Deadline(self.get_signals().get_timeout())
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+            for depth in range(ignored, max([0] + [len(chain) for chain in chains])):
+                zones = []
+                for chain in chains:
+                    if depth < len(chain) and chain[depth] not in self.__resolved and chain[depth] not in zones:
+                        zones.append(chain[depth])
+                self.__logger.info(f'Resolve {len(zones)} zones of depth {depth}')
+                futures = [pool.submit(self.__resolve_zone, deadline, zone) for zone in zones]
+                for zone, future in zip(zones, futures):
+                    self.__resolved[zone] = future.result()
+
+    def __get_executor(self, status_builder):
+        return DNSExecutor(self.__logger, self.__parser, status_builder, self.__resolver, self.__dns_cache_size,
+                           self.__dns_cache_dir, self.__dns_transport, self.__dns_tls_port, self.__dns_tls_hostname,
+                           self.__dns_tls_ca_file)
+
+    def __resolve_zone(self, deadline, zone):
+        # messages are reported when the zone is used, like without resolving it in advance
+        Deadline.set_current(deadline)
+        status_builder = StatusBuilder(self.__logger, True)
+        executor = self.__get_executor(status_builder)
+        try:
+            return executor.resolve_RRSIG(zone), status_builder.get_result(), False
+        except CheckExit as e:
+            return None, e.get_result(), True
+        finally:
+            Deadline.set_current(None)
+
+    def __get_rrsigs(self, zone):
+        if zone not in self.__resolved:
+            return self.__executor.resolve_RRSIG(zone)
+
+        rrsigs, result, exited = self.__resolved.pop(zone)
+        for messages, add in [(result.get_critical(), self.__status_builder.critical),
+                              (result.get_warning(), self.__status_builder.warning),
+                              (result.get_unknown(), self.__status_builder.unknown),
+                              (result.get_success(), self.__status_builder.success)]:
+            for message in messages:
+                add(message)
+        if exited:
+            # only the domains in this zone are unknown, the other domains are still checked
+            self.__failed.add(zone)
+        return rrsigs
+
     def compute_expire_dates(self):
         for domain in self.__domains:
             # search from root zone to domain
-            zones = domain.split('.')
-            zones.append('.')
-            zones.reverse()
-
             last_zone = None
-            for zone in zones:
-                current_zone = zone if None == last_zone else zone + '.' + last_zone if '.' != last_zone else zone + '.'
+            for current_zone in self.get_zones(domain):
 
                 if None == last_zone and (self.__ignoreroot or self.__ignoretld):
                     # ignore root zone and TLD if set.
@@ -106,11 +197,17 @@ class DNSSECStatus(Plugin):
                     last_zone = current_zone
                     continue
 
+                if current_zone in self.__failed:
+                    # unknown message already send
+                    break
+
                 expire_date = self.__expire_dates.get(current_zone, None)
                 if None == expire_date:
                     # domain not handled yet
                     self.__logger.info('Check expiration of zone "' + current_zone + '"')
-                    rrsigs = self.__executor.resolve_RRSIG(current_zone)
+                    rrsigs = self.__get_rrsigs(current_zone)
+                    if current_zone in self.__failed:
+                        break
                     if None == rrsigs or 0 == len(rrsigs):
                         # domain not signed or no RRSIG exist
                         last_zone = current_zone
@@ -129,10 +226,10 @@ class DNSSECStatus(Plugin):
                         # get expiration and signing date of parent
                         signing_date_parent = self.__expire_dates.get(last_zone, (None, None))[0]
                         expire_date_parent = self.__expire_dates.get(last_zone, (None, None))[1]
-                        self.__logger.debug('Expiration date of parent zone "' + last_zone + '" is "' +
+                        self.__logger.debug('Expiration date of parent zone "' + str(last_zone) + '" is "' +
                                             str(signing_date_parent) + '"')
                         self.__logger.debug(
-                            'Signing date of parent zone "' + last_zone + '" is "' + str(expire_date_parent) + '"')
+                            'Signing date of parent zone "' + str(last_zone) + '" is "' + str(expire_date_parent) + '"')
 
                         if '-' == expire_date_parent:
                             # parent zone is not signed -> child zone can't be signed
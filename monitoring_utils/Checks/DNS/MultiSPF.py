@@ -0,0 +1,299 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.exception
+
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.Executor.DNSExecutor import DNSExecutor
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
+
+
+class MultiSPF(Plugin):
+    # RFC 7208 4.6.4: at most 10 mechanisms and modifiers of a policy and its includes may cause DNS lookups
+    LOOKUP_LIMIT = 10
+    LOOKUP_MECHANISMS = ['include', 'a', 'mx', 'ptr', 'exists']
+
+    def __init__(self):
+        self.__logger = None
+        self.__status_builder = None
+
+        self.__domains = []
+        self.__resolver = None
+        self.__warning = 8
+        self.__workers = 16
+        self.__dns_cache_size = 0
+        self.__dns_cache_dir = None
+        self.__dns_transport = 'tcp'
+        self.__dns_tls_port = 853
+        self.__dns_tls_hostname = None
+        self.__dns_tls_ca_file = None
+        # policies of included domains, resolved once for all domains
+        self.__records = {}
+        self.__expanded = {}
+
+        Plugin.__init__(self, 'Check SPF policies of many domains')
+
+    def add_args(self):
+        self.__parser = self.get_parser()
+        self.__parser.add_argument('-r', '--resolver', dest='resolver', default='1.1.1.1',
+                                   help='Resolver for DNS Queries')
+        DNSExecutor.add_cache_args(self.__parser)
+        DNSExecutor.add_transport_args(self.__parser)
+        self.__parser.add_argument('-d', '--domain', dest='domains', action='append', default=[],
+                                   help='Domain or zone to search. Can be used multiple times')
+        self.__parser.add_argument('-f', '--file', dest='file', type=str,
+                                   help='File with one domain per line, optionally followed by its expected SPF '
+                                        'value, e.g. "example.com include:_spf.example.com -all"')
+        self.__parser.add_argument('-e', '--expected', dest='expected',
+                                   help='Expected SPF value of the domains without their own expected value')
+        self.__parser.add_argument('-w', '--warning', dest='warning', type=int, default=8,
+                                   help='DNS lookups of a policy with all includes to exit in warning state. '
+                                        'More than 10 are always critical. Default: 8')
+        self.__parser.add_argument('--workers', dest='workers', type=int, default=16,
+                                   help='Number of domains resolved at the same time. Default: 16')
+
+    def configure(self, args):
+        self.__logger = self.get_logger()
+        self.__status_builder = self.get_status_builder()
+
+        self.__resolver = args.resolver
+        self.__warning = args.warning
+        self.__workers = args.workers
+        self.__dns_cache_size = args.dns_cache_size
+        self.__dns_cache_dir = args.dns_cache_dir
+        self.__dns_transport = args.dns_transport
+        self.__dns_tls_port = args.dns_tls_port
+        self.__dns_tls_hostname = args.dns_tls_hostname
+        self.__dns_tls_ca_file = args.dns_tls_ca_file
+        if 1 > self.__workers:
+            self.__status_builder.unknown('Number of workers must be at least 1')
+            self.__status_builder.exit()
+
+        domains = {}
+        for domain in args.domains:
+            domains.setdefault(domain, args.expected)
+        if None is not args.file:
+            try:
+                with open(args.file, 'r') as file:
+                    for line in file:
+                        line = line.split(None, 1)
+                        if 0 == len(line) or line[0].startswith('#'):
+                            continue
+                        domains.setdefault(line[0], line[1].strip() if 2 == len(line) else args.expected)
+            except OSError as e:
+                self.__status_builder.unknown(f'Can not read domains from "{args.file}": {e}')
+                self.__status_builder.exit()
+
+        if 0 == len(domains):
+            self.__status_builder.unknown('No domain to check. Use --domain or --file')
+            self.__status_builder.exit()
+        self.__domains = list(domains.items())
+
+    def run(self):
+        # the domains are resolved in other threads -> hand the deadline of this check on
+        deadline = Deadline.get_current()
+        if None is deadline and 0 <= self.get_signals().get_timeout():
+            deadline = Deadline(self.get_signals().get_timeout())
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+            futures = [pool.submit(self.__resolve_domain, deadline, domain) for domain, expected in self.__domains]
+            policies = [future.result() for future in futures]
+            self.resolve_includes(pool, deadline, [spf[0] for spf, result in policies
+                                                   if None is not spf and 1 == len(spf)])
+
+        for (domain, expected), (spf, result) in zip(self.__domains, policies):
+            self.__add_result(domain, expected, spf, result)
+
+        self.__status_builder.exit(all_outputs=True)
+
+    def resolve_includes(self, pool, deadline, policies):
+        # includes of the same depth are resolved at the same time, each domain once.
+        # deeper includes need more than 10 lookups anyway
+        targets = [target for policy in policies for target in self.get_targets(policy)]
+        for depth in range(self.LOOKUP_LIMIT):
+            names = [name for name in dict.fromkeys(targets) if name not in self.__records]
+            if 0 == len(names):
+                break
+            self.__logger.info(f'Resolve {len(names)} included SPF policies of depth {depth + 1}')
+            futures = [pool.submit(self.__resolve_include, deadline, name) for name in names]
+            targets = []
+            for name, future in zip(names, futures):
+                self.__records[name] = future.result()
+                spf, error = self.__records[name]
+                if None is not spf and 1 == len(spf):
+                    targets += self.get_targets(spf[0])
+
+    def __get_executor(self, status_builder):
+        return DNSExecutor(self.__logger, self.__parser, status_builder, self.__resolver, self.__dns_cache_size,
+                           self.__dns_cache_dir, self.__dns_transport, self.__dns_tls_port, self.__dns_tls_hostname,
+                           self.__dns_tls_ca_file)
+
+    def __resolve_domain(self, deadline, domain):
+        # messages are reported with the result of the domain
+        Deadline.set_current(deadline)
+        status_builder = StatusBuilder(self.__logger, True)
+        try:
+            return self.__get_executor(status_builder).resolve_SPF(domain), status_builder.get_result()
+        except CheckExit as e:
+            return None, e.get_result()
+        except dns.exception.DNSException as e:
+            # only this domain is unknown
+            status_builder.unknown(f'Can not resolve SPF policy: {e}')
+            return None, status_builder.get_result()
+        finally:
+            Deadline.set_current(None)
+
+    def __resolve_include(self, deadline, name):
+        # -> (policies, error)
+        Deadline.set_current(deadline)
+        executor = self.__get_executor(StatusBuilder(self.__logger, True))
+        try:
+            txt = executor.resolve_TXT(name, False)
+            return [] if None is txt else executor.get_SPF_policies(txt), None
+        except CheckExit as e:
+            return None, ' '.join([str(message) for message in e.get_result().get_unknown()])
+        except dns.exception.DNSException as e:
+            return None, str(e)
+        finally:
+            Deadline.set_current(None)
+
+    @staticmethod
+    def get_terms(policy):
+        # -> [(name, domain, is mechanism)], e.g. ("include", "_spf.example.com", True) or ("ip4", None, True)
+        terms = []
+        for term in policy.split():
+            name = term.split(':', 1)[0].split('/', 1)[0]
+            if '=' in name:
+                name, _, value = term.partition('=')
+                terms.append((name.lower(), value, False))
+            else:
+                name, _, value = term.lstrip('+-~?').partition(':')
+                terms.append((name.split('/', 1)[0].lower(), value.split('/', 1)[0] if '' != value else None, True))
+        return terms
+
+    def get_targets(self, policy):
+        # included and redirected domains, domains with macros are only known when a mail is checked
+        terms = self.get_terms(policy)
+        has_all = 'all' in [name for name, value, mechanism in terms if mechanism]
+        return [value.lower().rstrip('.') for name, value, mechanism in terms
+                if (('include' == name and mechanism) or ('redirect' == name and not mechanism and not has_all))
+                and None is not value and '%' not in value]
+
+    def expand(self, policy, visiting=frozenset()):
+        # -> (DNS lookups, mechanisms, errors) of the policy with all included policies
+        terms = self.get_terms(policy)
+        has_all = 'all' in [name for name, value, mechanism in terms if mechanism]
+        lookups = 0
+        mechanisms = 0
+        errors = []
+        for name, value, mechanism in terms:
+            if mechanism:
+                mechanisms += 1
+            if mechanism and name in self.LOOKUP_MECHANISMS:
+                lookups += 1
+            elif not mechanism and 'redirect' == name and not has_all:
+                # a redirect next to "all" is ignored (RFC 7208 6.1)
+                lookups += 1
+            else:
+                continue
+
+            if name in ['include', 'redirect'] and None is not value and '%' not in value:
+                included_lookups, included_mechanisms, included_errors = self.__expand_domain(
+                    value.lower().rstrip('.'), visiting)
+                lookups += included_lookups
+                mechanisms += included_mechanisms
+                errors += included_errors
+        return lookups, mechanisms, errors
+
+    def __expand_domain(self, name, visiting):
+        if name in visiting:
+            return 0, 0, [f'SPF policy of "{name}" includes itself']
+        if name in self.__expanded:
+            return self.__expanded[name]
+        if name not in self.__records:
+            # not resolved, deeper than the lookup limit
+            return 0, 0, []
+
+        spf, error = self.__records[name]
+        if None is not error:
+            expanded = (0, 0, [f'Can not resolve SPF policy of "{name}": {error}'])
+        elif 0 == len(spf):
+            expanded = (0, 0, [f'No SPF policy found for included domain "{name}"'])
+        elif 1 != len(spf):
+            expanded = (0, 0, [f'Multiple SPF policies found for included domain "{name}"'])
+        else:
+            expanded = self.expand(spf[0], visiting | {name})
+        self.__expanded[name] = expanded
+        return expanded
+
+    def __add_result(self, domain, expected, spf, result):
+        for messages, add in [(result.get_critical(), self.__status_builder.critical),
+                              (result.get_warning(), self.__status_builder.warning),
+                              (result.get_unknown(), self.__status_builder.unknown),
+                              (result.get_success(), self.__status_builder.success)]:
+            for message in messages:
+                add(domain + ': ' + str(message))
+        if None is spf:
+            return
+
+        if 0 == len(spf):
+            self.__status_builder.unknown(domain + ': No SPF policy found')
+            return
+
+        if 1 != len(spf):
+            self.__status_builder.critical(domain + ': Invalid SPF policy detected. You have multiple SPF policies '
+                                                    'specified')
+            return
+
+        if None is not expected and spf[0] != expected:
+            self.__status_builder.critical(domain + ': Invalid SPF policy detected. Expected: "' + expected
+                                           + '" Got: "' + spf[0] + '"')
+
+        # an include of the domain itself is a cycle as well
+        lookups, mechanisms, errors = self.expand(spf[0], frozenset([domain.lower().rstrip('.')]))
+        for error in errors:
+            self.__status_builder.critical(domain + ': ' + error)
+
+        description = f'{domain}: SPF policy "{spf[0]}" needs {lookups} of {self.LOOKUP_LIMIT} DNS lookups ' \
+                      f'with {mechanisms} mechanisms'
+        # labels of the domains must be unique
+        perfdata = [Perfdata(f"'{domain} lookups'", lookups, None, self.__warning, self.LOOKUP_LIMIT, 0),
+                    Perfdata(f"'{domain} mechanisms'", mechanisms, None, None, None, 0)]
+        if self.LOOKUP_LIMIT < lookups:
+            self.__status_builder.critical(Output(description + ', more than allowed by RFC 7208', perfdata))
+        elif 0 != len(errors):
+            self.__status_builder.critical(Output(description, perfdata))
+        elif self.__warning < lookups:
+            self.__status_builder.warning(Output(description, perfdata))
+        else:
+            self.__status_builder.success(Output(description, perfdata))
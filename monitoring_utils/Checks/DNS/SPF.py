@@ -48,6 +48,8 @@ class SPF(Plugin):
         self.__parser = self.get_parser()
         self.__parser.add_argument('-r', '--resolver', dest='resolver', default='1.1.1.1',
                                    help='Resolver for DNS Queries')
+        DNSExecutor.add_cache_args(self.__parser)
+        DNSExecutor.add_transport_args(self.__parser)
         self.__parser.add_argument('-e', '--expected', dest='expected', required=True,
                                    help='Expected SPF value')
         self.__parser.add_argument('-d', '--domain', dest='domain', required=True,
@@ -60,7 +62,9 @@ class SPF(Plugin):
         self.__expected = args.expected
         self.__domain = args.domain
         self.__resolver = args.resolver
-        self.__executor = DNSExecutor(self.__logger, self.__parser, self.__status_builder, self.__resolver)
+        self.__executor = DNSExecutor(self.__logger, self.__parser, self.__status_builder, self.__resolver,
+                                      args.dns_cache_size, args.dns_cache_dir, args.dns_transport, args.dns_tls_port,
+                                      args.dns_tls_hostname, args.dns_tls_ca_file)
 
     def run(self):
 
@@ -1,7 +1,5 @@
 #!/usr/bin/python3
 # -*- coding: utf-8
-import json
-
 from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
 from monitoring_utils.Core.Plugin.Plugin import Plugin
 
@@ -54,6 +52,10 @@ class GithubLatestRelease(Plugin):
                 '-r', '--repository', dest='repository', required=True,
                 help='Github repository url'
         )
+        # unchanged releases are answered with 304 which don't count against the rate limit
+        WebExecutor.add_http_cache_args(self.__parser, 1000)
+        WebExecutor.add_timing_args(self.__parser)
+        WebExecutor.add_size_args(self.__parser)
 
     def configure(self, args):
         self.__logger = self.get_logger()
@@ -67,12 +69,24 @@ class GithubLatestRelease(Plugin):
                 self.__parser,
                 self.__status_builder,
                 domain="api.github.com",
-                uri=f"/repos/{repo_name}/releases/latest"
+                uri=f"/repos/{repo_name}/releases/latest",
+                http_cache_size=args.http_cache_size,
+                http_cache_dir=args.http_cache_dir,
+                warning_time=args.warning_time,
+                critical_time=args.critical_time,
+                max_size=args.max_size,
+                max_decoded_size=args.max_decoded_size
         )
 
     def run(self):
 
-        release_info = json.loads(self.__executor.run_get())
+        # release responses contain the full changelog and assets -> only decode the needed fields
+        release_info = self.__executor.run_get_json(['tag_name', 'html_url'])
+        self.__executor.report_timings()
+
+        if 'tag_name' not in release_info:
+            self.__status_builder.unknown(f"No release found for repository '{self.__repository}'")
+            self.__status_builder.exit()
 
         if release_info['tag_name'] == self.__expected:
             self.__status_builder.success('Version matched')
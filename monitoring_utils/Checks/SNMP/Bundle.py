@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+import importlib
+import shlex
+
+from monitoring_utils.Core.Executor.SNMPExecutor import SNMPExecutor
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+
+
+class Bundle(Plugin):
+    FAMILIES = {
+        'synology': ('1.3.6.1.4.1.6574', 'monitoring_utils.Checks.SNMP.Synology'),
+        'powernet': ('1.3.6.1.4.1.318.1.1.1', 'monitoring_utils.Checks.SNMP.PowerNet_MIB'),
+        'ucd': ('1.3.6.1.4.1.2021', 'monitoring_utils.Checks.SNMP.UCD_SNMP_MIB'),
+    }
+
+    def __init__(self):
+        self.__logger = None
+        self.__status_builder = None
+
+        self.__snmp_executor = None
+        self.__family = None
+        self.__checks = []
+
+        Plugin.__init__(self, 'Walk the subtree of a device family once and evaluate several checks on it')
+
+    def add_args(self):
+        self.__parser = self.get_parser()
+        self.__logger = self.get_logger()
+        self.__status_builder = self.get_status_builder()
+        self.__snmp_executor = SNMPExecutor(self.__logger, self.__status_builder, self.__parser, None)
+        self.__snmp_executor.add_args()
+
+        self.__parser.add_argument('-f', '--family', dest='family', required=True, type=str,
+                                   choices=list(self.FAMILIES.keys()), help='Device family to walk')
+        self.__parser.add_argument('--check', dest='checks', required=True, action='append', type=str,
+                                   help='Check of the family with its arguments, e.g. "RAIDStatus -r 1 -w 80 -c 90". '
+                                        'SNMP connection arguments are passed on. Can be used multiple times')
+
+    def configure(self, args):
+        self.__snmp_executor.configure(args)
+        self.__family = args.family
+        self.__checks = args.checks
+
+    def run(self):
+        oid, package = self.FAMILIES[self.__family]
+        rows = self.__snmp_executor.walk(oid)
+        self.__logger.debug('Got ' + str(len(rows)) + ' OIDs for family "' + self.__family + '"')
+
+        for check in self.__checks:
+            arguments = shlex.split(check)
+            if 0 == len(arguments):
+                continue
+            name = arguments[0]
+
+            plugin = self.__get_plugin(package, name)
+            if None is plugin:
+                self.__status_builder.unknown(Output(f'{name}: Check not found in family "{self.__family}"'))
+                continue
+
+            SNMPExecutor.set_prefetched(oid, rows)
+            try:
+                result = plugin.check(arguments[1:] + self.__snmp_executor.get_connection_arguments())
+            finally:
+                SNMPExecutor.set_prefetched(None, None)
+
+            self.__add_result(name, result)
+
+    def __get_plugin(self, package, name):
+        if not name.isidentifier():
+            return None
+        try:
+            module = importlib.import_module(package + '.' + name)
+        except ImportError:
+            return None
+
+        plugin = getattr(module, name, None)
+        if not isinstance(plugin, type) or not issubclass(plugin, Plugin):
+            return None
+        return plugin
+
+    def __add_result(self, name, result):
+        if 0 == len(result.get_critical() + result.get_warning() + result.get_unknown() + result.get_success()):
+            self.__status_builder.unknown(Output(name + ': ' + ' '.join(result.get_output())))
+            return
+
+        for messages, add in [(result.get_critical(), self.__status_builder.critical),
+                              (result.get_warning(), self.__status_builder.warning),
+                              (result.get_unknown(), self.__status_builder.unknown),
+                              (result.get_success(), self.__status_builder.success)]:
+            for message in messages:
+                if isinstance(message, Output):
+                    add(Output(name + ': ' + message.get_description(),
+                               [self.__get_perfdata(name, perfdata) for perfdata in message.get_perfdata()]))
+                else:
+                    add(Output(name + ': ' + str(message)))
+
+    def __get_perfdata(self, name, perfdata):
+        # labels must be unique, checks of a bundle may use the same label
+        label = perfdata.get_label()
+        if 2 <= len(label) and label.startswith("'") and label.endswith("'"):
+            label = label[1:-1]
+        return Perfdata(f"'{name} {label}'", perfdata.get_value(), perfdata.get_unit(), perfdata.get_warning(),
+                        perfdata.get_critical(), perfdata.get_min(), perfdata.get_max())
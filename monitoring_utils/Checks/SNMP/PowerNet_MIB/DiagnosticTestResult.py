@@ -82,5 +82,3 @@ class DiagnosticTestResult(Plugin):
             self.__status_builder.unknown(
                 Output(f'Got unknown diagnostic report status information "{oids[0]["value"]}". {last_run}'))
 
-
-DiagnosticTestResult()
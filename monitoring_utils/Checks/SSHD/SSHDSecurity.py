@@ -37,6 +37,8 @@ class SSHDSecurity(Plugin):
 
         self.__config = []
         self.__running_config = []
+        self.__cache_ttl = 0
+        self.__cache_dir = None
         Plugin.__init__(self, 'Check the security of sshd')
 
     def add_args(self):
@@ -57,12 +59,15 @@ class SSHDSecurity(Plugin):
         self.__parser.add_argument('-p', '--port', dest='port', type=int, default=22, help='Listen port')
         self.__parser.add_argument('-C', '--config', dest='config', action='append', default=[],
                                    help='Other config values to check. Format: OPTION=VALUE_1|VALUE_2|...|VALUE_N')
+        CLIExecutor.add_cache_args(self.__parser)
 
     def configure(self, args):
         self.__logger = self.get_logger()
         self.__status_builder = self.get_status_builder()
 
         self.__config = args.config
+        self.__cache_ttl = args.cache_ttl
+        self.__cache_dir = args.cache_dir
         self.__config.append('permitrootlogin=' + args.permitrootlogin)
         self.__config.append('pubkeyauthentication=' + args.pubkeyauthentication)
         self.__config.append('passwordauthentication=' + args.passwordauthentication)
@@ -124,7 +129,9 @@ class SSHDSecurity(Plugin):
 
     def get_running_config(self):
         cli_executor = CLIExecutor(logger=self.__logger, status_builder=self.__status_builder,
-                                   command_array=['sudo', 'sshd', '-T'])
+                                   command_array=['sudo', 'sshd', '-T'], cache_ttl=self.__cache_ttl,
+                                   watched_files=['/etc/ssh/sshd_config', '/etc/ssh/sshd_config.d/**'],
+                                   cache_dir=self.__cache_dir)
 
         output = cli_executor.run()
 
@@ -27,25 +27,35 @@
 #  and also my other projects <https://github.com/f-froehlich>
 import json
 import time
-from copy import copy
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
 
+from monitoring_utils.Core.Deadline import Deadline
 from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
 from monitoring_utils.Core.Plugin.Plugin import Plugin
 
 
 class MozillaObservatory(Plugin):
+    # the responses also contain the headers and the output of each test which the check doesn't need
+    SCAN_FIELDS = ['end_time', 'grade', 'hidden', 'scan_id', 'score', 'likelihood_indicator', 'start_time', 'state',
+                   'tests_failed', 'tests_passed', 'tests_quantity', 'error', 'text']
+    TEST_FIELDS = ['*.expectation', '*.name', '*.pass', '*.result', '*.score_description', '*.score_modifier']
 
     def __init__(self):
         self.__criticalgrade = None
         self.__criticalscore = None
         self.__warninggrade = None
         self.__warningscore = None
-        self.__args = None
-        self.__host = None
+        self.__hosts = []
         self.__ignorehidden = None
         self.__ignorerescan = None
         self.__web_executor = None
         self.__scan_test_config = {}
+        self.__uri = None
+        self.__max_age = None
+        self.__poll_interval = None
+        self.__poll_max_interval = None
+        self.__poll_backoff = None
 
         Plugin.__init__(self, 'Check mozilla http-observatory for a host')
 
@@ -88,12 +98,22 @@ class MozillaObservatory(Plugin):
         self.__parser.add_argument('--config', dest='testconfig', action='append', default=[],
                                    help='Config for each individual test. Format: NAME:WARNING_SCORE:CRITICAL_SCORE. To skip a test define NAME:-:-')
 
-        self.__parser.add_argument('-H', '--host', dest='host', required=True, help='Host to scan')
+        self.__parser.add_argument('-H', '--host', dest='hosts', required=True, action='append',
+                                   help='Host to scan. Can be used multiple times, all scans run at the same time')
+        self.__parser.add_argument('--max-age', dest='maxage', type=int,
+                                   help='Use the last finished scan of a host if it is not older than this many '
+                                        'seconds instead of starting a new one')
+        self.__parser.add_argument('--poll-interval', dest='pollinterval', type=float, default=2,
+                                   help='Seconds to wait before the first poll of a running scan. Default: 2')
+        self.__parser.add_argument('--poll-max-interval', dest='pollmaxinterval', type=float, default=30,
+                                   help='Maximum seconds between two polls of a running scan. Default: 30')
+        self.__parser.add_argument('--poll-backoff', dest='pollbackoff', type=float, default=2,
+                                   help='Factor the interval between two polls grows with. Default: 2')
 
     def configure(self, args):
         self.__logger = self.get_logger()
         self.__status_builder = self.get_status_builder()
-        self.__args = args
+        self.__web_executor.configure(args)
 
         config_error = False
 
@@ -104,7 +124,17 @@ class MozillaObservatory(Plugin):
             config_error = True
             self.__status_builder.unknown("Warning grade must be better than critical grade")
 
-        self.__host = args.host
+        if 0 >= args.pollinterval or args.pollinterval > args.pollmaxinterval or 1 > args.pollbackoff:
+            config_error = True
+            self.__status_builder.unknown("Poll interval must be positive and not greater than the maximum poll "
+                                          "interval, poll backoff must be at least 1")
+
+        self.__hosts = list(dict.fromkeys(args.hosts))
+        self.__uri = args.uri
+        self.__max_age = args.maxage
+        self.__poll_interval = args.pollinterval
+        self.__poll_max_interval = args.pollmaxinterval
+        self.__poll_backoff = args.pollbackoff
         self.__ignorehidden = args.ignorehidden
         self.__ignorerescan = args.ignorerescan
         self.__warningscore = args.warningscore
@@ -150,12 +180,24 @@ class MozillaObservatory(Plugin):
             self.__status_builder.exit()
 
     def run(self):
-        scan = self.scan_host(self.__host, not self.__ignorerescan, not self.__ignorehidden)
-        scan_tests = self.get_scan_tests(scan)
-        self.check_scan(scan)
-        self.check_scan_tests(scan_tests)
+        scans = self.scan_hosts(self.__hosts, not self.__ignorerescan, not self.__ignorehidden)
+        for host in self.__hosts:
+            if host not in scans:
+                continue
+            scan_tests = self.get_scan_tests(scans[host])
+            self.check_scan(scans[host])
+            self.check_scan_tests(scans[host], scan_tests)
+
+        if len(scans) == len(self.__hosts):
+            self.__status_builder.success('All checks passed.')
+        # timing of the last request to the service
+        self.__web_executor.report_timings()
+
+    def __get_prefix(self, scan):
+        return self.__get_host_prefix(scan.get_host())
 
-        self.__status_builder.success('All checks passed.')
+    def __get_host_prefix(self, host):
+        return '' if 1 == len(self.__hosts) else host + ': '
 
     def map_grade(self, grade):
         return {
@@ -209,7 +251,7 @@ class MozillaObservatory(Plugin):
             'critical': -10
         })
 
-    def check_scan_tests(self, scan_tests):
+    def check_scan_tests(self, scan, scan_tests):
         for test in scan_tests:
             config = self.__get_scan_test_config(test.get_name())
             if config['ignore']:
@@ -218,7 +260,7 @@ class MozillaObservatory(Plugin):
                 continue
             if test.get_score_modifier() <= config['critical']:
                 self.__status_builder.critical(
-                    f"""Test {test.get_name()} failed. Score modifier is {test.get_score_modifier()}. 
+                    f"""{self.__get_prefix(scan)}Test {test.get_name()} failed. Score modifier is {test.get_score_modifier()}. 
 Expected: {test.get_expectation()}
 Result: {test.get_result()}
 Description: {test.get_score_description()}
@@ -226,7 +268,7 @@ See Details on: https://infosec.mozilla.org/guidelines/web_security#{test.get_na
 """.replace("\n", " "))
             elif test.get_score_modifier() <= config['warning']:
                 self.__status_builder.warning(
-                    f"""Test {test.get_name()} failed. Score modifier is {test.get_score_modifier()}. 
+                    f"""{self.__get_prefix(scan)}Test {test.get_name()} failed. Score modifier is {test.get_score_modifier()}. 
 Expected: {test.get_expectation()}
 Result: {test.get_result()}
 Description: {test.get_score_description()}
@@ -238,32 +280,28 @@ See Details on: https://infosec.mozilla.org/guidelines/web_security#{test.get_na
             self.__logger.info(
                 f'Score of scan is lower than critical score. Expected higher than {self.__criticalscore} got {scan.get_score()}')
             self.__status_builder.critical(
-                f'Score of scan is lower than critical score. Expected higher than {self.__criticalscore} got {scan.get_score()}')
+                f'{self.__get_prefix(scan)}Score of scan is lower than critical score. Expected higher than {self.__criticalscore} got {scan.get_score()}')
         elif self.map_grade(scan.get_grade()) >= self.map_grade(self.__criticalgrade):
             self.__logger.info(
                 f'Grade of scan is lower than critical grade. Expected higher than {self.__criticalgrade} got {scan.get_grade()}')
             self.__status_builder.critical(
-                f'Grade of scan is lower than critical grade. Expected higher than {self.__criticalgrade} got {scan.get_grade()}')
+                f'{self.__get_prefix(scan)}Grade of scan is lower than critical grade. Expected higher than {self.__criticalgrade} got {scan.get_grade()}')
         elif scan.get_score() <= self.__warningscore:
             self.__logger.info(
                 f'Score of scan is lower than warning score. Expected higher than {self.__warningscore} got {scan.get_score()}')
             self.__status_builder.warning(
-                f'Score of scan is lower than warning score. Expected higher than {self.__warningscore} got {scan.get_score()}')
+                f'{self.__get_prefix(scan)}Score of scan is lower than warning score. Expected higher than {self.__warningscore} got {scan.get_score()}')
         elif self.map_grade(scan.get_grade()) >= self.map_grade(self.__warninggrade):
             self.__logger.info(
                 f'Grade of scan is lower than warning grade. Expected higher than {self.__warninggrade} got {scan.get_grade()}')
             self.__status_builder.warning(
-                f'Grade of scan is lower than warning grade. Expected higher than {self.__warninggrade} got {scan.get_grade()}')
+                f'{self.__get_prefix(scan)}Grade of scan is lower than warning grade. Expected higher than {self.__warninggrade} got {scan.get_grade()}')
 
     def get_scan_tests(self, scan):
         self.__logger.debug(f'Get scan results for scan {scan.get_scan_id()}')
 
-        executor = WebExecutor(self.__logger, self.__parser, self.__status_builder)
-        args = copy(self.__args)
-        args.uri = f'{args.uri}/getScanResults?scan={scan.get_scan_id()}'
-        executor.configure(args)
-
-        result = json.loads(executor.run_get())
+        result = self.__web_executor.run_get_json(self.TEST_FIELDS,
+                                                  f'{self.__uri}/getScanResults?scan={scan.get_scan_id()}')
         self.__logger.debug(result)
         tests = []
         for test_data in result.values():
@@ -274,47 +312,121 @@ See Details on: https://infosec.mozilla.org/guidelines/web_security#{test.get_na
         return tests
 
     def scan_host(self, host, force_rescan=True, hide_results=True):
-        self.__logger.debug(f'Scanning host {host} with rescan={force_rescan}, hide_results={hide_results}')
-        executor = WebExecutor(self.__logger, self.__parser, self.__status_builder)
-        args = copy(self.__args)
-        args.uri = f'{args.uri}/analyze?host={self.__host}'
-        executor.configure(args)
-
-        while True:
-            result = json.loads(
-                executor.run_post(data={'rescan': not self.__ignorerescan, 'hidden': not self.__ignorehidden})
-            )
-            self.__logger.debug(result)
-
-            if None is not result.get('error', None):
-                self.__logger.error(f'Scan for host {host} is failed')
-                self.__status_builder.critical(result.get('text', result['error']))
-                self.__status_builder.exit()
+        scans = self.scan_hosts([host], force_rescan, hide_results)
+        if host not in scans:
+            self.__status_builder.exit()
+        return scans[host]
+
+    def scan_hosts(self, hosts, force_rescan=True, hide_results=True):
+        # start all scans first and poll them afterwards -> the scans run at the same time
+        scans = {}
+        intervals = {}
+        next_polls = {}
+        for host in hosts:
+            scan = self.__get_recent_scan(host)
+            if None is scan:
+                scan = self.__start_scan(host, force_rescan, hide_results)
+            if None is scan or self.__is_done(scan, scans):
+                continue
+            intervals[host] = self.__poll_interval
+            next_polls[host] = time.monotonic() + self.__get_poll_delay(host)
+
+        while 0 != len(next_polls):
+            host = min(next_polls, key=next_polls.get)
+            delay = next_polls[host] - time.monotonic()
+            remaining = Deadline.remaining()
+            if None is not remaining and remaining < delay:
+                for pending in next_polls.keys():
+                    self.__status_builder.unknown(f'Scan for host {pending} is not finished in time')
+                break
+            if 0 < delay:
+                self.__logger.debug(f'Wait {round(delay, 1)} seconds until the next poll of the scan for host {host}')
+                time.sleep(delay)
 
-            scan = Scan(result)
+            scan = self.__get_scan(host)
+            if None is scan or self.__is_done(scan, scans):
+                del next_polls[host]
+                continue
+            intervals[host] = min(intervals[host] * self.__poll_backoff, self.__poll_max_interval)
+            next_polls[host] = time.monotonic() + self.__get_poll_delay(host, intervals[host])
+
+        return scans
+
+    def __get_poll_delay(self, host, interval=None):
+        # the service knows best how long a scan takes
+        retry_after = self.__web_executor.get_response_headers().get('Retry-After', '')
+        if retry_after.isdigit():
+            self.__logger.debug(f'Service asks to poll the scan for host {host} again in {retry_after} seconds')
+            return int(retry_after)
+        return self.__poll_interval if None is interval else interval
+
+    def __is_done(self, scan, scans):
+        if scan.is_finished():
+            self.__logger.debug(f'Scan for host {scan.get_host()} is finished')
+            scans[scan.get_host()] = scan
+            return True
+        if scan.is_failed() or scan.is_aborted():
+            self.__logger.error(f'Scan for host {scan.get_host()} is failed')
+            self.__status_builder.unknown(f'Scan for host {scan.get_host()} is failed')
+            return True
+
+        self.__logger.debug(f'Scan for host {scan.get_host()} is {scan.get_state()}')
+        return False
+
+    def __get_recent_scan(self, host):
+        if None is self.__max_age:
+            return None
+
+        scan = self.__get_scan(host, False)
+        if None is scan or not scan.is_finished():
+            return None
+        age = scan.get_age()
+        if None is age or age > self.__max_age:
+            self.__logger.debug(f'Last scan for host {host} is too old')
+            return None
+
+        self.__logger.info(f'Use scan for host {host} finished {int(age)} seconds ago')
+        return scan
 
-            if scan.is_finished():
-                self.__logger.debug(f'Scan for host {host} is finished')
-                break
-            elif scan.is_failed():
+    def __get_scan(self, host, report_error=True):
+        result = self.__web_executor.run_get_json(self.SCAN_FIELDS, f'{self.__uri}/analyze?host={quote(host)}')
+        self.__logger.debug(result)
+        if None is not result.get('error', None) or 'scan_id' not in result:
+            if report_error:
                 self.__logger.error(f'Scan for host {host} is failed')
-                self.__status_builder.unknown(f'Scan for host {host} is failed')
-                self.__status_builder.exit()
+                self.__status_builder.unknown(self.__get_host_prefix(host)
+                                              + result.get('text', result.get('error', f'No scan for host {host}')))
+            return None
+        return Scan(result, host)
+
+    def __start_scan(self, host, force_rescan, hide_results):
+        self.__logger.debug(f'Scanning host {host} with rescan={force_rescan}, hide_results={hide_results}')
+        result = json.loads(self.__web_executor.run_post(data={'rescan': force_rescan, 'hidden': hide_results},
+                                                         uri=f'{self.__uri}/analyze?host={quote(host)}'))
+        self.__logger.debug(result)
 
-            else:
-                self.__logger.debug('Wait until scan finished')
-                time.sleep(10)
+        if 'rescan-attempt-too-soon' == result.get('error', None):
+            # the last scan is only a few minutes old -> wait for it instead
+            self.__logger.info(f'Host {host} was scanned recently, use the last scan')
+            result = self.__web_executor.run_get_json(self.SCAN_FIELDS, f'{self.__uri}/analyze?host={quote(host)}')
 
-        return scan
+        if None is not result.get('error', None):
+            # the other hosts are still scanned and reported
+            self.__logger.error(f'Scan for host {host} is failed')
+            self.__status_builder.critical(self.__get_host_prefix(host) + result.get('text', result['error']))
+            return None
+
+        return Scan(result, host)
 
 
 class Scan:
 
-    def __init__(self, scan):
+    def __init__(self, scan, host=None):
+        self.__host = host
         self.__end_time = scan['end_time']
         self.__grade = scan['grade']
         self.__hidden = scan['hidden']
-        self.__response_headers = scan['response_headers']
+        self.__response_headers = scan.get('response_headers')
         self.__scan_id = scan['scan_id']
         self.__score = scan['score']
         self.__likelihood_indicator = scan['likelihood_indicator']
@@ -331,9 +443,18 @@ class Scan:
     def add_test(self, test):
         self.__tests.append(test)
 
+    def get_host(self):
+        return self.__host
+
     def get_end_time(self):
         return self.__end_time
 
+    def get_age(self):
+        try:
+            return time.time() - parsedate_to_datetime(self.__end_time).timestamp()
+        except (TypeError, ValueError):
+            return None
+
     def get_grade(self):
         return self.__grade
 
@@ -388,7 +509,7 @@ class Test:
     def __init__(self, data):
         self.__expectation = data['expectation']
         self.__name = data['name']
-        self.__output = data['output']  # todo different for each test
+        self.__output = data.get('output')  # todo different for each test
         self.__pass = data['pass']
         self.__result = data['result']
         self.__score_description = data['score_description']
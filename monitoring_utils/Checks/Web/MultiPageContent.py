@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+from concurrent.futures import ThreadPoolExecutor
+
+from monitoring_utils.Checks.Web.PageContent import PageContent
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+
+
+class MultiPageContent(Plugin):
+
+    def __init__(self):
+        self.__logger = None
+        self.__status_builder = None
+
+        self.__web_executor = None
+        self.__targets = []
+        self.__workers = 8
+        self.__arguments = []
+
+        Plugin.__init__(self, 'Check content of many pages concurrently')
+
+    def add_args(self):
+        self.__parser = self.get_parser()
+        self.__logger = self.get_logger()
+        self.__status_builder = self.get_status_builder()
+        self.__web_executor = WebExecutor(logger=self.__logger, parser=self.__parser,
+                                          status_builder=self.__status_builder)
+        self.__web_executor.add_args(target=False)
+        PageContent.add_content_args(self.__parser)
+
+        self.__parser.add_argument('-t', '--target', dest='targets', required=True, action='append', type=str,
+                                   help='Page to check. Format: DOMAIN[:PORT][URI], e.g. "example.com:8080/health". '
+                                        'Can be used multiple times')
+        self.__parser.add_argument('--workers', dest='workers', type=int, default=8,
+                                   help='Number of pages fetched at the same time. Default: 8')
+
+    def configure(self, args):
+        self.__web_executor.configure(args)
+        self.__workers = args.workers
+        if 1 > self.__workers:
+            self.__status_builder.unknown('Number of workers must be at least 1')
+            self.__status_builder.exit()
+
+        self.__targets = []
+        for target in args.targets:
+            parsed = self.parse_target(target)
+            if None is parsed:
+                self.__status_builder.unknown(f'Invalid target "{target}". Format: DOMAIN[:PORT][URI]')
+                self.__status_builder.exit()
+            self.__targets.append(parsed)
+
+        self.__arguments = self.__web_executor.get_connection_arguments() + PageContent.get_content_arguments(args)
+        if 0 <= self.get_signals().get_timeout():
+            self.__arguments += ['--timeout', str(self.get_signals().get_timeout())]
+
+    @staticmethod
+    def parse_target(target):
+        separator = target.find('/')
+        address, uri = (target, '/') if -1 == separator else (target[:separator], target[separator:])
+        domain, _, port = address.partition(':')
+        if '' == domain or ('' != port and not port.isdigit()):
+            return None
+        return domain, None if '' == port else int(port), uri
+
+    def run(self):
+        # the checks run in other threads -> hand the deadline of this check on
+        deadline = Deadline.get_current()
+        if None is deadline and 0 <= self.get_signals().get_timeout():
+            deadline = Deadline(self.get_signals().get_timeout())
+
+        with ThreadPoolExecutor(max_workers=min(self.__workers, len(self.__targets))) as pool:
+            futures = [pool.submit(self.__check, deadline, domain, port, uri) for domain, port, uri in self.__targets]
+            # report in the order of the targets
+            for (domain, port, uri), future in zip(self.__targets, futures):
+                name = domain + ('' if None is port else ':' + str(port)) + uri
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # a failing page must not hide the results of the others
+                    self.__logger.info(f'Check of "{name}" failed: {e}')
+                    self.__status_builder.unknown(Output(f'{name}: Plugin failed with {type(e).__name__}: {e}'))
+                    continue
+                self.__add_result(name, result)
+
+    def __check(self, deadline, domain, port, uri):
+        Deadline.set_current(deadline)
+        arguments = ['-d', domain, '-u', uri] + ([] if None is port else ['-p', str(port)])
+        try:
+            return PageContent.check(arguments + self.__arguments)
+        finally:
+            Deadline.set_current(None)
+
+    def __add_result(self, name, result):
+        messages = []
+        for state_messages, add in [(result.get_critical(), self.__status_builder.critical),
+                                    (result.get_warning(), self.__status_builder.warning),
+                                    (result.get_unknown(), self.__status_builder.unknown),
+                                    (result.get_success(), self.__status_builder.success)]:
+            messages += [(message, add) for message in state_messages]
+        if 0 == len(messages):
+            messages = [(' '.join(result.get_output()), self.__status_builder.unknown)]
+
+        for message, add in messages:
+            if isinstance(message, Output):
+                # labels of the pages must be unique
+                perfdata = [Perfdata(f"'{name} {p.get_label()}'", p.get_value(), p.get_unit(), p.get_warning(),
+                                     p.get_critical(), p.get_min(), p.get_max()) for p in message.get_perfdata()]
+                add(Output(name + ': ' + message.get_description(), perfdata))
+            else:
+                add(Output(name + ': ' + str(message)))
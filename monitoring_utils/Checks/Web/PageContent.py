@@ -27,6 +27,9 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
+import re
+
+from monitoring_utils.Core.ContentMatcher import ContentMatcher
 from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
 from monitoring_utils.Core.Plugin.Plugin import Plugin
 
@@ -38,6 +41,8 @@ class PageContent(Plugin):
         self.__critical_content = None
         self.__warning_content = None
         self.__ok_content = None
+        self.__stream = False
+        self.__max_content_size = None
         self.__web_executor = None
         Plugin.__init__(self, 'Check content of a page')
 
@@ -48,47 +53,120 @@ class PageContent(Plugin):
         self.__web_executor = WebExecutor(logger=self.__logger, parser=self.__parser,
                                           status_builder=self.__status_builder)
         self.__web_executor.add_args()
-        self.__parser.add_argument('-w', '--warning-content', dest='warningcontent', action='append', default=[],
-                                   help='Warning content. Return warning state if at least one matched and no Critical content match')
-        self.__parser.add_argument('-c', '--critical-content', dest='criticalcontent', action='append', default=[],
-                                   help='Critical content. Return critical state if at least one matched')
-        self.__parser.add_argument('-o', '--ok-content', dest='okcontent', action='append', default=[],
-                                   help='OK content. Return OK state if at least one matched and no warning or critical content match')
+        self.add_content_args(self.__parser)
+
+    @staticmethod
+    def add_content_args(parser):
+        parser.add_argument('-w', '--warning-content', dest='warningcontent', action='append', default=[],
+                            help='Warning content. Return warning state if at least one matched and no Critical content match')
+        parser.add_argument('-c', '--critical-content', dest='criticalcontent', action='append', default=[],
+                            help='Critical content. Return critical state if at least one matched')
+        parser.add_argument('-o', '--ok-content', dest='okcontent', action='append', default=[],
+                            help='OK content. Return OK state if at least one matched and no warning or critical content match')
+        parser.add_argument('--stream', dest='stream', action='store_true',
+                            help='Check the content while downloading and stop as soon as the state can\'t '
+                                 'change anymore. Content which is not downloaded is not reported')
+        parser.add_argument('--max-content-size', dest='maxcontentsize', type=int,
+                            help='Only check the first bytes of the page')
+        parser.add_argument('--regex', dest='regex', action='store_true',
+                            help='Content patterns are regular expressions. Anchors (^, $) are only supported '
+                                 'without --stream and --max-content-size, the content is searched in chunks then')
+
+    @staticmethod
+    def get_content_arguments(args):
+        arguments = []
+        for option, values in [('-c', args.criticalcontent), ('-w', args.warningcontent), ('-o', args.okcontent)]:
+            for value in values:
+                arguments += [option, value]
+        if args.stream:
+            arguments.append('--stream')
+        if None is not args.maxcontentsize:
+            arguments += ['--max-content-size', str(args.maxcontentsize)]
+        if args.regex:
+            arguments.append('--regex')
+        return arguments
 
     def configure(self, args):
         self.__web_executor.configure(args)
         self.__ok_content = args.okcontent
         self.__warning_content = args.warningcontent
         self.__critical_content = args.criticalcontent
+        self.__stream = args.stream
+        self.__max_content_size = args.maxcontentsize
+        self.__regex = args.regex
+
+        if self.__regex:
+            config_error = False
+            for pattern in self.__critical_content + self.__warning_content + self.__ok_content:
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    config_error = True
+                    self.__status_builder.unknown(f"Invalid regular expression '{pattern}': {e}")
+            if config_error:
+                self.__status_builder.exit()
 
     def run(self):
-        content = self.__web_executor.run()
-        self.parse_page_content(content)
+        if not self.__stream and None is self.__max_content_size:
+            content = self.__web_executor.run()
+            self.parse_page_content(content)
+            self.__web_executor.report_timings()
+            return
+
+        matcher = ContentMatcher(self.__critical_content + self.__warning_content + self.__ok_content, self.__regex)
+        chunks = self.__web_executor.run_get_stream(self.__max_content_size)
+        for chunk in chunks:
+            matcher.feed(chunk)
+            if self.__stream and self.__is_state_certain(matcher):
+                self.__logger.info('State can\'t change anymore, stop reading the response')
+                chunks.close()
+                self.report(matcher, False)
+                self.__web_executor.report_timings()
+                return
+
+        self.report(matcher)
+        self.__web_executor.report_timings()
+
+    def __is_state_certain(self, matcher):
+        if matcher.is_finished() or True in [matcher.is_found(e) for e in self.__critical_content]:
+            return True
+        if 0 != len(self.__critical_content):
+            return False
+
+        ok_found = True in [matcher.is_found(e) for e in self.__ok_content]
+        if True in [matcher.is_found(e) for e in self.__warning_content]:
+            return ok_found or 0 == len(self.__ok_content)
+        return 0 == len(self.__warning_content) and ok_found
 
     def parse_page_content(self, content):
+        matcher = ContentMatcher(self.__critical_content + self.__warning_content + self.__ok_content, self.__regex)
+        matcher.feed(content)
+        self.report(matcher)
+
+    def report(self, matcher, complete=True):
         self.__logger.info('Check critical content')
         for e in self.__critical_content:
             self.__logger.debug('Check if "' + e + '" exists in response')
-            if e in content:
+            if matcher.is_found(e):
                 self.__logger.debug('Critical content "' + e + '" exists in response')
                 self.__status_builder.critical("Found critical content '" + e + "' in response")
 
         self.__logger.info('Check warning content')
         for e in self.__warning_content:
             self.__logger.debug('Check if "' + e + '" exists in response')
-            if e in content:
+            if matcher.is_found(e):
                 self.__logger.debug('Warning content "' + e + '" exists in response')
                 self.__status_builder.warning("Found warning content '" + e + "' in response")
 
         self.__logger.info('Check ok content')
         for e in self.__ok_content:
             self.__logger.debug('Check if "' + e + '" exists in response')
-            if e in content:
+            if matcher.is_found(e):
                 self.__logger.debug('OK content "' + e + '" exists in response')
                 self.__status_builder.success("Found content '" + e + "' in response")
                 return
 
         if 0 == len(self.__ok_content):
             self.__status_builder.unknown("No expected content match. Pleas specify at least one ok result.")
-        else:
+        elif complete:
             self.__status_builder.critical("No expected content match.")
@@ -26,6 +26,7 @@
 #  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
 #  and also my other projects <https://github.com/f-froehlich>
 from monitoring_utils.Core.Executor.Apche2ctlExecutor import Apache2ctlExecutor
+from monitoring_utils.Core.Executor.CLIExecutor import CLIExecutor
 from monitoring_utils.Core.Outputs.Output import Output
 from monitoring_utils.Core.Plugin.Plugin import Plugin
 
@@ -47,10 +48,12 @@ class ProxyRequests(Plugin):
 
         self.__parser.add_argument('-a', '--allow', dest='allow', action='append', default=[],
                                    help='Files to allow ProxyRequests')
+        CLIExecutor.add_cache_args(self.__parser)
 
     def configure(self, args):
         self.__allow = args.allow
-        self.__apachectl_executor = Apache2ctlExecutor(self.__logger, self.__status_builder)
+        self.__apachectl_executor = Apache2ctlExecutor(self.__logger, self.__status_builder, args.cache_ttl,
+                                                     args.cache_dir)
 
     def run(self):
         running_config = self.__apachectl_executor.get_running_config()
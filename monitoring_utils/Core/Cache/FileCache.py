@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+
+from monitoring_utils.Core.Deadline import Deadline
+
+
+class FileCache:
+
+    def __init__(self, logger, directory, namespace, max_entries=None):
+        self.__logger = logger
+        self.__base_directory = directory
+        self.__directory = os.path.join(directory, namespace)
+        # evict the least recently used entries above this size, the mtime of an entry is its last use
+        self.__max_entries = max_entries
+        # None until the directories are checked, False if they can't be trusted
+        self.__enabled = None
+
+    @staticmethod
+    def get_default_directory():
+        return os.path.join(tempfile.gettempdir(), 'monitoring-utils-cache-' + str(os.getuid()))
+
+    def get(self, key):
+        if not self.__create_directory():
+            return None
+        path = self.__get_path(key)
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.__logger.debug('Ignore invalid cache file "' + path + '": ' + str(e))
+            return None
+
+        if entry['expires'] < time.time():
+            self.__logger.debug('Cache entry "' + key + '" expired')
+            return None
+
+        self.__logger.debug('Cache hit for "' + key + '"')
+        if None is not self.__max_entries:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry['value']
+
+    def set(self, key, value, ttl):
+        if not self.__create_directory():
+            return
+        path = self.__get_path(key)
+        # write to a temporary file and rename it -> readers never see a partially written entry
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.__directory, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump({'expires': time.time() + ttl, 'value': value}, file)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        if None is not self.__max_entries:
+            self.__evict()
+
+    def __evict(self):
+        entries = []
+        with os.scandir(self.__directory) as iterator:
+            for entry in iterator:
+                if entry.name.startswith('.') or entry.name.endswith('.lock'):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+
+        if len(entries) <= self.__max_entries:
+            return
+        entries.sort()
+        for mtime, path in entries[:len(entries) - self.__max_entries]:
+            self.__logger.debug('Evict least recently used cache file "' + path + '"')
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    @contextlib.contextmanager
+    def lock(self, key, timeout=None):
+        # only one process computes the value, the others wait and read it from the cache afterwards.
+        # if the lock can't be acquired in time -> continue without the lock
+        if not self.__create_directory():
+            yield False
+            return
+        end = time.monotonic() + Deadline.remaining(timeout if None is not timeout else 60)
+        with open(self.__get_path(key) + '.lock', 'a') as file:
+            locked = False
+            while not locked:
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                except BlockingIOError:
+                    if time.monotonic() >= end:
+                        self.__logger.debug('Could not lock cache entry "' + key + '" in time')
+                        break
+                    time.sleep(0.05)
+            try:
+                yield locked
+            finally:
+                if locked:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def __create_directory(self):
+        if None is not self.__enabled:
+            return self.__enabled
+
+        try:
+            # the default directory is in the shared temp directory -> other users may have created it first
+            for directory in [self.__base_directory, self.__directory]:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+                status = os.lstat(directory)
+                if not stat.S_ISDIR(status.st_mode):
+                    raise OSError('"' + directory + '" is no directory')
+                if status.st_uid != os.getuid():
+                    raise OSError('"' + directory + '" is owned by the user ' + str(status.st_uid))
+                if 0o700 != stat.S_IMODE(status.st_mode):
+                    raise OSError('"' + directory + '" has the mode ' + oct(stat.S_IMODE(status.st_mode))
+                                  + ' instead of 0o700')
+            self.__enabled = True
+        except OSError as e:
+            self.__logger.error('Disable the cache: ' + str(e))
+            self.__enabled = False
+
+        return self.__enabled
+
+    def __get_path(self, key):
+        return os.path.join(self.__directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+from monitoring_utils.Core.Outputs.Output import Output
+
+
+class CheckResult:
+
+    def __init__(self, exit_code, output=None, success=None, warning=None, critical=None, unknown=None):
+        # results are kept by the runners -> each result has its own lists
+        self.__exit_code = exit_code
+        self.__output = [] if None is output else output
+        self.__success = [] if None is success else success
+        self.__warning = [] if None is warning else warning
+        self.__critical = [] if None is critical else critical
+        self.__unknown = [] if None is unknown else unknown
+
+    def get_exit_code(self):
+        return self.__exit_code
+
+    def get_state(self):
+        return {
+            0: 'OK',
+            1: 'WARNING',
+            2: 'CRITICAL',
+            3: 'UNKNOWN',
+        }.get(self.__exit_code, 'UNKNOWN')
+
+    def get_output(self):
+        return self.__output
+
+    def get_success(self):
+        return self.__success
+
+    def get_warning(self):
+        return self.__warning
+
+    def get_critical(self):
+        return self.__critical
+
+    def get_unknown(self):
+        return self.__unknown
+
+    def get_perfdata(self):
+        perfdata = []
+        for messages in [self.__critical, self.__warning, self.__unknown, self.__success]:
+            for message in messages:
+                if isinstance(message, Output):
+                    perfdata += message.get_perfdata()
+        return perfdata
+
+    def to_dict(self):
+        return {
+            'exit_code': self.__exit_code,
+            'state': self.get_state(),
+            'output': self.__output,
+            'success': [str(message) for message in self.__success],
+            'warning': [str(message) for message in self.__warning],
+            'critical': [str(message) for message in self.__critical],
+            'unknown': [str(message) for message in self.__unknown],
+            'perfdata': [{
+                'label': perfdata.get_label(),
+                'value': perfdata.get_value(),
+                'unit': perfdata.get_unit(),
+                'warning': perfdata.get_warning(),
+                'critical': perfdata.get_critical(),
+                'min': perfdata.get_min(),
+                'max': perfdata.get_max(),
+            } for perfdata in self.get_perfdata()],
+        }
@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import re
+import threading
+
+
+class ContentMatcher:
+    # compiled automata are reused by later checks of the same process (e.g. batch or resident runner)
+    __automata = {}
+    __automata_lock = threading.Lock()
+    MAX_CACHED_AUTOMATA = 64
+
+    # regular expressions may match across chunks -> number of characters kept from the previous chunk
+    REGEX_OVERLAP = 4096
+    # matches of already found patterns before the search is rebuilt without them
+    MAX_WASTED_MATCHES = 256
+    # fewer patterns -> one substring search per pattern is faster than the regex of the automaton
+    MIN_AUTOMATON_PATTERNS = 500
+
+    def __init__(self, patterns, regex=False):
+        self.__patterns = list(dict.fromkeys(patterns))
+        self.__regex = regex
+        self.__matches = {}
+        self.__offset = 0
+
+        self.__automaton = None
+        self.__expressions = None
+        self.__tail = ''
+        if regex:
+            self.__expressions = [(pattern, re.compile(pattern)) for pattern in self.__patterns]
+        elif self.MIN_AUTOMATON_PATTERNS <= len(self.__patterns):
+            self.__automaton = self.get_automaton(self.__patterns)
+
+    @staticmethod
+    def get_automaton(patterns):
+        key = tuple(patterns)
+        with ContentMatcher.__automata_lock:
+            automaton = ContentMatcher.__automata.get(key)
+        if None is not automaton:
+            return automaton
+
+        automaton = ContentMatcher.__build(patterns)
+        with ContentMatcher.__automata_lock:
+            if ContentMatcher.MAX_CACHED_AUTOMATA <= len(ContentMatcher.__automata):
+                # dicts keep the insertion order -> drop the oldest automaton
+                del ContentMatcher.__automata[next(iter(ContentMatcher.__automata))]
+            ContentMatcher.__automata[key] = automaton
+        return automaton
+
+    @staticmethod
+    def __build(patterns):
+        # trie of all patterns, the end of a pattern is marked with the key ''
+        trie = {}
+        for pattern in patterns:
+            if '' == pattern:
+                continue
+            node = trie
+            for character in pattern:
+                node = node.setdefault(character, {})
+            node[''] = pattern
+
+        expression = ContentMatcher.__to_regex(trie) if 0 != len(trie) else None
+        return trie, None if None is expression else re.compile(expression), max([len(p) for p in patterns], default=0)
+
+    @staticmethod
+    def __to_regex(node):
+        # the regex only finds positions where a pattern can start -> stop at the first complete pattern of a path
+        prefix = ''
+        while '' not in node and 1 == len(node):
+            character, node = next(iter(node.items()))
+            prefix += re.escape(character)
+        if '' in node:
+            return prefix
+
+        alternatives = [re.escape(character) + ContentMatcher.__to_regex(child)
+                        for character, child in sorted(node.items())]
+        return prefix + '(?:' + '|'.join(alternatives) + ')'
+
+    def feed(self, text):
+        if self.__regex:
+            self.__feed_regex(text)
+        elif None is self.__automaton:
+            self.__feed_substrings(text)
+        else:
+            self.__feed_automaton(text)
+        self.__offset += len(text)
+
+    def __feed_substrings(self, text):
+        window = self.__tail + text
+        window_offset = self.__offset - len(self.__tail)
+        longest = 0
+        for pattern in self.__patterns:
+            if pattern in self.__matches:
+                continue
+            position = window.find(pattern)
+            if -1 != position:
+                self.__matches[pattern] = window_offset + position
+            longest = max(longest, len(pattern))
+
+        # a pattern can start in this chunk and end in the next one
+        self.__tail = window[1 - longest:] if 1 < longest else ''
+
+    def __feed_automaton(self, text):
+        # one alternation regex built from the trie finds the next position where a pattern starts,
+        # the trie is walked from there (at most the longest pattern) to collect all patterns starting at it
+        trie, expression, longest = self.__automaton
+        if '' in self.__patterns:
+            self.__matches.setdefault('', self.__offset)
+        if None is expression or self.is_finished():
+            return
+
+        window = self.__tail + text
+        window_offset = self.__offset - len(self.__tail)
+        matches = self.__matches
+        position = 0
+        wasted = 0
+        while True:
+            match = expression.search(window, position)
+            if None is match:
+                break
+            start = match.start()
+            node = trie
+            new = False
+            for character in window[start:start + longest]:
+                node = node.get(character)
+                if None is node:
+                    break
+                if '' in node and node[''] not in matches:
+                    matches[node['']] = window_offset + start
+                    new = True
+
+            if not new:
+                wasted += 1
+                if self.MAX_WASTED_MATCHES < wasted:
+                    # found patterns keep matching -> search only for the patterns which are not found yet
+                    if self.is_finished():
+                        break
+                    self.__automaton = self.get_automaton([p for p in self.__patterns if p not in matches])
+                    trie, expression, longest = self.__automaton
+                    wasted = 0
+            position = start + 1
+
+        # a pattern can start in this chunk and end in the next one
+        self.__tail = window[1 - longest:] if 1 < longest else ''
+
+    def __feed_regex(self, text):
+        # only the tail of the previous chunk and the new chunk are searched -> anchors (^, $, \A, \Z) match at the
+        # borders of that window instead of the start and end of the content, matches are at most REGEX_OVERLAP long
+        window = self.__tail + text
+        window_offset = self.__offset - len(self.__tail)
+        for pattern, expression in self.__expressions:
+            if pattern in self.__matches:
+                continue
+            match = expression.search(window)
+            if None is not match:
+                self.__matches[pattern] = window_offset + match.start()
+        self.__tail = window[-self.REGEX_OVERLAP:]
+
+    def is_found(self, pattern):
+        return pattern in self.__matches
+
+    def get_found(self):
+        return set(self.__matches.keys())
+
+    def get_matches(self):
+        # pattern -> offset of its first match in the content
+        return dict(self.__matches)
+
+    def is_finished(self):
+        return len(self.__matches) == len(self.__patterns)
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import threading
+import time
+
+
+class Deadline:
+    __current = threading.local()
+
+    def __init__(self, timeout):
+        self.__timeout = timeout
+        self.__expires = time.monotonic() + timeout
+
+    def get_timeout(self):
+        return self.__timeout
+
+    def get_remaining(self):
+        return max(0.0, self.__expires - time.monotonic())
+
+    def is_expired(self):
+        return time.monotonic() >= self.__expires
+
+    @staticmethod
+    def set_current(deadline):
+        Deadline.__current.deadline = deadline
+
+    @staticmethod
+    def get_current():
+        return getattr(Deadline.__current, 'deadline', None)
+
+    @staticmethod
+    def remaining(default=None):
+        deadline = Deadline.get_current()
+        if None is deadline:
+            return default
+        return deadline.get_remaining()
@@ -26,9 +26,6 @@
 #  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
 #  and also my other projects <https://github.com/f-froehlich>
 
-import boto3
-from botocore.exceptions import ClientError
-
 
 class AWSSESExecutor:
 
@@ -63,10 +60,13 @@ class AWSSESExecutor:
         for recipient in args.recipients:
             self.__recipients.append(recipient)
 
+        import boto3
         self.__client = boto3.client('ses', region_name=self.__region, aws_access_key_id=self.__key_id,
                                      aws_secret_access_key=self.__secret)
 
     def send(self, subject, message):
+        from botocore.exceptions import ClientError
+
         self.__logger.info('Sending message:\n Subject: ' + subject + '\n body: ' + message)
         for recipient in self.__recipients:
             try:
@@ -33,15 +33,21 @@ from monitoring_utils.Core.Outputs.Output import Output
 
 class Apache2ctlExecutor:
 
-    def __init__(self, logger, status_builder):
+    def __init__(self, logger, status_builder, cache_ttl=0, cache_dir=None):
 
         self.__status_builder = status_builder
         self.__logger = logger
+        self.__cache_ttl = cache_ttl
+        self.__cache_dir = cache_dir
+
+    def __get_cli_executor(self, command_array):
+        return CLIExecutor(self.__logger, self.__status_builder, command_array, cache_ttl=self.__cache_ttl,
+                           watched_files=['/etc/apache2/**'], cache_dir=self.__cache_dir)
 
     def list_enabled_mods(self) -> List[Dict[str, str]]:
         self.__logger.info('List enabled modules')
 
-        unparsed_modules = CLIExecutor(self.__logger, self.__status_builder, ['sudo', 'apache2ctl', '-M']).run()
+        unparsed_modules = self.__get_cli_executor(['sudo', 'apache2ctl', '-M']).run()
         parsed_modules = []
         is_module = False
         for line in unparsed_modules:
@@ -81,8 +87,7 @@ class Apache2ctlExecutor:
 
     def get_running_config(self) -> List:
         self.require_module("info")
-        unparsed_config = CLIExecutor(self.__logger, self.__status_builder,
-                                      ['sudo', 'apache2ctl', '-DDUMP_CONFIG']).run()
+        unparsed_config = self.__get_cli_executor(['sudo', 'apache2ctl', '-DDUMP_CONFIG']).run_stream()
 
         parsed_config = {}
         current_file = None
@@ -93,9 +98,9 @@ class Apache2ctlExecutor:
             elif "#" == line.strip()[0]:
                 current_line = int(line.replace('#', '').replace(':', '').strip())
             else:
-                parsed_config[current_file] = parsed_config.get(current_file, []) + [{
+                parsed_config.setdefault(current_file, []).append({
                     "line": current_line,
                     "option": line.strip()
-                }]
+                })
 
         return parsed_config
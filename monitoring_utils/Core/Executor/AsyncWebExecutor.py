@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+# asyncio and aiohttp are imported on demand -> plugins can import this module without loading them
+from monitoring_utils.Core.Deadline import Deadline
+
+
+class WebRequestError(Exception):
+    pass
+
+
+class AsyncWebExecutor:
+    # target, headers, client certificate and timeouts are the ones of the configured WebExecutor
+
+    def __init__(self, logger, status_builder, web_executor, max_concurrency=100):
+        self.__logger = logger
+        self.__status_builder = status_builder
+        self.__web_executor = web_executor
+        self.__max_concurrency = max_concurrency
+
+        self.__session = None
+        self.__semaphore = None
+        self.__loop = None
+
+    @staticmethod
+    def is_available():
+        try:
+            import aiohttp
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def add_args(parser):
+        parser.add_argument('--max-concurrency', dest='max_concurrency', type=int, default=100,
+                            help='Number of requests sent at the same time. Default: 100')
+
+    def configure(self, args):
+        self.__max_concurrency = args.max_concurrency
+        if 1 > self.__max_concurrency:
+            self.__status_builder.unknown('Maximum concurrency must be at least 1')
+            self.__status_builder.exit()
+
+    async def __get_session(self):
+        import asyncio
+
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if None is not self.__session and self.__loop is loop:
+            return self.__session
+
+        # sessions belong to the event loop they are created in
+        ssl_context = True
+        cert = self.__web_executor.get_client_cert_config()
+        if None is not cert:
+            import ssl
+            ssl_context = ssl.create_default_context()
+            ssl_context.load_cert_chain(cert[0], cert[1])
+
+        self.__loop = loop
+        self.__semaphore = asyncio.Semaphore(self.__max_concurrency)
+        self.__session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.__max_concurrency, ssl=ssl_context),
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        return self.__session
+
+    async def get(self, uri=None):
+        return await self.__request('GET', uri)
+
+    async def post(self, data=None, json=None, uri=None):
+        return await self.__request('POST', uri, data=data, json=json)
+
+    async def __request(self, method, uri, **kwargs):
+        import asyncio
+
+        import aiohttp
+
+        url = self.__web_executor.get_url(uri)
+        headers = self.__web_executor.get_header()
+        if 'accept-encoding' not in [name.lower() for name in headers]:
+            # aiohttp also offers br if brotli is installed
+            headers['Accept-Encoding'] = self.__web_executor.ACCEPT_ENCODING
+        if 0 >= Deadline.remaining(1):
+            # aiohttp treats a total timeout of 0 as no timeout
+            self.__logger.debug(f'Deadline reached, skip {method} request to "{url}"')
+            self.__status_builder.unknown(f'{method} request to "{url}" failed: Timeout')
+            raise WebRequestError(asyncio.TimeoutError())
+
+        session = await self.__get_session()
+        connect_timeout, read_timeout = self.__web_executor.get_timeout()
+        timeout = aiohttp.ClientTimeout(total=Deadline.remaining(), sock_connect=connect_timeout,
+                                        sock_read=read_timeout)
+
+        async with self.__semaphore:
+            self.__logger.info('Make ' + method + ' request to "' + url + '"')
+            try:
+                async with session.request(method, url, headers=headers, timeout=timeout, **kwargs) as r:
+                    return await self.__read_text(r, url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # exiting inside of a task would skip the other requests -> the caller decides
+                reason = str(e) if '' != str(e) else type(e).__name__
+                self.__logger.debug(f'{method} request to "{url}" failed: {reason}')
+                self.__status_builder.unknown(f'{method} request to "{url}" failed: {reason}')
+                raise WebRequestError(e)
+
+    async def __read_text(self, r, url):
+        # aiohttp decompresses while reading -> without compression both limits apply to the same bytes
+        max_size, max_decoded_size = self.__web_executor.get_size_limits()
+        if None is not max_size and None is not r.content_length and r.content_length > max_size:
+            self.__exceed_limit(url, f'has {r.content_length} bytes, more than the maximum of {max_size} bytes')
+        limit = max_decoded_size
+        if 'Content-Encoding' not in r.headers and None is not max_size:
+            limit = max_size if None is limit else min(limit, max_size)
+
+        content = bytearray()
+        async for chunk in r.content.iter_chunked(65536):
+            content += chunk
+            if None is not limit and len(content) > limit:
+                self.__exceed_limit(url, f'has more than the maximum of {limit} bytes')
+        return content.decode('utf-8', 'replace')
+
+    def __exceed_limit(self, url, reason):
+        self.__logger.info(f'Response of "{url}" {reason}, stop reading')
+        self.__status_builder.unknown(f'Response of "{url}" {reason}')
+        raise WebRequestError(reason)
+
+    async def close(self):
+        if None is not self.__session:
+            await self.__session.close()
+        self.__session = None
+        self.__loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+    def run_all(self, requests, exit_on_error=True):
+        # blocking wrapper: runs the coroutines at the same time and returns their results in order.
+        # failed requests are reported as UNKNOWN, without exit their result is the WebRequestError
+        import asyncio
+
+        results = asyncio.run(self.__gather(requests))
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, WebRequestError):
+                raise result
+        if exit_on_error and True in [isinstance(result, WebRequestError) for result in results]:
+            self.__status_builder.exit()
+        return results
+
+    async def __gather(self, requests):
+        import asyncio
+
+        try:
+            return await asyncio.gather(*requests, return_exceptions=True)
+        finally:
+            await self.close()
+
+    def run(self):
+        return self.run_get()
+
+    def run_get(self, uri=None):
+        return self.run_all([self.get(uri)])[0]
+
+    def run_post(self, data=None, json=None, uri=None):
+        return self.run_all([self.post(data, json, uri)])[0]
@@ -27,17 +27,45 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
+import codecs
+import glob
+import json
+import os
+import selectors
 import subprocess
-from typing import List, Union
+import tempfile
+from typing import Iterator, List, Union
+
+from monitoring_utils.Core.Cache.FileCache import FileCache
+from monitoring_utils.Core.Deadline import Deadline
 
 
 class CLIExecutor:
 
-    def __init__(self, logger, status_builder, command_array, ignore_empty_lines=True):
+    def __init__(self, logger, status_builder, command_array, ignore_empty_lines=True, cache_ttl=0,
+                 watched_files=None, cache_dir=None):
         self.__command_array = command_array
         self.__ignore_empty_lines = ignore_empty_lines
         self.__status_builder = status_builder
         self.__logger = logger
+        self.__returncode = None
+
+        self.__cache = None
+        self.__cache_ttl = cache_ttl
+        self.__cache_key = json.dumps([command_array, ignore_empty_lines])
+        # changes of these files (glob patterns, e.g. /etc/apache2/**) invalidate the cached output
+        self.__watched_files = watched_files if None is not watched_files else []
+        if 0 < cache_ttl:
+            self.__cache = FileCache(logger, cache_dir if None is not cache_dir else FileCache.get_default_directory(),
+                                     'cli')
+
+    @staticmethod
+    def add_cache_args(parser):
+        parser.add_argument('--cache-ttl', dest='cache_ttl', type=int, default=0,
+                            help='Share the output of the commands with other checks for this many seconds. '
+                                 'Set to 0 to disable the cache')
+        parser.add_argument('--cache-dir', dest='cache_dir', type=str, default=FileCache.get_default_directory(),
+                            help='Directory of the command output cache')
 
     def check_command_exists(self):
         if 2 <= len(self.__command_array):
@@ -75,7 +103,7 @@ class CLIExecutor:
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE)
         stdout, stderr = out.communicate()
-        self.__logger.debug('Command exit with exit code: ' + str(out.returncode))
+        self.__returncode = out.returncode
 
         stdout = stdout.decode("utf-8")
         stderr = stderr.decode("utf-8")
@@ -86,6 +114,27 @@ class CLIExecutor:
         return stdout.split("\n")[0].strip()
 
     def run(self, exit_on_failure=True, no_failure_message=False) -> List[str]:
+        if None is self.__cache:
+            return self.__run(exit_on_failure, no_failure_message)
+
+        lines = self.__get_cached()
+        if None is not lines:
+            return lines
+
+        with self.__cache.lock(self.__cache_key):
+            # another check may have run it while waiting for the lock
+            lines = self.__get_cached()
+            if None is not lines:
+                return lines
+
+            mtimes = self.__get_mtimes()
+            lines = self.__run(exit_on_failure, no_failure_message)
+            if 0 == self.__returncode:
+                self.__cache.set(self.__cache_key, {'mtimes': mtimes, 'lines': lines}, self.__cache_ttl)
+
+        return lines
+
+    def __run(self, exit_on_failure, no_failure_message) -> List[str]:
         self.check_command_exists()
 
         command = ' '.join(self.__command_array)
@@ -94,24 +143,24 @@ class CLIExecutor:
         out = subprocess.Popen(self.__command_array,
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE)
-        stdout, stderr = out.communicate()
+        try:
+            stdout, stderr = out.communicate(timeout=Deadline.remaining())
+        except subprocess.TimeoutExpired:
+            self.__timeout(out, command)
+        except SystemExit:
+            # check is aborted (e.g. timeout signal) -> don't leave the command running
+            out.kill()
+            out.wait()
+            raise
         self.__logger.debug('Command exit with exit code: ' + str(out.returncode))
+        self.__returncode = out.returncode
 
         stdout = stdout.decode("utf-8")
         stderr = stderr.decode("utf-8")
         self.__logger.debug('stdout: "' + stdout + '"')
         self.__logger.debug('stderr: "' + stderr + '"')
         if 0 != out.returncode:
-            if 'a password is required' in stderr:
-                self.__logger.debug('Can\'t run sudo without password')
-                if not no_failure_message:
-                    self.__status_builder.unknown(
-                        'Can\'t run sudo without password. Please give executable rights without password in /ets/sudoers for sshd command. See our documentation for details.')
-            else:
-                if not no_failure_message:
-                    self.__status_builder.unknown(f"{stderr} {stdout}")
-            if exit_on_failure:
-                self.__status_builder.exit()
+            self.__failure(stderr, stdout, exit_on_failure, no_failure_message)
 
         if not self.__ignore_empty_lines:
             return stdout.split("\n")
@@ -123,3 +172,124 @@ class CLIExecutor:
                 lines.append(line)
 
         return lines
+
+    def run_stream(self, exit_on_failure=True, no_failure_message=False) -> Iterator[str]:
+        # yield the lines while the command is running instead of buffering the whole output
+        if None is self.__cache:
+            yield from self.__run_stream(exit_on_failure, no_failure_message)
+            return
+
+        lines = self.__get_cached()
+        if None is not lines:
+            yield from lines
+            return
+
+        with self.__cache.lock(self.__cache_key):
+            lines = self.__get_cached()
+            if None is not lines:
+                yield from lines
+                return
+
+            mtimes = self.__get_mtimes()
+            lines = []
+            for line in self.__run_stream(exit_on_failure, no_failure_message):
+                lines.append(line)
+                yield line
+            if 0 == self.__returncode:
+                self.__cache.set(self.__cache_key, {'mtimes': mtimes, 'lines': lines}, self.__cache_ttl)
+
+    def __get_cached(self):
+        entry = self.__cache.get(self.__cache_key)
+        if None is entry:
+            return None
+        if entry['mtimes'] != self.__get_mtimes():
+            self.__logger.debug('Watched files changed, ignore cached output')
+            return None
+        return entry['lines']
+
+    def __get_mtimes(self):
+        mtimes = {}
+        for pattern in self.__watched_files:
+            for path in glob.glob(pattern, recursive=True):
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
+
+    def __run_stream(self, exit_on_failure, no_failure_message) -> Iterator[str]:
+        self.check_command_exists()
+
+        command = ' '.join(self.__command_array)
+        self.__logger.debug('Run command "' + command + '" on host and stream its output.')
+
+        # stderr goes to a file -> the command can't block on a full stderr pipe while stdout is read
+        with tempfile.TemporaryFile() as stderr_file:
+            out = subprocess.Popen(self.__command_array, stdout=subprocess.PIPE, stderr=stderr_file)
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            count = 0
+            try:
+                with selectors.DefaultSelector() as selector:
+                    selector.register(out.stdout, selectors.EVENT_READ)
+                    pending = ''
+                    while True:
+                        remaining = Deadline.remaining()
+                        if None is not remaining and (0 >= remaining or 0 == len(selector.select(remaining))):
+                            self.__timeout(out, command)
+
+                        chunk = os.read(out.stdout.fileno(), 65536)
+                        if not chunk:
+                            break
+
+                        lines = (pending + decoder.decode(chunk)).split('\n')
+                        pending = lines.pop()
+                        for line in lines:
+                            if '' != line or not self.__ignore_empty_lines:
+                                count += 1
+                                yield line
+
+                pending += decoder.decode(b'', True)
+                if '' != pending or not self.__ignore_empty_lines:
+                    count += 1
+                    yield pending
+
+                out.wait(timeout=Deadline.remaining())
+            except subprocess.TimeoutExpired:
+                self.__timeout(out, command)
+            except BaseException:
+                # check is aborted or consumer stopped reading -> don't leave the command running
+                out.kill()
+                out.wait()
+                raise
+            finally:
+                out.stdout.close()
+
+            self.__logger.debug('Command exit with exit code: ' + str(out.returncode) + ' after ' + str(count)
+                                + ' lines')
+            self.__returncode = out.returncode
+            if 0 != out.returncode:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8')
+                self.__logger.debug('stderr: "' + stderr + '"')
+                self.__failure(stderr, '', exit_on_failure, no_failure_message)
+
+    def __timeout(self, out, command):
+        self.__logger.info('Deadline reached, kill command "' + command + '"')
+        out.kill()
+        # don't wait for the output, grandchildren may keep the pipes open
+        out.wait()
+        self.__status_builder.unknown(
+            'Timeout of ' + str(Deadline.get_current().get_timeout()) + ' seconds reached.')
+        self.__status_builder.exit()
+
+    def __failure(self, stderr, stdout, exit_on_failure, no_failure_message):
+        if 'a password is required' in stderr:
+            self.__logger.debug('Can\'t run sudo without password')
+            if not no_failure_message:
+                self.__status_builder.unknown(
+                    'Can\'t run sudo without password. Please give executable rights without password in /ets/sudoers for sshd command. See our documentation for details.')
+        else:
+            if not no_failure_message:
+                self.__status_builder.unknown(f"{stderr} {stdout}")
+        if exit_on_failure:
+            self.__status_builder.exit()
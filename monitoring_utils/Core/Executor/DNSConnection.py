@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+import random
+import select
+import socket
+import ssl
+import struct
+import threading
+import time
+
+import dns.exception
+import dns.message
+import dns.query
+
+
+class DNSConnection:
+    # one TCP or TLS connection to a nameserver shared by all threads of the process.
+    # queries are pipelined (RFC 7766 6.2.1.1): they are sent without waiting for earlier answers and the answers
+    # are matched by their ID. the thread holding the connection sends and receives for all waiting threads
+    # -> a TLS socket is never used by two threads at the same time
+    # a connection closed by the nameserver, e.g. when it was idle, is opened again once for the unanswered queries.
+    # a failed connection is not opened again for this many seconds -> the queries fail fast instead of waiting
+    RECONNECT_DELAY = 30
+
+    def __init__(self, nameserver, port, tls=False, tls_hostname=None, tls_ca_file=None):
+        self.__nameserver = nameserver
+        self.__port = port
+        self.__tls = tls
+        self.__tls_hostname = tls_hostname
+        self.__tls_ca_file = tls_ca_file
+
+        self.__lock = threading.Lock()
+        self.__changed = threading.Condition(self.__lock)
+        self.__socket = None
+        self.__failed = None
+        self.__holding = False
+        # wakes up the holding thread when other threads have queries to send
+        self.__wakeup = socket.socketpair()
+        self.__wakeup[1].setblocking(False)
+        self.__outgoing = []
+        # ID -> None while waiting, the answer in wire format or the error of the connection
+        self.__pending = {}
+        # ID -> query in wire format, sent again on a new connection
+        self.__queries = {}
+        self.__buffer = b''
+
+    def query(self, query, timeout=None):
+        deadline = None if None is timeout else time.monotonic() + timeout
+        with self.__lock:
+            if None is not self.__failed and time.monotonic() < self.__failed[0] + self.RECONNECT_DELAY:
+                raise ConnectionError(f'Connection to {self.__nameserver} failed recently: {self.__failed[1]}')
+            while query.id in self.__pending:
+                query.id = random.randint(0, 65535)
+            wire = query.to_wire()
+            self.__pending[query.id] = None
+            self.__queries[query.id] = struct.pack('!H', len(wire)) + wire
+            self.__outgoing.append(self.__queries[query.id])
+        self.__wake()
+
+        try:
+            answer = self.__wait(query.id, deadline)
+        finally:
+            with self.__lock:
+                del self.__pending[query.id]
+                del self.__queries[query.id]
+        if isinstance(answer, Exception):
+            raise answer
+
+        response = dns.message.from_wire(answer)
+        if not query.is_response(response):
+            raise dns.query.BadResponse()
+        return response
+
+    def close(self):
+        with self.__lock:
+            if None is not self.__socket:
+                self.__socket.close()
+                self.__socket = None
+
+    def __wake(self):
+        try:
+            self.__wakeup[1].send(b'\0')
+        except BlockingIOError:
+            # the holding thread wakes up anyway
+            pass
+
+    def __wait(self, query_id, deadline):
+        while True:
+            with self.__lock:
+                if None is not self.__pending[query_id]:
+                    return self.__pending[query_id]
+                remaining = None if None is deadline else deadline - time.monotonic()
+                if None is not remaining and 0 >= remaining:
+                    raise dns.exception.Timeout()
+                if self.__holding:
+                    # answered or woken up when the connection is free
+                    self.__changed.wait(remaining)
+                    continue
+                self.__holding = True
+
+            try:
+                self.__transfer(query_id, deadline)
+            except (OSError, EOFError) as e:
+                self.__fail(e)
+            finally:
+                with self.__lock:
+                    self.__holding = False
+                    self.__changed.notify_all()
+
+    def __transfer(self, query_id, deadline):
+        if None is not self.__socket:
+            try:
+                return self.__exchange(query_id, deadline)
+            except (OSError, EOFError):
+                # RFC 7766 6.2.3: nameservers close idle connections -> send the unanswered queries on a new one
+                self.__reset()
+
+        self.__connect(deadline)
+        self.__exchange(query_id, deadline)
+
+    def __exchange(self, query_id, deadline):
+        # sends the queries of all threads and receives the answers until the own answer is there
+        while True:
+            with self.__lock:
+                if None is not self.__pending[query_id]:
+                    return
+                outgoing = b''.join(self.__outgoing)
+                self.__outgoing = []
+            remaining = None if None is deadline else deadline - time.monotonic()
+            if None is not remaining and 0 >= remaining:
+                return
+
+            self.__socket.settimeout(remaining)
+            if b'' != outgoing:
+                self.__socket.sendall(outgoing)
+            # TLS may have decrypted data which select doesn't see
+            if not self.__tls or 0 == self.__socket.pending():
+                readable = select.select([self.__socket, self.__wakeup[0]], [], [], remaining)[0]
+                if self.__wakeup[0] in readable:
+                    self.__wakeup[0].recv(4096)
+                if self.__socket not in readable:
+                    continue
+
+            data = self.__socket.recv(65535)
+            if b'' == data:
+                raise EOFError(f'Connection closed by {self.__nameserver}')
+            self.__receive(data)
+
+    def __connect(self, deadline):
+        timeout = None if None is deadline else max(0.0, deadline - time.monotonic())
+        try:
+            sock = socket.create_connection((self.__nameserver, self.__port), timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.__tls:
+                context = ssl.create_default_context(cafile=self.__tls_ca_file)
+                hostname = self.__tls_hostname if None is not self.__tls_hostname else self.__nameserver
+                sock = context.wrap_socket(sock, server_hostname=hostname)
+        except OSError as e:
+            with self.__lock:
+                self.__failed = (time.monotonic(), e)
+            raise
+        self.__socket = sock
+        self.__buffer = b''
+
+    def __receive(self, data):
+        self.__buffer += data
+        answers = []
+        while 2 <= len(self.__buffer):
+            length = struct.unpack('!H', self.__buffer[:2])[0]
+            if len(self.__buffer) < 2 + length:
+                break
+            answers.append(self.__buffer[2:2 + length])
+            self.__buffer = self.__buffer[2 + length:]
+
+        with self.__lock:
+            for answer in answers:
+                # answers of queries which timed out are dropped
+                query_id = struct.unpack('!H', answer[:2])[0] if 2 <= len(answer) else None
+                if None is self.__pending.get(query_id, False):
+                    self.__pending[query_id] = answer
+            self.__changed.notify_all()
+
+    def __reset(self):
+        with self.__lock:
+            self.__socket.close()
+            self.__socket = None
+            self.__outgoing = [self.__queries[query_id] for query_id, answer in self.__pending.items()
+                               if None is answer]
+
+    def __fail(self, error):
+        # the queries on this connection are lost -> all waiting threads get the error, the next query reconnects
+        with self.__lock:
+            if None is not self.__socket:
+                self.__socket.close()
+                self.__socket = None
+            self.__outgoing = []
+            for query_id, answer in self.__pending.items():
+                if None is answer:
+                    self.__pending[query_id] = error
@@ -27,45 +27,250 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
+import base64
+import json
+import threading
+import time
+
+import dns.exception
+import dns.message
+import dns.query
+import dns.rcode
 import dns.resolver
 
+from monitoring_utils.Core.Cache.FileCache import FileCache
+from monitoring_utils.Core.Executor.DNSConnection import DNSConnection
+from monitoring_utils.Core.Deadline import Deadline
 
-class DNSExecutor:
 
-    def __init__(self, logger, parser, status_builder, nameservers):
+class DNSExecutor:
+    # answers of all executors in this process until their TTL expires -> root, TLD and parent zones are asked once
+    __cache = {}
+    __cache_lock = threading.Lock()
+    MEMORY_CACHE_SIZE = 10000
+    # like common resolvers, don't trust TTLs longer than a day
+    MAX_TTL = 86400
+    # persistent connections of all executors in this process
+    __connections = {}
+    __connections_lock = threading.Lock()
+    TRANSPORTS = ['tcp', 'udp', 'tcp-pipeline', 'tls']
+
+    def __init__(self, logger, parser, status_builder, nameservers, cache_size=0, cache_dir=None, transport='tcp',
+                 tls_port=853, tls_hostname=None, tls_ca_file=None):
 
         self.__nameservers = nameservers
         self.__status_builder = status_builder
         self.__logger = logger
         self.__parser = parser
+        self.__transport = transport
+        self.__tls_port = tls_port
+        self.__tls_hostname = tls_hostname
+        self.__tls_ca_file = tls_ca_file
 
         self.__resolver = dns.resolver.Resolver()
         self.__resolver.use_edns(0, dns.flags.DO, 4096)
         self.__resolver.nameservers = ([nameservers])
 
+        # shared with other check processes
+        self.__disk_cache = None
+        if 0 < cache_size:
+            directory = cache_dir if None is not cache_dir else FileCache.get_default_directory()
+            self.__disk_cache = FileCache(logger, directory, 'dns', max_entries=cache_size)
+
+    @staticmethod
+    def add_cache_args(parser):
+        parser.add_argument('--dns-cache-size', dest='dns_cache_size', type=int, default=0,
+                            help='Share this many DNS answers on disk with other checks until their TTL expires. '
+                                 'Set to 0 to cache them in this process only')
+        parser.add_argument('--dns-cache-dir', dest='dns_cache_dir', type=str,
+                            default=FileCache.get_default_directory(), help='Directory of the DNS cache')
+
+    @staticmethod
+    def add_transport_args(parser):
+        parser.add_argument('--dns-transport', dest='dns_transport', choices=DNSExecutor.TRANSPORTS, default='tcp',
+                            help='"tcp": a new TCP connection for each query, "udp": UDP and TCP for truncated '
+                                 'answers, "tcp-pipeline" and "tls": queries of the check share one TCP or '
+                                 'DNS over TLS connection to the resolver. "tcp-pipeline" falls back to UDP if it '
+                                 'fails, "tls" never sends queries unencrypted. Default: tcp')
+        parser.add_argument('--dns-tls-port', dest='dns_tls_port', type=int, default=853,
+                            help='Port of the resolver for DNS over TLS. Default: 853')
+        parser.add_argument('--dns-tls-hostname', dest='dns_tls_hostname', type=str,
+                            help='Name in the certificate of the resolver. Default: the resolver address')
+        parser.add_argument('--dns-tls-ca-file', dest='dns_tls_ca_file', type=str,
+                            help='CA certificates to verify the resolver with instead of the system ones')
+
     def resolve(self, domain, rdtype, save_status=True):
+        expires, negative, response = self.__resolve(domain, rdtype, save_status)
+        return response if None is negative else None
 
+    def __resolve(self, domain, rdtype, save_status):
+        # -> (expires, negative, response), the response of NXDOMAIN and empty answers is kept for its authority
         record_name = self.get_record_for_type(rdtype)
         try:
             self.__logger.info('Resolve ' + record_name + ' record for domain "' + domain + '"')
             domain_name = dns.name.from_text(domain)
-            response = self.__resolver.query(domain_name, rdtype, dns.rdataclass.IN, True).response
-            for record in response.answer:
-                self.__logger.debug('Found ' + record_name + ' record "' + str(record) + '"')
-            return response
-        except dns.resolver.NoAnswer:
+            entry = self.__query(domain_name, rdtype)
+        except dns.exception.Timeout:
+            self.__logger.info('Timeout while resolving ' + record_name + ' record for domain "' + domain + '"')
+            self.__status_builder.unknown(
+                'Timeout while resolving ' + record_name + ' record for domain "' + domain + '"')
+            self.__status_builder.exit()
+            return 0, 'Timeout', None
+        except dns.exception.DNSException as e:
+            # e.g. SERVFAIL or REFUSED -> the domain can't be checked
+            self.__logger.info('Resolving ' + record_name + ' record for domain "' + domain + '" failed: ' + str(e))
+            self.__status_builder.unknown(
+                'Resolving ' + record_name + ' record for domain "' + domain + '" failed: ' + str(e))
+            self.__status_builder.exit()
+            return 0, 'Error', None
+
+        expires, negative, response = entry
+        if 'NoAnswer' == negative:
             # No answer found -> record not exist
             self.__logger.info('No ' + record_name + ' record found for domain "' + domain + '"')
             if save_status:
                 self.__status_builder.unknown('No ' + record_name + ' record found for domain "' + domain + '"')
 
-        except dns.resolver.NXDOMAIN:
+        elif 'NXDOMAIN' == negative:
             # Domain not exist
             self.__logger.info('Got NXDOMAIN for domain "' + domain + '"')
             if save_status:
                 self.__status_builder.unknown('Got NXDOMAIN for domain "' + domain + '"')
 
-        return None
+        else:
+            for record in response.answer:
+                self.__logger.debug('Found ' + record_name + ' record "' + str(record) + '"')
+
+        return entry
+
+    def __query(self, domain_name, rdtype):
+        # NXDOMAIN and empty answers are cached as well
+        key = json.dumps([self.__nameservers, domain_name.to_text().lower(), int(rdtype)])
+        entry = self.__get_cache_entry(key)
+        if None is entry:
+            ttl, negative, response = self.__lookup(domain_name, rdtype)
+            entry = (time.time() + ttl, negative, response)
+            if 0 < ttl:
+                self.__set_cache_entry(key, entry, ttl)
+        else:
+            self.__logger.debug('Use cached answer for "' + domain_name.to_text() + '"')
+        return entry
+
+    def __lookup(self, domain_name, rdtype):
+        if 'tcp' != self.__transport:
+            query = dns.message.make_query(domain_name, rdtype, use_edns=0, want_dnssec=True, payload=4096)
+            return self.__get_entry(query, domain_name, rdtype, self.__send(query))
+
+        try:
+            response = self.__resolver.query(domain_name, rdtype, dns.rdataclass.IN, True,
+                                             lifetime=Deadline.remaining()).response
+            return min([self.MAX_TTL] + [rrset.ttl for rrset in response.answer]), None, response
+        except dns.resolver.NoAnswer as e:
+            return self.__get_negative_ttl(e.response()), 'NoAnswer', e.response()
+        except dns.resolver.NXDOMAIN as e:
+            response = e.responses().get(domain_name)
+            return self.__get_negative_ttl(response), 'NXDOMAIN', response
+
+    def __send(self, query):
+        timeout = Deadline.remaining()
+        timeout = self.__resolver.lifetime if None is timeout else timeout
+        if 'udp' != self.__transport:
+            start = time.monotonic()
+            try:
+                return self.__get_connection().query(query, timeout)
+            except (OSError, EOFError) as e:
+                if 'tls' == self.__transport:
+                    # don't send the query unencrypted, e.g. when the certificate of the nameserver is invalid
+                    raise dns.exception.DNSException('Connection to nameserver "' + self.__nameservers
+                                                     + '" failed: ' + str(e)) from e
+                self.__logger.info('Connection to nameserver "' + self.__nameservers + '" failed, use UDP instead: '
+                                   + str(e))
+            timeout = max(0.0, timeout - (time.monotonic() - start))
+        return dns.query.udp_with_fallback(query, self.__nameservers, timeout)[0]
+
+    def __get_connection(self):
+        key = (self.__nameservers, self.__transport, self.__tls_port, self.__tls_hostname, self.__tls_ca_file)
+        with DNSExecutor.__connections_lock:
+            connection = DNSExecutor.__connections.get(key)
+            if None is connection:
+                self.__logger.debug('Create ' + self.__transport + ' connection to nameserver "'
+                                    + self.__nameservers + '"')
+                tls = 'tls' == self.__transport
+                connection = DNSConnection(self.__nameservers, self.__tls_port if tls else 53, tls,
+                                          self.__tls_hostname, self.__tls_ca_file)
+                DNSExecutor.__connections[key] = connection
+        return connection
+
+    @staticmethod
+    def close_connections():
+        with DNSExecutor.__connections_lock:
+            for connection in DNSExecutor.__connections.values():
+                connection.close()
+            DNSExecutor.__connections.clear()
+
+    def __get_entry(self, query, domain_name, rdtype, response):
+        # the answer like the resolver sees it
+        rcode = response.rcode()
+        if dns.rcode.NXDOMAIN == rcode:
+            return self.__get_negative_ttl(response), 'NXDOMAIN', response
+        if dns.rcode.NOERROR != rcode:
+            raise dns.resolver.NoNameservers(request=query, errors=[
+                (self.__nameservers, 'udp' != self.__transport, 53, dns.rcode.to_text(rcode), response)])
+        if None is dns.resolver.Answer(domain_name, rdtype, dns.rdataclass.IN, response).rrset:
+            return self.__get_negative_ttl(response), 'NoAnswer', response
+        return min([self.MAX_TTL] + [rrset.ttl for rrset in response.answer]), None, response
+
+    def __get_negative_ttl(self, response):
+        # RFC 2308: the TTL of the SOA record in the authority section, at most its minimum field
+        if None is response:
+            return 0
+        for rrset in response.authority:
+            if dns.rdatatype.SOA == rrset.rdtype:
+                return min(rrset.ttl, rrset[0].minimum, self.MAX_TTL)
+        return 0
+
+    def __get_cache_entry(self, key):
+        entry = self.__get_memory_entry(key)
+        if None is not entry:
+            return entry
+
+        if None is self.__disk_cache:
+            return None
+        value = self.__disk_cache.get(key)
+        if None is value:
+            return None
+        response = None if None is value['wire'] else dns.message.from_wire(base64.b64decode(value['wire']))
+        entry = (value['expires'], value['negative'], response)
+        self.__remember(key, entry)
+        return entry
+
+    def __get_memory_entry(self, key):
+        with DNSExecutor.__cache_lock:
+            entry = DNSExecutor.__cache.get(key)
+        return entry if None is not entry and entry[0] > time.time() else None
+
+    def __set_cache_entry(self, key, entry, ttl):
+        self.__remember(key, entry)
+        if None is not self.__disk_cache:
+            expires, negative, response = entry
+            wire = None if None is response else base64.b64encode(response.to_wire()).decode('ascii')
+            self.__disk_cache.set(key, {'expires': expires, 'negative': negative, 'wire': wire}, ttl)
+
+    def __remember(self, key, entry):
+        with DNSExecutor.__cache_lock:
+            if len(DNSExecutor.__cache) >= self.MEMORY_CACHE_SIZE:
+                # drop expired answers, then the oldest ones
+                now = time.time()
+                for old_key in [old_key for old_key, old in DNSExecutor.__cache.items() if old[0] <= now]:
+                    del DNSExecutor.__cache[old_key]
+                while len(DNSExecutor.__cache) >= self.MEMORY_CACHE_SIZE:
+                    del DNSExecutor.__cache[next(iter(DNSExecutor.__cache))]
+            DNSExecutor.__cache[key] = entry
+
+    @staticmethod
+    def clear_cache():
+        with DNSExecutor.__cache_lock:
+            DNSExecutor.__cache.clear()
 
     def get_record_for_type(self, rdtype):
 
@@ -122,21 +327,21 @@ class DNSExecutor:
 
             return None
 
+        return self.get_SPF_policies(txt)
+
+    def get_SPF_policies(self, txt):
         spf = []
-        # search for SPF record
-        for record in txt.answer:
-            record = record.to_text()
-            self.__logger.debug('Search SPF policy in TXT record "' + record + '".')
-            if 'TXT' in record and '"v=spf1' not in record:
+        # search for SPF record, the strings of a TXT record are joined without spaces (RFC 7208 3.3)
+        for rrset in txt.answer:
+            if dns.rdatatype.TXT != rrset.rdtype:
                 continue
+            for record in rrset:
+                record = b''.join(record.strings).decode('utf-8', 'replace')
+                self.__logger.debug('Search SPF policy in TXT record "' + record + '".')
+                if 'v=spf1' != record[:6].lower() or record[6:7] not in ['', ' ']:
+                    continue
 
-            record_array = record.split('"v=spf1')
-            if len(record_array) >= 2:
-                value = record_array[1]
-                value = value.replace('v=spf1', '')
-                value = value.replace('"', '')
-                value = value.strip()
-
+                value = record[6:].strip()
                 if value not in spf:
                     self.__logger.debug('Found SPF policy "' + value + '".')
                     spf.append(value)
@@ -146,14 +351,54 @@ class DNSExecutor:
     def resolve_DNSKEY(self, domain, save_status=True):
         return self.resolve(domain, dns.rdatatype.DNSKEY, save_status)
 
+    def get_zone_level(self, domain):
+        # one DNSKEY query per name tells if it is a zone cut, its keys and the target of its CNAMEs.
+        # the level is kept as long as the answer -> parents are walked once for all domains below them
+        key = json.dumps([self.__nameservers, dns.name.from_text(domain).to_text().lower(), 'zone level'])
+        entry = self.__get_memory_entry(key)
+        if None is not entry:
+            self.__logger.debug('Use cached zone level of "' + domain + '"')
+            return entry[2]
+
+        expires, negative, response = self.__resolve(domain, dns.rdatatype.DNSKEY, False)
+        if negative in ['Timeout', 'Error']:
+            return ZoneLevel(domain, None, domain, False)
+
+        # follow the CNAMEs of the answer, the resolver already did it
+        target = dns.name.from_text(domain)
+        if None is not response:
+            visited = set()
+            while target not in visited:
+                visited.add(target)
+                cname = response.get_rrset(response.answer, target, dns.rdataclass.IN, dns.rdatatype.CNAME)
+                if None is cname:
+                    break
+                target = cname[0].target
+
+        if None is negative:
+            level = ZoneLevel(domain, response, target.to_text(), True)
+        else:
+            # RFC 2308: the SOA of the zone is in the authority section -> the name is a zone if it is the owner
+            soa = None if None is response else next(
+                (rrset for rrset in response.authority if dns.rdatatype.SOA == rrset.rdtype), None)
+            if None is not soa:
+                is_zone = soa.name == target
+            else:
+                is_zone = None is not self.resolve_SOA(domain, False)
+            level = ZoneLevel(domain, None, target.to_text(), is_zone)
+
+        if expires > time.time():
+            self.__remember(key, (expires, None, level))
+        return level
+
     def resolve_RRSIG(self, domain, save_status=True, recursion=False):
 
-        response = self.resolve_DNSKEY(domain, False)
+        level = self.get_zone_level(domain)
+        response = level.get_dnskey()
 
         if None == response:
-            soa = self.resolve_SOA(domain, False)
 
-            if not recursion and None == soa:
+            if not recursion and not level.is_zone():
                 # domain is not a zone -> search for DNSKEY in zone instead
                 zone = '.'.join(domain.split('.')[1::])
                 self.__logger.info(
@@ -183,18 +428,7 @@ class DNSExecutor:
 
         try:
             # if domain is CNAME search for target domain and get RRSIG of it instead
-            cname_domain = None
-            while True:
-                cname = self.resolve_CNAME(domain if None == cname_domain else cname_domain, save_status=False)
-                if None == cname:
-                    break
-                for a in cname.answer:
-                    record = a.to_text().split()
-                    if len(record) >= 5 and record[3] == "CNAME":
-                        cname_domain = record[4]
-                        break
-
-            domain_name = dns.name.from_text(domain if None == cname_domain else cname_domain)
+            domain_name = dns.name.from_text(level.get_cname())
             # search for RRSET
             rrsig = response.find_rrset(response.answer, domain_name, dns.rdataclass.IN, dns.rdatatype.RRSIG,
                                         dns.rdatatype.DNSKEY)
@@ -214,3 +448,27 @@ class DNSExecutor:
             self.__logger.info('No matching RRSIG found for domain "' + domain + '" but DNSKEY exists.')
             if save_status:
                 self.__status_builder.critical('No matching RRSIG found for domain "' + domain + '" but DNSKEY exists.')
+
+
+class ZoneLevel:
+    # a name of the zone chain of a domain
+
+    def __init__(self, name, dnskey, cname, zone):
+        self.__name = name
+        self.__dnskey = dnskey
+        self.__cname = cname
+        self.__zone = zone
+
+    def get_name(self):
+        return self.__name
+
+    def get_dnskey(self):
+        # response with the DNSKEY and RRSIG records or None if the name has no keys
+        return self.__dnskey
+
+    def get_cname(self):
+        # the name itself or the target of its CNAMEs
+        return self.__cname
+
+    def is_zone(self):
+        return self.__zone
@@ -26,9 +26,6 @@
 #  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
 #  and also my other projects <https://github.com/f-froehlich>
 
-from nmap_scan.NmapScanMethods import NmapScanMethods
-from nmap_scan.Scanner import Scanner
-
 
 class NMAPExecutor:
 
@@ -72,6 +69,8 @@ class NMAPExecutor:
             self.__scan_udp = args.scanudp
 
     def scan(self):
+        from nmap_scan.NmapScanMethods import NmapScanMethods
+        from nmap_scan.Scanner import Scanner
 
         self.__logger.debug('Perform scan')
         scanner = Scanner(self.__nmap_args)
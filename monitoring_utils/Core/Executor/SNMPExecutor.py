@@ -27,10 +27,46 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
+import hashlib
+import json
+import string
+import struct
+import threading
+
+from monitoring_utils.Core.Cache.FileCache import FileCache
 from monitoring_utils.Core.Executor.CLIExecutor import CLIExecutor
+from monitoring_utils.Core.SNMP.BER import BER
+from monitoring_utils.Core.SNMP.SNMPClient import SNMPClient, SNMPError
 
 
 class SNMPExecutor:
+    __prefetched = threading.local()
+
+    # snmpwalk type -> value is an integer
+    CLI_TYPES = {
+        'integer': True,
+        'counter32': True,
+        'counter64': True,
+        'gauge32': True,
+        'hex-string': False,
+        'ipaddress': False,
+        'oid': False,
+        'string': False,
+        'opaque': False,
+        'timeticks': False,
+    }
+    # BER tag -> snmpwalk type and formatter of the value, octet strings are either string or hex-string
+    NATIVE_TYPES = {
+        BER.INTEGER: ('integer', None),
+        BER.COUNTER32: ('counter32', None),
+        BER.COUNTER64: ('counter64', None),
+        BER.GAUGE32: ('gauge32', None),
+        BER.IP_ADDRESS: ('ipaddress', None),
+        BER.OBJECT_IDENTIFIER: ('oid', lambda value: '.' + value),
+        BER.TIMETICKS: ('timeticks', lambda value: SNMPExecutor.format_timeticks(value)),
+        BER.OPAQUE: ('opaque', lambda value: SNMPExecutor.format_opaque(value)),
+    }
+    PRINTABLE = string.printable.encode('ascii')
 
     def __init__(self, logger, status_builder, parser, oid, username=None, password=None, host=None, snmp_version=None,
                  community=None):
@@ -43,7 +79,13 @@ class SNMPExecutor:
         self.__status_builder = status_builder
         self.__parser = parser
         self.__logger = logger
-        self.__cli_executor = None
+        self.__cli_arguments = None
+        self.__snmp_client = None
+        self.__cache = None
+        self.__cache_ttl = 0
+        self.__cache_walk_oid = None
+        self.__cache_key = None
+        self.__connection_arguments = []
 
     def configure(self, args):
         self.__username = args.username
@@ -60,20 +102,48 @@ class SNMPExecutor:
                 self.__status_builder.unknown('Require a password')
                 self.__status_builder.exit()
 
-        cliargs = [
-            'snmpwalk', '-v', self.__snmp_version, '-t', str(args.timeout), '-l', 'authNoPriv', self.__host, self.__oid,
-            '-O', 'n'
-        ]
-        if None is not self.__username:
-            cliargs += ['-u', self.__username, ]
+        if 'native' == args.engine:
+            self.__snmp_client = SNMPClient(self.__logger, self.__host, version=self.__snmp_version,
+                                            community=self.__community, username=self.__username,
+                                            password=self.__password, port=args.port,
+                                            timeout=args.timeout if 0 < args.timeout else 1,
+                                            max_repetitions=args.max_repetitions, auth_protocol=args.auth_protocol,
+                                            context=args.context)
+        else:
+            host = self.__host if 161 == args.port else self.__host + ':' + str(args.port)
+            self.__cli_arguments = [
+                'snmpwalk', '-v', self.__snmp_version, '-t', str(args.timeout), '-l', 'authNoPriv', host, '-O', 'n',
+                '-a', args.auth_protocol
+            ]
+            if None is not self.__username:
+                self.__cli_arguments += ['-u', self.__username, ]
 
-        if None is not self.__password:
-            cliargs += ['-A', self.__password, ]
+            if None is not self.__password:
+                self.__cli_arguments += ['-A', self.__password, ]
 
-        if None is not self.__community:
-            cliargs += ['-c', self.__community, ]
+            if None is not self.__community:
+                self.__cli_arguments += ['-c', self.__community, ]
 
-        self.__cli_executor = CLIExecutor(self.__logger, self.__status_builder, cliargs)
+            if '' != args.context:
+                self.__cli_arguments += ['-n', args.context, ]
+
+        if 0 < args.cache_ttl:
+            self.__cache = FileCache(self.__logger, args.cache_dir, 'snmp')
+            self.__cache_ttl = args.cache_ttl
+            self.__cache_walk_oid = None if None is args.cache_walk_oid else args.cache_walk_oid.strip('.')
+            # walks are shared between all checks using the same agent and credentials
+            self.__cache_key = hashlib.sha256(json.dumps([
+                self.__host, args.port, self.__snmp_version, self.__community, self.__username, self.__password,
+                args.auth_protocol, args.context
+            ]).encode('utf-8')).hexdigest()
+
+        self.__connection_arguments = []
+        for option, value in [('-H', self.__host), ('--version', self.__snmp_version), ('-u', self.__username),
+                              ('-p', self.__password), ('--community', self.__community), ('--port', args.port),
+                              ('--auth-protocol', args.auth_protocol), ('--context', args.context),
+                              ('--max-repetitions', args.max_repetitions), ('--engine', args.engine)]:
+            if None is not value:
+                self.__connection_arguments += [option, str(value)]
 
     def add_args(self):
         self.__parser.add_argument('-u', '--username', dest='username', type=str, help='Username')
@@ -82,12 +152,111 @@ class SNMPExecutor:
         self.__parser.add_argument('--version', dest='version', required=True, type=str, help='SNMP Version to use',
                                    choices=['1', '2c', '3'], default='3')
         self.__parser.add_argument('--community', dest='community', type=str, help='SNMP community to use')
+        self.__parser.add_argument('--port', dest='port', type=int, default=161, help='SNMP port of the host')
+        self.__parser.add_argument('--auth-protocol', dest='auth_protocol', type=str, default='MD5',
+                                   choices=['MD5', 'SHA'], help='SNMPv3 authentication protocol')
+        self.__parser.add_argument('--context', dest='context', type=str, default='', help='SNMPv3 context name')
+        self.__parser.add_argument('--max-repetitions', dest='max_repetitions', type=int, default=25,
+                                   help='Number of OIDs requested per GETBULK request of the native engine')
+        self.__parser.add_argument('--engine', dest='engine', type=str, default='native',
+                                   choices=['native', 'snmpwalk'],
+                                   help='Use the in-process SNMP engine or the snmpwalk binary')
+        self.__parser.add_argument('--cache-ttl', dest='cache_ttl', type=int, default=0,
+                                   help='Share walks of this host between checks for this many seconds. '
+                                        'Set to 0 to disable the cache')
+        self.__parser.add_argument('--cache-dir', dest='cache_dir', type=str,
+                                   default=FileCache.get_default_directory(), help='Directory of the SNMP cache')
+        self.__parser.add_argument('--cache-walk-oid', dest='cache_walk_oid', type=str,
+                                   help='Walk and cache this wider OID instead (e.g. 1.3.6.1.4.1.6574), so other checks '
+                                        'requesting an OID below it are answered from the cache')
+
+    @staticmethod
+    def set_prefetched(oid, rows):
+        # rows of a walk done by another check (e.g. a bundle) -> checks below this OID don't walk again
+        SNMPExecutor.__prefetched.walk = None if None is oid else (oid.strip('.'), rows)
+
+    def get_connection_arguments(self):
+        return list(self.__connection_arguments)
 
     def run(self):
+        return [{'oid': oid, 'value': value, 'type': type} for oid, type, value in self.run_rows()]
+
+    def run_rows(self):
         self.__logger.debug('Request SNMP OID "' + self.__oid + '" on host "' + self.__host + '".')
-        output = self.__cli_executor.run()
+        oid = self.__oid.strip('.')
+        prefix = oid + '.'
+        prefix_length = len(prefix)
+
+        return [
+            (row_oid[prefix_length:] if row_oid.startswith(prefix) else row_oid.replace(oid, ''), type, value)
+            for row_oid, type, value in self.walk(oid)
+        ]
+
+    def walk(self, oid):
+        oid = oid.strip('.')
+        prefetched = getattr(SNMPExecutor.__prefetched, 'walk', None)
+        if None is not prefetched and self.__is_in_subtree(oid, prefetched[0]):
+            rows = self.__filter_rows(prefetched[1], oid)
+            if 0 != len(rows):
+                self.__logger.debug('Use prefetched walk of OID "' + prefetched[0] + '"')
+                return rows
+
+        return self.__walk(oid) if None is self.__cache else self.__get_cached(oid)
+
+    def __get_cached(self, oid):
+        rows = self.__get_cached_rows(oid)
+        if None is not rows:
+            return rows
+
+        walk_oid = oid
+        if None is not self.__cache_walk_oid and self.__is_in_subtree(oid, self.__cache_walk_oid):
+            walk_oid = self.__cache_walk_oid
+
+        with self.__cache.lock(self.__cache_key + ':' + walk_oid):
+            # another check may have walked it while waiting for the lock
+            rows = self.__get_cached_rows(oid)
+            if None is not rows:
+                return rows
+
+            walked = self.__walk(walk_oid)
+            self.__cache.set(self.__cache_key + ':' + walk_oid, walked, self.__cache_ttl)
+
+        rows = self.__filter_rows(walked, oid)
+        if 0 == len(rows) and walk_oid != oid:
+            # empty subtree -> let the agent answer it like an uncached walk
+            rows = self.__walk(oid)
+        return rows
+
+    def __get_cached_rows(self, oid):
+        arcs = oid.split('.')
+        # a walk of the OID itself or any of its parents contains the requested subtree
+        for length in range(len(arcs), 1, -1):
+            rows = self.__cache.get(self.__cache_key + ':' + '.'.join(arcs[:length]))
+            if None is rows:
+                continue
+            rows = self.__filter_rows(rows, oid)
+            if 0 != len(rows):
+                return rows
+
+        return None
+
+    @staticmethod
+    def __filter_rows(rows, oid):
+        prefix = oid + '.'
+        return [row for row in rows if row[0].startswith(prefix) or row[0] == oid]
+
+    @staticmethod
+    def __is_in_subtree(oid, parent):
+        return oid == parent or oid.startswith(parent + '.')
+
+    def __walk(self, oid):
+        if None is not self.__snmp_client:
+            return self.__walk_native(oid)
+
+        output = CLIExecutor(self.__logger, self.__status_builder, self.__cli_arguments + [oid]).run_stream()
+        rows = []
         error = False
-        configs = []
+        types = self.CLI_TYPES
         for line in output:
             if 'No Such Object available' in line:
                 self.__status_builder.unknown(line)
@@ -96,52 +265,90 @@ class SNMPExecutor:
 
             if '= ""' in line:
                 continue
-            splittet = line.split(' = ')
-            splittet_type = splittet[1].split(':')
-            if 2 > len(splittet_type):
+            row_oid, separator, typed_value = line.partition(' = ')
+            type, separator, value = typed_value.partition(':')
+            if '' == separator:
                 self.__status_builder.unknown(f'Could not parse line "{line}"')
                 error = True
                 continue
 
-            type = splittet_type[0].strip().lower()
-            value = ':'.join(splittet_type[1:]).replace('"', '').strip()
+            type = type.strip().lower()
+            if type not in types:
+                self.__logger.debug(f'Got unknown type {type} -> ignoring')
+                continue
 
-            if 'integer' == type:
-                value = int(value)
-            elif 'counter32' == type:
-                value = int(value)
-            elif 'counter64' == type:
-                value = int(value)
-            elif 'gauge32' == type:
+            value = value.replace('"', '').strip()
+            if types[type]:
                 value = int(value)
-            elif 'hex-string' == type:
-                value = str(value)
-            elif 'ipaddress' == type:
-                value = str(value)
-            elif 'oid' == type:
-                value = str(value)
-            elif 'string' == type:
-                if isinstance(value, float):
-                    value = float(value)
-                elif isinstance(value, int):
-                    value = int(value)
+            rows.append((row_oid.strip().lstrip('.'), type, value))
+
+        if error:
+            self.__status_builder.exit()
+
+        return rows
+
+    def __walk_native(self, oid):
+        try:
+            varbinds = self.__snmp_client.walk(oid)
+        except SNMPError as e:
+            self.__status_builder.unknown(str(e))
+            self.__status_builder.exit()
+        finally:
+            self.__snmp_client.close()
+
+        error = False
+        rows = []
+        types = self.NATIVE_TYPES
+        for varbind_oid, tag, value in varbinds:
+            if tag in types:
+                type, format = types[tag]
+                rows.append((varbind_oid, type, value if None is format else format(value)))
+            elif BER.OCTET_STRING == tag:
+                if 0 == len(value):
+                    continue
+                if self.__is_printable(value):
+                    rows.append((varbind_oid, 'string', value.decode('ascii').replace('"', '').strip()))
                 else:
-                    value = str(value)
-            elif 'opaque' == type:
-                value = str(value)
-            elif 'timeticks' == type:
-                value = str(value)
+                    rows.append((varbind_oid, 'hex-string', self.format_hex(value)))
+            elif tag in [BER.NO_SUCH_OBJECT, BER.NO_SUCH_INSTANCE]:
+                self.__status_builder.unknown(
+                    '.' + varbind_oid + ' = No Such ' + ('Object' if BER.NO_SUCH_OBJECT == tag else 'Instance')
+                    + ' available on this agent at this OID')
+                error = True
             else:
-                self.__logger.debug(f'Got unknown type {type} -> ignoring')
-                continue
-
-            configs.append({
-                'oid': splittet[0].replace('.' + self.__oid + '.', '').replace('.' + self.__oid, ''),
-                'value': value,
-                'type': type
-            })
+                self.__logger.debug(f'Got unknown type {tag} -> ignoring')
 
         if error:
             self.__status_builder.exit()
 
-        return configs
+        return rows
+
+    @staticmethod
+    def __is_printable(value):
+        # same rule as net-snmp: printable or whitespace, a trailing NUL byte is allowed
+        if value.endswith(b'\x00'):
+            value = value[:-1]
+        return 0 == len(value.translate(None, SNMPExecutor.PRINTABLE))
+
+    @staticmethod
+    def format_hex(value):
+        return value.hex(' ').upper()
+
+    @staticmethod
+    def format_opaque(value):
+        # net-snmp opaque extension: 0x9f, type (0x78 float, 0x79 double), length and the IEEE 754 value
+        if 7 == len(value) and value.startswith(b'\x9f\x78\x04'):
+            return 'Float: %f' % struct.unpack('>f', value[3:])[0]
+        if 11 == len(value) and value.startswith(b'\x9f\x79\x08'):
+            return 'Double: %f' % struct.unpack('>d', value[3:])[0]
+        return SNMPExecutor.format_hex(value)
+
+    @staticmethod
+    def format_timeticks(value):
+        centiseconds = value % 100
+        seconds = value // 100
+        days = seconds // 86400
+        time = '%d:%02d:%02d.%02d' % (seconds // 3600 % 24, seconds // 60 % 60, seconds % 60, centiseconds)
+        if 0 != days:
+            time = str(days) + (' day, ' if 1 == days else ' days, ') + time
+        return '(' + str(value) + ') ' + time
@@ -26,8 +26,6 @@
 #  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
 #  and also my other projects <https://github.com/f-froehlich>
 
-import telegram
-
 
 class TelegramExecutor:
 
@@ -38,7 +36,10 @@ class TelegramExecutor:
         self.__chat_ids = chat_ids
         self.__groups = groups
         self.__token = token
-        self.__bot = None if None is token else telegram.Bot(token=self.__token)
+        self.__bot = None
+        if None is not token:
+            import telegram
+            self.__bot = telegram.Bot(token=self.__token)
 
     def add_args(self):
         self.__parser.add_argument('-T', '--token', dest='token', type=str, help='Token of telegram bot', required=True)
@@ -61,6 +62,7 @@ class TelegramExecutor:
                 self.__status_builder.critical('Can\'t parse "' + id + '" to int')
                 self.__status_builder.exit()
 
+        import telegram
         self.__bot = telegram.Bot(token=self.__token)
 
     def send(self, message):
@@ -71,6 +73,8 @@ class TelegramExecutor:
             self.send_message_to_chat(message, chat_id)
 
     def send_message_to_chat(self, message, chat):
+        import telegram
+
         chat_to = 'user' if chat > 0 else 'group'
         try:
             self.__logger.debug('Sending message to ' + chat_to + ' with id "' + str(chat) + '"')
@@ -27,13 +27,34 @@
 #  and also my other projects <https://github.com/f-froehlich>
 
 
-import requests
+import codecs
+import http.cookiejar
+import json
+import threading
+import time
+import zlib
+
+from monitoring_utils.Core.Cache.FileCache import FileCache
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
 
 
 class WebExecutor:
+    # sessions keep their connections alive -> checks and notifications in one process share the handshakes
+    __sessions = {}
+    __sessions_lock = threading.Lock()
+    # validators are checked by the server on each request -> entries are only dropped by the LRU eviction
+    HTTP_CACHE_TTL = 30 * 24 * 3600
+    # content encodings decompressed by the executor itself -> each read is limited to the chunk size
+    DECODERS = {'gzip': 16 + zlib.MAX_WBITS, 'x-gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+    # requests also offers br and zstd if their modules are installed -> urllib3 would decode them without a limit
+    ACCEPT_ENCODING = 'gzip, deflate'
 
     def __init__(self, logger, parser, status_builder, client_key=None, client_cert=None, header=[], ssl=True,
-                 port=None, domain=None, uri=None):
+                 port=None, domain=None, uri=None, connect_timeout=10, read_timeout=60, retries=0, retry_backoff=0.5,
+                 http_cache_size=0, http_cache_dir=None, warning_time=None, critical_time=None, max_size=None,
+                 max_decoded_size=None):
 
         self.__status_builder = status_builder
         self.__logger = logger
@@ -45,61 +66,428 @@ class WebExecutor:
         self.__port = port
         self.__domain = domain
         self.__uri = uri
+        self.__connect_timeout = connect_timeout
+        self.__read_timeout = read_timeout
+        self.__retries = retries
+        self.__retry_backoff = retry_backoff
+        self.__http_cache = None
+        self.__response_headers = {}
+        self.__timings = None
+        self.__warning_time = warning_time
+        self.__critical_time = critical_time
+        self.__max_size = max_size
+        self.__max_decoded_size = max_decoded_size
+        self.__connection_arguments = []
+        self.__set_http_cache(http_cache_size, http_cache_dir)
 
-    def add_args(self):
-        self.__parser.add_argument('-u', '--uri', dest='uri', type=str, help='URI to fetch', default='/')
-        self.__parser.add_argument('-d', '--domain', dest='domain', type=str, help='Domain to fetch', required=True)
-        self.__parser.add_argument('-p', '--port', dest='port', type=int, help='Port to fetch')
+    def add_args(self, target=True):
+        if target:
+            self.__parser.add_argument('-u', '--uri', dest='uri', type=str, help='URI to fetch', default='/')
+            self.__parser.add_argument('-d', '--domain', dest='domain', type=str, help='Domain to fetch',
+                                       required=True)
+            self.__parser.add_argument('-p', '--port', dest='port', type=int, help='Port to fetch')
         self.__parser.add_argument('-s', '--ssl', dest='ssl', help='Use https', action='store_true')
         self.__parser.add_argument('--client-cert', dest='clientcert', type=str, help='Path to client certificate')
         self.__parser.add_argument('--client-key', dest='clientkey', type=str,
                                    help='Path to client certificate key file')
         self.__parser.add_argument('-H', '--header', dest='header', action='append', default=[],
                                    help='Header for request. Format: NAME=VALUE')
+        self.__parser.add_argument('--connect-timeout', dest='connect_timeout', type=float, default=10,
+                                   help='Seconds to wait for the connection to the server')
+        self.__parser.add_argument('--read-timeout', dest='read_timeout', type=float, default=60,
+                                   help='Seconds to wait for data from the server')
+        self.__parser.add_argument('--retries', dest='retries', type=int, default=0,
+                                   help='Retry failed connections and 502, 503 and 504 responses of GET requests')
+        self.__parser.add_argument('--retry-backoff', dest='retry_backoff', type=float, default=0.5,
+                                   help='Backoff factor between retries in seconds')
+        self.add_http_cache_args(self.__parser)
+        self.add_timing_args(self.__parser)
+        self.add_size_args(self.__parser)
+
+    @staticmethod
+    def add_size_args(parser):
+        parser.add_argument('--max-size', dest='max_size', type=int,
+                            help='Maximum number of bytes received for a response before the state is UNKNOWN')
+        parser.add_argument('--max-decoded-size', dest='max_decoded_size', type=int,
+                            help='Maximum number of bytes of a response after decompression before the state is '
+                                 'UNKNOWN')
+
+    @staticmethod
+    def add_timing_args(parser):
+        parser.add_argument('--warning-time', dest='warning_time', type=float,
+                            help='Seconds the request may take before the state is WARNING')
+        parser.add_argument('--critical-time', dest='critical_time', type=float,
+                            help='Seconds the request may take before the state is CRITICAL')
+
+    @staticmethod
+    def add_http_cache_args(parser, size=0):
+        parser.add_argument('--http-cache-size', dest='http_cache_size', type=int, default=size,
+                            help='Keep this many responses with an ETag or Last-Modified header and only download '
+                                 'them again if they changed. Set to 0 to disable the cache. Default: ' + str(size))
+        parser.add_argument('--http-cache-dir', dest='http_cache_dir', type=str,
+                            default=FileCache.get_default_directory(), help='Directory of the HTTP cache')
+
+    def __set_http_cache(self, size, directory):
+        self.__http_cache = None
+        if 0 < size:
+            self.__http_cache = FileCache(self.__logger,
+                                          directory if None is not directory else FileCache.get_default_directory(),
+                                          'http', max_entries=size)
 
     def configure(self, args):
 
-        self.__uri = args.uri
-        self.__domain = args.domain
-        self.__port = args.port
+        # executors without target arguments get their target from the caller
+        self.__uri = getattr(args, 'uri', self.__uri)
+        self.__domain = getattr(args, 'domain', self.__domain)
+        self.__port = getattr(args, 'port', self.__port)
         self.__ssl = args.ssl
         self.__header = args.header
         self.__client_key = args.clientkey
         self.__clinet_cert = args.clientcert
+        self.__connect_timeout = args.connect_timeout
+        self.__read_timeout = args.read_timeout
+        self.__retries = args.retries
+        self.__retry_backoff = args.retry_backoff
+        self.__set_http_cache(args.http_cache_size, args.http_cache_dir)
+        self.__warning_time = args.warning_time
+        self.__critical_time = args.critical_time
+        self.__max_size = args.max_size
+        self.__max_decoded_size = args.max_decoded_size
+
+        self.__connection_arguments = ['--ssl'] if self.__ssl else []
+        for header in self.__header:
+            self.__connection_arguments += ['-H', header]
+        for option, value in [('--client-cert', self.__clinet_cert), ('--client-key', self.__client_key),
+                              ('--connect-timeout', self.__connect_timeout), ('--read-timeout', self.__read_timeout),
+                              ('--retries', self.__retries), ('--retry-backoff', self.__retry_backoff),
+                              ('--http-cache-size', args.http_cache_size), ('--http-cache-dir', args.http_cache_dir),
+                              ('--warning-time', self.__warning_time), ('--critical-time', self.__critical_time),
+                              ('--max-size', self.__max_size), ('--max-decoded-size', self.__max_decoded_size)]:
+            if None is not value:
+                self.__connection_arguments += [option, str(value)]
+
+    def get_connection_arguments(self):
+        return list(self.__connection_arguments)
 
-    def __parse_config(self):
+    def __parse_config(self, uri=None):
         self.__logger.info('Parse config')
+        headers = self.get_header()
+        cert = self.get_client_cert_config()
+
+        return self.get_url(uri), headers, cert
+
+    def get_url(self, uri=None):
         proto = 'https' if self.__ssl else 'http'
         self.__logger.debug('Setup protocol to ' + proto)
         default_port = 443 if self.__ssl else 80
         port = self.__port if None != self.__port else default_port
         self.__logger.debug('Setup port to ' + str(port))
 
-        headers = self.get_header()
-        cert = self.get_client_cert_config()
-
-        url = proto + '://' + self.__domain + ':' + str(port) + self.__uri
-
-        return url, headers, cert
+        return proto + '://' + self.__domain + ':' + str(port) + (self.__uri if None is uri else uri)
 
     def run(self):
         return self.run_get()
 
-    def run_get(self):
-        url, headers, cert = self.__parse_config()
+    def run_get(self, uri=None):
+        url, headers, cert = self.__parse_config(uri)
+
+        if None is not self.__http_cache:
+            return self.__run_cached_get(url, headers, cert)
 
         self.__logger.info('Make GET request to "' + url + '"')
-        r = requests.get(url, headers=headers, cert=cert)
-        r.encoding = 'utf-8'
-        return r.text
+        r = self.__request('GET', url, headers=headers, cert=cert)
+        return self.__read_text(r, url)
+
+    def __run_cached_get(self, url, headers, cert):
+        # conditional GET -> unchanged responses are answered with 304 and no body
+        key = json.dumps([url, headers, cert])
+        entry = self.__http_cache.get(key)
+
+        self.__logger.info('Make conditional GET request to "' + url + '"')
+        r = self.__request('GET', url, headers=self.__get_conditional_headers(headers, entry), cert=cert)
+        if 304 == r.status_code and None is not entry:
+            self.__logger.debug('Response of "' + url + '" not modified, use cached content')
+            self.__read_text(r, url)
+            return entry['content']
+
+        content = self.__read_text(r, url)
+        self.__cache_response(key, r, 'content', content)
+        return content
+
+    def __get_conditional_headers(self, headers, entry):
+        request_headers = dict(headers)
+        if None is not entry:
+            if None is not entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if None is not entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+        return request_headers
+
+    def __cache_response(self, key, r, name, value):
+        etag = r.headers.get('ETag')
+        last_modified = r.headers.get('Last-Modified')
+        if 200 == r.status_code and (None is not etag or None is not last_modified):
+            self.__http_cache.set(key, {'etag': etag, 'last_modified': last_modified, name: value},
+                                  self.HTTP_CACHE_TTL)
+
+    def run_get_json(self, fields, uri=None, chunk_size=65536):
+        # decode the JSON body while it is received and keep only the given fields (see JsonFieldReader)
+        # -> large documents are never held in memory and reading stops once all fields are found
+        from monitoring_utils.Core.JsonFieldReader import JsonFieldReader
+
+        url, headers, cert = self.__parse_config(uri)
+        key = None
+        entry = None
+        if None is not self.__http_cache:
+            key = json.dumps([url, headers, cert, fields])
+            entry = self.__http_cache.get(key)
+            headers = self.__get_conditional_headers(headers, entry)
+
+        self.__logger.info('Make streaming JSON GET request to "' + url + '"')
+        r = self.__request('GET', url, headers=headers, cert=cert)
+        if 304 == r.status_code and None is not entry:
+            self.__logger.debug('Response of "' + url + '" not modified, use cached fields')
+            self.__set_transfer_timings(r)
+            r.close()
+            return entry['values']
+
+        reader = JsonFieldReader(fields)
+        try:
+            for chunk in self.__iter_body(r, url, None, chunk_size, True):
+                reader.feed(chunk)
+                if reader.is_finished():
+                    self.__logger.debug('Found all fields of "' + url + '", stop reading')
+                    break
+            else:
+                reader.close()
+        except ValueError as e:
+            self.__logger.debug(f'Response of "{url}" is no valid JSON: {e}')
+            self.__status_builder.unknown(f'Response of "{url}" is no valid JSON: {e}')
+            self.__status_builder.exit()
+        finally:
+            self.__set_transfer_timings(r)
+            r.close()
+
+        values = reader.get_values()
+        if None is not key:
+            self.__cache_response(key, r, 'values', values)
+        return values
+
+    def run_get_stream(self, max_size=None, chunk_size=65536, decode=True, uri=None):
+        # max_size truncates the body without an error, unlike the limits of the executor
+        # yield the body in chunks -> callers can stop reading as soon as they know enough
+        url, headers, cert = self.__parse_config(uri)
 
-    def run_post(self, data=None, json=None):
-        url, headers, cert = self.__parse_config()
+        self.__logger.info('Make streaming GET request to "' + url + '"')
+        r = self.__request('GET', url, headers=headers, cert=cert)
+        try:
+            yield from self.__iter_body(r, url, max_size, chunk_size, decode)
+        finally:
+            self.__set_transfer_timings(r)
+            r.close()
+
+    def __iter_body(self, r, url, max_size, chunk_size, decode):
+        # chunks as str if decode is set, else as bytes
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        size = 0
+        for chunk in self.__iter_content(r, url, chunk_size):
+            if None is not max_size and size + len(chunk) >= max_size:
+                self.__logger.info('Reached maximum content size of ' + str(max_size) + ' bytes, stop reading')
+                chunk = chunk[:max_size - size]
+                yield decoder.decode(chunk, True) if decode else chunk
+                return
+            size += len(chunk)
+            yield decoder.decode(chunk) if decode else chunk
+        if decode:
+            yield decoder.decode(b'', True)
+
+    def __read_text(self, r, url):
+        try:
+            return b''.join(self.__iter_content(r, url)).decode('utf-8', 'replace')
+        finally:
+            self.__set_transfer_timings(r)
+            r.close()
+
+    def __iter_content(self, r, url, chunk_size=65536):
+        # decompressed body in chunks of at most chunk_size bytes.
+        # the received and the decompressed bytes are counted -> reading stops with UNKNOWN once a limit is reached
+        import requests
+        import urllib3
+
+        length = r.headers.get('Content-Length', '')
+        if None is not self.__max_size and length.isdigit() and int(length) > self.__max_size:
+            self.__exceed_limit(url, f'has {length} bytes, more than the maximum of {self.__max_size} bytes')
+
+        encoding = r.headers.get('Content-Encoding', 'identity').strip().lower()
+        wbits = self.DECODERS.get(encoding)
+        decoder = None if None is wbits else zlib.decompressobj(wbits)
+        self.__timings['decoded_size'] = 0
+        try:
+            while True:
+                if None is decoder:
+                    # other encodings are decoded by urllib3 with no limit for a single chunk
+                    chunk = r.raw.read(chunk_size, decode_content='identity' != encoding)
+                    if b'' == chunk:
+                        return
+                elif b'' != decoder.unconsumed_tail:
+                    chunk = decoder.decompress(decoder.unconsumed_tail, chunk_size)
+                else:
+                    data = r.raw.read(chunk_size, decode_content=False)
+                    if b'' == data:
+                        chunk = decoder.flush()
+                        if b'' == chunk:
+                            return
+                    else:
+                        try:
+                            chunk = decoder.decompress(data, chunk_size)
+                        except zlib.error:
+                            # some servers send deflate data without the zlib header
+                            if 'deflate' != encoding or 0 != self.__timings['decoded_size']:
+                                raise
+                            decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+                            encoding = 'raw deflate'
+                            chunk = decoder.decompress(data, chunk_size)
+
+                if None is not self.__max_size and r.raw.tell() > self.__max_size:
+                    self.__exceed_limit(url, f'has more than the maximum of {self.__max_size} bytes')
+                self.__timings['decoded_size'] += len(chunk)
+                if None is not self.__max_decoded_size and self.__timings['decoded_size'] > self.__max_decoded_size:
+                    self.__exceed_limit(url, f'has more than the maximum of {self.__max_decoded_size} bytes '
+                                             f'after decompression')
+                if b'' != chunk:
+                    yield chunk
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, zlib.error) as e:
+            self.__logger.debug(f'Reading response of "{url}" failed: {e}')
+            self.__status_builder.unknown(f'Reading response of "{url}" failed: {e}')
+            self.__status_builder.exit()
+
+    def __exceed_limit(self, url, reason):
+        self.__logger.info(f'Response of "{url}" {reason}, stop reading')
+        self.__status_builder.unknown(f'Response of "{url}" {reason}')
+        self.__status_builder.exit()
+
+    def run_post(self, data=None, json=None, uri=None):
+        url, headers, cert = self.__parse_config(uri)
 
         self.__logger.info('Make POST request to "' + url + '"')
-        r = requests.post(url, headers=headers, cert=cert, data=data, json=json, timeout=60)
-        r.encoding = 'utf-8'
-        return r.text
+        r = self.__request('POST', url, headers=headers, cert=cert, data=data, json=json)
+        return self.__read_text(r, url)
+
+    def __request(self, method, url, **kwargs):
+        import requests
+
+        from monitoring_utils.Core.Executor import WebTiming
+
+        if 0 >= Deadline.remaining(1):
+            # requests rejects a timeout of 0 with a ValueError -> report the deadline like the other executors
+            self.__logger.info(f'Deadline reached, skip {method} request to "{url}"')
+            self.__status_builder.unknown('Timeout of ' + str(Deadline.get_current().get_timeout()) + ' seconds reached.')
+            self.__status_builder.exit()
+
+        try:
+            WebTiming.reset()
+            self.__timings = None
+            start = time.monotonic()
+            # the body is read by the caller -> its size can be limited
+            r = self.get_session().request(method, url, timeout=self.get_timeout(), stream=True, **kwargs)
+            self.__response_headers = r.headers
+            # time to first byte as curl measures it: from the start of the request until the headers are read
+            self.__timings = WebTiming.get_phases()
+            self.__timings.update({'start': start, 'ttfb': r.elapsed.total_seconds()})
+            return r
+        except requests.exceptions.RequestException as e:
+            self.__logger.debug(f'{method} request to "{url}" failed: {e}')
+            self.__status_builder.unknown(f'{method} request to "{url}" failed: {e}')
+            self.__status_builder.exit()
+
+    def __set_transfer_timings(self, r):
+        if None is self.__timings:
+            return
+        self.__timings['total'] = time.monotonic() - self.__timings['start']
+        try:
+            # bytes read from the connection, before decompression
+            self.__timings['size'] = r.raw.tell()
+        except (AttributeError, ValueError):
+            self.__timings['size'] = self.__timings.get('decoded_size', 0)
+
+    def get_timings(self):
+        # phases of the last request in seconds and the number of bytes received
+        if None is self.__timings or 'total' not in self.__timings:
+            return None
+        return {key: value for key, value in self.__timings.items() if 'start' != key}
+
+    def report_timings(self):
+        timings = self.get_timings()
+        if None is timings:
+            return
+
+        total = round(timings['total'], 3)
+        perfdata = [
+            Perfdata('dns_time', round(timings['dns'], 4), unit='s', min=0),
+            Perfdata('connect_time', round(timings['connect'], 4), unit='s', min=0),
+            Perfdata('tls_time', round(timings['tls'], 4), unit='s', min=0),
+            Perfdata('ttfb', round(timings['ttfb'], 4), unit='s', min=0),
+            Perfdata('time', round(timings['total'], 4), unit='s', warning=self.__warning_time,
+                     critical=self.__critical_time, min=0),
+            Perfdata('size', timings['size'], unit='B', min=0, max=self.__max_size),
+            Perfdata('decoded_size', timings.get('decoded_size', 0), unit='B', min=0, max=self.__max_decoded_size),
+        ]
+        if None is not self.__critical_time and total > self.__critical_time:
+            self.__status_builder.critical(
+                Output(f'Response time of {total}s is above {self.__critical_time}s', perfdata))
+        elif None is not self.__warning_time and total > self.__warning_time:
+            self.__status_builder.warning(
+                Output(f'Response time of {total}s is above {self.__warning_time}s', perfdata))
+        else:
+            self.__status_builder.success(Output(f'Response time {total}s', perfdata))
+
+    def get_size_limits(self):
+        # maximum received and decompressed bytes of a response, None for no limit
+        return self.__max_size, self.__max_decoded_size
+
+    def get_response_headers(self):
+        return self.__response_headers
+
+    def get_timeout(self):
+        remaining = Deadline.remaining()
+        if None is remaining:
+            return self.__connect_timeout, self.__read_timeout
+        return min(self.__connect_timeout, remaining), min(self.__read_timeout, remaining)
+
+    def get_session(self):
+        proto = 'https' if self.__ssl else 'http'
+        port = self.__port if None != self.__port else (443 if self.__ssl else 80)
+        key = (proto, self.__domain, port, self.__retries, self.__retry_backoff)
+
+        with WebExecutor.__sessions_lock:
+            session = WebExecutor.__sessions.get(key)
+            if None is session:
+                self.__logger.debug('Create session for ' + proto + '://' + str(self.__domain) + ':' + str(port))
+                session = self.__create_session(proto)
+                WebExecutor.__sessions[key] = session
+        return session
+
+    def __create_session(self, proto):
+        import requests
+        from urllib3.util.retry import Retry
+
+        from monitoring_utils.Core.Executor.WebTiming import TimedHTTPAdapter
+
+        session = requests.Session()
+        # the session is shared between checks -> don't carry cookies from one request to the next
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        session.headers['Accept-Encoding'] = self.ACCEPT_ENCODING
+        retry = Retry(total=self.__retries, connect=self.__retries, read=self.__retries, status=self.__retries,
+                      backoff_factor=self.__retry_backoff, status_forcelist=[502, 503, 504], raise_on_status=False)
+        session.mount(proto + '://', TimedHTTPAdapter(max_retries=retry))
+        return session
+
+    @staticmethod
+    def close_sessions():
+        with WebExecutor.__sessions_lock:
+            for session in WebExecutor.__sessions.values():
+                session.close()
+            WebExecutor.__sessions.clear()
 
     def get_header(self):
         headers = {}
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+# only imported by WebExecutor when a session is created -> requests and urllib3 are loaded on demand
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# connections are opened in the thread of the request -> phases of the current request
+_phases = threading.local()
+
+
+def reset():
+    _phases.dns = 0.0
+    _phases.connect = 0.0
+    _phases.tls = 0.0
+
+
+def get_phases():
+    return {
+        'dns': getattr(_phases, 'dns', 0.0),
+        'connect': getattr(_phases, 'connect', 0.0),
+        'tls': getattr(_phases, 'tls', 0.0),
+    }
+
+
+class TimedHTTPConnection(HTTPConnection):
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.monotonic()
+        try:
+            addresses = list(dict.fromkeys(
+                [address[4][0] for address in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)]))
+        except OSError:
+            # urllib3 reports the resolution error
+            addresses = [host]
+        resolved = time.monotonic()
+        _phases.dns = resolved - start
+
+        # connect to the resolved addresses one after another like urllib3 does, without resolving them again
+        sock = None
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError, OSError) as e:
+                    # e.g. refused or unreachable IPv6 address -> try the next one
+                    error = e
+        finally:
+            self._dns_host = host
+        if None is sock:
+            raise error
+
+        _phases.connect = time.monotonic() - resolved
+        return sock
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        _phases.tls = max(0.0, time.monotonic() - start - _phases.dns - _phases.connect)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
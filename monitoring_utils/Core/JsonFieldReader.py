@@ -0,0 +1,243 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import json
+import re
+
+
+class JsonFieldReader:
+    # reads only the given fields (e.g. "tag_name", "assets.*.name") of a JSON document fed in chunks.
+    # other values are skipped without decoding them -> memory only depends on the size of the wanted fields
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    # unrolled loops -> unterminated strings at the end of a chunk fail without backtracking
+    STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+    STRING_PART = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+    # characters and complete strings of a skipped object or array up to the next bracket
+    SKIP_PART = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+    SCALAR_PART = re.compile(r'[^,}\] \t\n\r]*')
+
+    def __init__(self, fields):
+        self.__fields = [tuple(field.split('.')) for field in fields]
+        self.__values = {}
+        self.__found = set()
+        self.__buffer = ''
+        self.__decoder = json.JSONDecoder()
+
+        # key or index of each open object or array and their closing brackets
+        self.__path = []
+        self.__closing = []
+        self.__state = 'value'
+        self.__skip = None
+
+    def __matches(self, path, field):
+        return len(path) <= len(field) and False not in [
+            '*' == expected or expected == key for key, expected in zip(path, field)
+        ]
+
+    def __is_wanted(self, path):
+        return True in [len(path) == len(field) and self.__matches(path, field) for field in self.__fields]
+
+    def __is_parent(self, path):
+        return True in [len(path) < len(field) and self.__matches(path, field) for field in self.__fields]
+
+    def feed(self, text):
+        self.__buffer += text
+        self.__parse(False)
+
+    def close(self):
+        self.__parse(True)
+        if 'done' != self.__state or '' != self.__buffer.strip():
+            raise ValueError('Incomplete JSON document')
+
+    def is_finished(self):
+        # fields with wildcards can match until the end of the document
+        return 'done' == self.__state or (
+            len(self.__found) == len(self.__fields) and '*' not in [key for field in self.__fields for key in field]
+        )
+
+    def get_values(self):
+        # nested dicts with the found fields only, array indexes are keys as well,
+        # e.g. {"assets": {"0": {"name": ...}}} for "assets.*.name"
+        return self.__values
+
+    def __set_value(self, path, value):
+        values = self.__values
+        for key in path[:-1]:
+            values = values.setdefault(key, {})
+        values[path[-1]] = value
+        self.__found.update([field for field in self.__fields if len(field) == len(path) and
+                             self.__matches(path, field)])
+
+    def __parse(self, final):
+        buffer = self.__buffer
+        position = 0
+        while True:
+            if None is not self.__skip:
+                position = self.__skip_value(buffer, position, final)
+                if None is not self.__skip:
+                    break
+                self.__end_value()
+                continue
+
+            position = self.WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            character = buffer[position]
+
+            if 'key' == self.__state:
+                if '}' == character:
+                    self.__close_container()
+                    position += 1
+                    continue
+                match = self.STRING.match(buffer, position)
+                if None is match:
+                    if '"' != character:
+                        raise ValueError(f'Expected a key at "{buffer[position:position + 20]}"')
+                    break
+                self.__path[-1] = json.loads(match.group())
+                self.__state = 'colon'
+                position = match.end()
+            elif 'colon' == self.__state:
+                if ':' != character:
+                    raise ValueError(f'Expected ":" at "{buffer[position:position + 20]}"')
+                self.__state = 'value'
+                position += 1
+            elif 'value' == self.__state:
+                path = tuple(self.__path)
+                if ']' == character and 0 != len(self.__closing) and ']' == self.__closing[-1]:
+                    # empty array
+                    self.__close_container()
+                    position += 1
+                elif self.__is_wanted(path):
+                    # a number can continue in the next chunk, e.g. "1" of "1.5"
+                    if not final and character not in '{["' and \
+                            self.SCALAR_PART.match(buffer, position).end() == len(buffer):
+                        break
+                    try:
+                        value, end = self.__decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break
+                    self.__set_value(path, value)
+                    position = end
+                    self.__end_value()
+                elif '{' == character and self.__is_parent(path):
+                    self.__path.append(None)
+                    self.__closing.append('}')
+                    self.__state = 'key'
+                    position += 1
+                elif '[' == character and self.__is_parent(path):
+                    self.__path.append('0')
+                    self.__closing.append(']')
+                    position += 1
+                else:
+                    self.__skip = [False, 0, False, False, False]
+            elif 'comma' == self.__state:
+                if ',' == character and '}' == self.__closing[-1]:
+                    self.__state = 'key'
+                elif ',' == character:
+                    self.__path[-1] = str(int(self.__path[-1]) + 1)
+                    self.__state = 'value'
+                elif character == self.__closing[-1]:
+                    self.__close_container()
+                else:
+                    raise ValueError(f'Expected "," or "{self.__closing[-1]}" at "{buffer[position:position + 20]}"')
+                position += 1
+            else:
+                raise ValueError(f'Extra data at "{buffer[position:position + 20]}"')
+
+        # the parsed part is not needed anymore
+        self.__buffer = buffer[position:]
+
+    def __end_value(self):
+        self.__state = 'comma' if 0 != len(self.__path) else 'done'
+
+    def __close_container(self):
+        self.__path.pop()
+        self.__closing.pop()
+        self.__end_value()
+
+    def __skip_value(self, buffer, position, final):
+        started, depth, in_string, escaped, scalar = self.__skip
+        length = len(buffer)
+        while position < length:
+            if escaped:
+                escaped = False
+                position += 1
+            elif in_string:
+                # stops at the closing quote or a backslash at the end of the chunk
+                position = self.STRING_PART.match(buffer, position).end()
+                if position == length:
+                    break
+                in_string = '\\' == buffer[position]
+                escaped = in_string
+                position += 1
+                if not in_string and 0 == depth:
+                    self.__skip = None
+                    return position
+            elif scalar:
+                position = self.SCALAR_PART.match(buffer, position).end()
+                if position == length:
+                    break
+                self.__skip = None
+                return position
+            elif not started:
+                started = True
+                character = buffer[position]
+                if character in '{[':
+                    depth = 1
+                    position += 1
+                elif '"' == character:
+                    in_string = True
+                    position += 1
+                else:
+                    scalar = True
+            else:
+                position = self.SKIP_PART.match(buffer, position).end()
+                if position == length:
+                    break
+                character = buffer[position]
+                position += 1
+                if '"' == character:
+                    # string continues in the next chunk
+                    in_string = True
+                elif character in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if 0 == depth:
+                        self.__skip = None
+                        return position
+
+        if final and scalar:
+            self.__skip = None
+            return position
+        self.__skip = [started, depth, in_string, escaped, scalar]
+        return position
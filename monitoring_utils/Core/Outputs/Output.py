@@ -40,6 +40,12 @@ class Output:
     def __repr__(self) -> str:
         return self.get()
 
+    def get_description(self) -> str:
+        return self._description
+
+    def get_perfdata(self) -> list:
+        return self._perfdata
+
     def get(self) -> str:
         output = self._description
 
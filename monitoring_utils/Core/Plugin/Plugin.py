@@ -28,28 +28,75 @@
 
 
 import argparse
+import threading
 
 from monitoring_utils.Core.Logger import Logger
+from monitoring_utils.Core.Plugin.PluginArgumentParser import PluginArgumentParser
 from monitoring_utils.Core.Signals import Signals
-from monitoring_utils.Core.StatusBuilder import StatusBuilder
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
 
 
 class Plugin:
+    __deferred = threading.local()
 
     def __init__(self, description):
-        self.__parser = argparse.ArgumentParser(description=description, conflict_handler='resolve')
+        deferred = getattr(Plugin.__deferred, 'active', False)
+        alarm = getattr(Plugin.__deferred, 'alarm', True)
+        if deferred:
+            self.__parser = PluginArgumentParser(prog=type(self).__name__, description=description,
+                                                 conflict_handler='resolve')
+        else:
+            self.__parser = argparse.ArgumentParser(description=description, conflict_handler='resolve')
         self.__logger = Logger(self.__parser)
-        self.__status_builder = StatusBuilder(self.__logger)
-        self.__signals = Signals(self.__parser, self.__logger, self.__status_builder)
+        self.__status_builder = StatusBuilder(self.__logger, raise_on_exit=True)
+        self.__signals = Signals(self.__parser, self.__logger, self.__status_builder, alarm=alarm)
 
-        self.add_args()
+        if deferred:
+            self.add_args()
+            return
 
-        args = self.__parser.parse_args()
-        self.__logger.configure(args)
-        self.__signals.configure(args)
-        self.configure(args)
-        self.run()
-        self.__status_builder.exit()
+        try:
+            self.add_args()
+            result = self.execute()
+        except CheckExit as e:
+            result = e.get_result()
+        self.__status_builder.finish(result)
+
+    @classmethod
+    def create(cls, alarm=False):
+        Plugin.__deferred.active = True
+        Plugin.__deferred.alarm = alarm
+        try:
+            return cls()
+        finally:
+            Plugin.__deferred.active = False
+            Plugin.__deferred.alarm = True
+
+    @classmethod
+    def check(cls, argv, alarm=False):
+        try:
+            plugin = cls.create(alarm)
+        except CheckExit as e:
+            return e.get_result()
+        return plugin.execute(argv)
+
+    def execute(self, argv=None):
+        try:
+            try:
+                args = self.__parser.parse_args(argv)
+            except argparse.ArgumentError as e:
+                self.__status_builder.unknown(str(e).strip())
+                self.__status_builder.exit()
+            self.__logger.configure(args)
+            self.__signals.configure(args)
+            self.configure(args)
+            self.run()
+            self.__status_builder.exit()
+        except CheckExit as e:
+            return e.get_result()
+        finally:
+            # also on other exceptions -> the next check in this thread or process starts without a deadline or alarm
+            self.__signals.cancel()
 
     def add_args(self):
         self.__status_builder.critical('Plugin have to override add_args method')
@@ -71,3 +118,6 @@ class Plugin:
 
     def get_status_builder(self):
         return self.__status_builder
+
+    def get_signals(self):
+        return self.__signals
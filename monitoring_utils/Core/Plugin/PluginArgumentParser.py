@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import argparse
+
+
+class PluginArgumentParser(argparse.ArgumentParser):
+
+    def __init__(self, *args, **kwargs):
+        argparse.ArgumentParser.__init__(self, *args, **kwargs)
+        self.__message = None
+
+    def print_usage(self, file=None):
+        self.__raise(self.format_usage())
+
+    def print_help(self, file=None):
+        self.__raise(self.format_help())
+
+    def error(self, message):
+        # argparse passes raised errors back to error(), don't prefix them twice
+        if message != self.__message:
+            message = self.prog + ': error: ' + message
+        self.__raise(message)
+
+    def exit(self, status=0, message=None):
+        self.__raise(message if None is not message else 'Exit with status ' + str(status))
+
+    def __raise(self, message):
+        self.__message = message
+        raise argparse.ArgumentError(None, message)
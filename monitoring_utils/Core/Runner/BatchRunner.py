@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.Logger import Logger
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+from monitoring_utils.Core.Runner.PluginLoader import PluginLoader
+
+_plugin_loader = None
+
+
+def execute_check(plugin_name, arguments, allowed_prefixes, alarm):
+    global _plugin_loader
+    # pool threads and processes are reused -> never inherit the deadline of a previous check
+    Deadline.set_current(None)
+    if None is _plugin_loader:
+        _plugin_loader = PluginLoader(Logger(argparse.ArgumentParser()), allowed_prefixes, Plugin)
+
+    plugin_class = _plugin_loader.get_plugin(plugin_name)
+    return plugin_class.check(arguments, alarm).to_dict()
+
+
+class BatchRunner:
+
+    def __init__(self):
+        self.__parser = argparse.ArgumentParser(description='Run many check plugins concurrently and print one '
+                                                            'JSON result per line as soon as a check finished')
+        self.__logger = Logger(self.__parser)
+        self.__file = None
+        self.__output = None
+        self.__threads = None
+        self.__processes = None
+        self.__default_pool = None
+        self.__default_timeout = None
+        self.__grace = None
+        self.__allowed_prefixes = []
+        self.__plugin_loader = None
+        self.add_args()
+
+        args = self.__parser.parse_args()
+        self.__logger.configure(args)
+        self.configure(args)
+        self.run()
+
+    def add_args(self):
+        self.__parser.add_argument('-f', '--file', dest='file', type=str, required=True,
+                                   help='File with one check per line, "-" to read from stdin. Format: '
+                                        '{"id": ID, "plugin": MODULE[:CLASS], "arguments": [ARG, ...], '
+                                        '"timeout": SECONDS, "pool": "thread"|"process"}')
+        self.__parser.add_argument('-o', '--output', dest='output', type=str, default='-',
+                                   help='File to write the results to. Default: stdout')
+        self.__parser.add_argument('--threads', dest='threads', type=int, default=16,
+                                   help='Number of threads for I/O bound checks. Default: 16')
+        self.__parser.add_argument('--processes', dest='processes', type=int, default=os.cpu_count() or 1,
+                                   help='Number of processes for CPU bound checks. Default: number of CPUs')
+        self.__parser.add_argument('--default-pool', dest='defaultpool', type=str, default='thread',
+                                   choices=['thread', 'process'], help='Pool for checks without pool. Default: thread')
+        self.__parser.add_argument('--default-timeout', dest='defaulttimeout', type=int, default=10,
+                                   help='Timeout for checks without timeout. Default: 10')
+        self.__parser.add_argument('--grace', dest='grace', type=float, default=1,
+                                   help='Seconds to wait after the timeout of a check before its result is '
+                                        'reported as UNKNOWN. Default: 1')
+        self.__parser.add_argument('--allowed-prefix', dest='allowedprefixes', action='append', default=[],
+                                   help='Module prefix a plugin must start with. Default: monitoring_utils.Checks.')
+
+    def configure(self, args):
+        self.__file = args.file
+        self.__output = args.output
+        self.__threads = args.threads
+        self.__processes = args.processes
+        self.__default_pool = args.defaultpool
+        self.__default_timeout = args.defaulttimeout
+        self.__grace = args.grace
+        self.__allowed_prefixes = args.allowedprefixes
+        if 0 == len(self.__allowed_prefixes):
+            self.__allowed_prefixes = ['monitoring_utils.Checks.']
+        self.__plugin_loader = PluginLoader(self.__logger, self.__allowed_prefixes, Plugin)
+
+        if 1 > self.__threads or 1 > self.__processes:
+            self.__parser.error('Number of threads and processes must be at least 1')
+
+    def run(self):
+        checks = {'thread': [], 'process': []}
+        output = sys.stdout if '-' == self.__output else open(self.__output, 'w')
+        input_file = sys.stdin if '-' == self.__file else open(self.__file, 'r')
+        with input_file:
+            for line_number, line in enumerate(input_file, 1):
+                if '' == line.strip() or line.strip().startswith('#'):
+                    continue
+                try:
+                    check = self.parse_check(line, line_number)
+                except ValueError as e:
+                    self.__logger.info('Ignore line ' + str(line_number) + ': ' + str(e))
+                    self.write(output, {'id': line_number, 'exit_code': 3, 'state': 'UNKNOWN',
+                                        'output': ['UNKNOWN: ' + str(e)]})
+                    continue
+                checks[check['pool']].append(check)
+
+        pools = {
+            'thread': ThreadPoolExecutor(max_workers=self.__threads),
+            'process': ProcessPoolExecutor(max_workers=self.__processes),
+        }
+        limits = {'thread': self.__threads, 'process': self.__processes}
+        running = {}
+        abandoned = set()
+
+        while 0 != len(checks['thread']) + len(checks['process']) + len(running):
+            for pool_name, pool in pools.items():
+                # an abandoned thread keeps its worker busy until the check returns
+                busy = len([f for f in running if running[f]['pool'] == pool_name])
+                busy += len([f for f in abandoned if not f.done() and pool_name == 'thread'])
+                while busy < limits[pool_name] and 0 != len(checks[pool_name]):
+                    check = checks[pool_name].pop(0)
+                    self.__logger.debug('Start check "' + str(check['id']) + '" in ' + pool_name + ' pool')
+                    future = pool.submit(execute_check, check['plugin'], check['arguments'],
+                                         self.__allowed_prefixes, 'process' == pool_name)
+                    check['started'] = time.monotonic()
+                    check['deadline'] = check['started'] + check['timeout'] + self.__grace
+                    running[future] = check
+                    busy += 1
+
+            if 0 == len(running):
+                # all workers are kept busy by abandoned checks -> the queued checks start when one of them returns
+                wait([f for f in abandoned if not f.done()], return_when=FIRST_COMPLETED)
+                continue
+
+            next_deadline = min([check['deadline'] for check in running.values()])
+            done, not_done = wait(running.keys(), timeout=max(0.0, next_deadline - time.monotonic()),
+                                  return_when=FIRST_COMPLETED)
+
+            for future in done:
+                check = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.__logger.info('Check "' + str(check['id']) + '" failed: ' + str(e))
+                    result = {'exit_code': 3, 'state': 'UNKNOWN',
+                              'output': ['UNKNOWN: Plugin failed with ' + type(e).__name__ + ': ' + str(e)]}
+                self.write_result(output, check, result)
+
+            now = time.monotonic()
+            for future in [f for f in running if running[f]['deadline'] <= now]:
+                check = running.pop(future)
+                self.__logger.info('Check "' + str(check['id']) + '" reached its deadline')
+                if not future.cancel():
+                    abandoned.add(future)
+                self.write_result(output, check, {
+                    'exit_code': 3,
+                    'state': 'UNKNOWN',
+                    'output': ['UNKNOWN: Timeout of ' + str(check['timeout']) + ' seconds reached.'],
+                })
+
+        if output is not sys.stdout:
+            output.close()
+
+        # checks in the process pool are stopped by their timeout signal
+        pools['process'].shutdown(wait=True, cancel_futures=True)
+        pending = [future for future in abandoned if not future.done()]
+        pools['thread'].shutdown(wait=0 == len(pending), cancel_futures=True)
+        if 0 != len(pending):
+            self.__logger.info(str(len(pending)) + ' checks are still running after their deadline, exit anyway')
+            sys.stdout.flush()
+            os._exit(0)
+
+    def parse_check(self, line, line_number):
+        try:
+            check = json.loads(line)
+        except ValueError as e:
+            raise ValueError('Invalid JSON: ' + str(e))
+        if not isinstance(check, dict) or not isinstance(check.get('plugin', None), str):
+            raise ValueError('A check needs at least a plugin')
+
+        arguments = check.get('arguments', [])
+        if not isinstance(arguments, list):
+            raise ValueError('Arguments must be a list')
+        arguments = [str(argument) for argument in arguments]
+
+        pool = check.get('pool', self.__default_pool)
+        if pool not in ['thread', 'process']:
+            raise ValueError('Unknown pool "' + str(pool) + '"')
+
+        timeout = check.get('timeout', None)
+        if None is timeout:
+            timeout = self.__default_timeout
+        elif not isinstance(timeout, int) or 0 > timeout:
+            raise ValueError('Timeout must be a positive integer')
+
+        if 0 == len([argument for argument in arguments if argument.split('=')[0] == '--timeout']):
+            # the plugin also knows its deadline and can stop running commands and requests in time
+            arguments += ['--timeout', str(timeout)]
+
+        # import in this process to report unknown plugins before starting any worker
+        self.__plugin_loader.get_plugin(check['plugin'])
+
+        return {
+            'id': check.get('id', line_number),
+            'plugin': check['plugin'],
+            'arguments': arguments,
+            'pool': pool,
+            'timeout': timeout,
+        }
+
+    def write_result(self, output, check, result):
+        record = {
+            'id': check['id'],
+            'plugin': check['plugin'],
+            'duration': round(time.monotonic() - check['started'], 3),
+        }
+        record.update(result)
+        self.write(output, record)
+
+    def write(self, output, record):
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+
+if __name__ == '__main__':
+    BatchRunner()
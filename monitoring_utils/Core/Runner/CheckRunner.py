@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import argparse
+import io
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+
+from monitoring_utils.Core.Logger import Logger
+from monitoring_utils.Core.Notification.Notification import Notification
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+from monitoring_utils.Core.Runner.PluginLoader import PluginLoader
+
+
+class CheckRunner:
+
+    def __init__(self):
+        self.__parser = argparse.ArgumentParser(description='Resident runner which executes check plugins without '
+                                                            'starting a new interpreter per check')
+        self.__logger = Logger(self.__parser)
+        self.__socket_path = None
+        self.__socket_mode = None
+        self.__request_timeout = None
+        self.__plugin_loader = None
+        self.__running = False
+        self.add_args()
+
+        args = self.__parser.parse_args()
+        self.__logger.configure(args)
+        self.configure(args)
+        self.run()
+
+    def add_args(self):
+        self.__parser.add_argument('-S', '--socket', dest='socket', type=str, required=True,
+                                   help='Path of the unix socket to listen on')
+        self.__parser.add_argument('--socket-mode', dest='socketmode', type=str, default='660',
+                                   help='Octal file mode of the unix socket. Default: 660')
+        self.__parser.add_argument('--request-timeout', dest='requesttimeout', type=int, default=5,
+                                   help='Seconds to wait for a client to send its request. Default: 5')
+        self.__parser.add_argument('-P', '--preload', dest='preload', action='append', default=[],
+                                   help='Plugin to import on startup. Format: MODULE or MODULE:CLASS')
+        self.__parser.add_argument('--allowed-prefix', dest='allowedprefixes', action='append', default=[],
+                                   help='Module prefix a requested plugin must start with. '
+                                        'Default: monitoring_utils.Checks. and monitoring_utils.Notification.')
+
+    def configure(self, args):
+        self.__socket_path = args.socket
+        self.__request_timeout = args.requesttimeout
+        try:
+            self.__socket_mode = int(args.socketmode, 8)
+        except ValueError:
+            self.__parser.error('Socket mode must be an octal number. Invalid mode "' + args.socketmode + '" given.')
+
+        allowed_prefixes = args.allowedprefixes
+        if 0 == len(allowed_prefixes):
+            allowed_prefixes = ['monitoring_utils.Checks.', 'monitoring_utils.Notification.']
+        self.__plugin_loader = PluginLoader(self.__logger, allowed_prefixes, (Plugin, Notification))
+
+        for plugin_name in args.preload:
+            self.__logger.info('Preload plugin "' + plugin_name + '"')
+            try:
+                self.__plugin_loader.get_plugin(plugin_name)
+            except ValueError as e:
+                self.__parser.error(str(e))
+
+    def run(self):
+        if os.path.exists(self.__socket_path):
+            if not stat.S_ISSOCK(os.stat(self.__socket_path).st_mode):
+                self.__logger.critical('"' + self.__socket_path + '" exists and is not a socket')
+                sys.exit(3)
+            os.unlink(self.__socket_path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.__socket_path)
+        os.chmod(self.__socket_path, self.__socket_mode)
+        server.listen(128)
+        server.settimeout(1)
+        self.__logger.info('Listening on "' + self.__socket_path + '"')
+
+        self.__running = True
+        signal.signal(signal.SIGTERM, self.terminate_handler)
+        try:
+            while self.__running:
+                self.__reap_children()
+                try:
+                    connection, address = server.accept()
+                except socket.timeout:
+                    continue
+                self.__handle(server, connection)
+        except KeyboardInterrupt:
+            self.__logger.info('Stopping check runner')
+        finally:
+            server.close()
+            if os.path.exists(self.__socket_path):
+                os.unlink(self.__socket_path)
+
+    def stop(self):
+        self.__running = False
+
+    def terminate_handler(self, signum, frame):
+        self.__logger.info('Got signal ' + str(signum) + ', stopping check runner')
+        self.stop()
+
+    def __reap_children(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if 0 == pid:
+                return
+            self.__logger.debug('Check process with PID "' + str(pid) + '" finished')
+
+    def __handle(self, server, connection):
+        try:
+            connection.settimeout(self.__request_timeout)
+            request = json.loads(self.__read_line(connection))
+            plugin_name = request['plugin']
+            arguments = request.get('arguments', [])
+            if not isinstance(plugin_name, str) or not isinstance(arguments, list):
+                raise ValueError('Invalid request format')
+            arguments = [str(argument) for argument in arguments]
+            plugin_class = self.__plugin_loader.get_plugin(plugin_name)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.__logger.info('Reject request: ' + str(e))
+            self.__respond(connection, 3, 'UNKNOWN: ' + str(e) + '\n', '')
+            connection.close()
+            return
+
+        # plugin classes are imported in this process, the forked child only runs the check
+        pid = os.fork()
+        if 0 == pid:
+            exit_code = 3
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server.close()
+                connection.settimeout(None)
+                self.__execute(connection, plugin_name, plugin_class, arguments)
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+
+        self.__logger.debug('Run "' + plugin_name + '" in process with PID "' + str(pid) + '"')
+        connection.close()
+
+    def __execute(self, connection, plugin_name, plugin_class, arguments):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 3
+        sys.argv = [plugin_name] + arguments
+
+        # the logging of the runner is configured already -> remove it, the plugin configures its own logging with
+        # its --verbose and --debug arguments, which writes to the stderr of the response
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                plugin_class()
+            stdout.write('UNKNOWN: Plugin finished without status\n')
+        except SystemExit as e:
+            if None is e.code:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                stderr.write(str(e.code) + '\n')
+                exit_code = 1
+        except Exception as e:
+            stdout.write('UNKNOWN: Plugin failed with ' + type(e).__name__ + ': ' + str(e) + '\n')
+
+        self.__respond(connection, exit_code, stdout.getvalue(), stderr.getvalue())
+        connection.close()
+
+    def __read_line(self, connection):
+        data = b''
+        while b'\n' not in data:
+            chunk = connection.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > 1048576:
+                raise ValueError('Request too large')
+        return data.split(b'\n')[0].decode('utf-8')
+
+    def __respond(self, connection, exit_code, stdout, stderr):
+        response = json.dumps({'exit_code': exit_code, 'stdout': stdout, 'stderr': stderr}) + '\n'
+        try:
+            connection.sendall(response.encode('utf-8'))
+        except OSError as e:
+            self.__logger.info('Can\'t send response: ' + str(e))
+
+
+if __name__ == '__main__':
+    CheckRunner()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import argparse
+import json
+import socket
+import sys
+
+
+class CheckRunnerClient:
+
+    def __init__(self):
+        self.__parser = argparse.ArgumentParser(description='Run a check plugin inside a resident check runner')
+        self.__socket_path = None
+        self.__timeout = None
+        self.__plugin = None
+        self.__arguments = []
+        self.add_args()
+
+        args = self.__parser.parse_args()
+        self.configure(args)
+        self.run()
+
+    def add_args(self):
+        self.__parser.add_argument('-S', '--socket', dest='socket', type=str, required=True,
+                                   help='Path of the unix socket of the check runner')
+        self.__parser.add_argument('--runner-timeout', dest='runnertimeout', type=int, default=60,
+                                   help='Seconds to wait for the check result. Default: 60')
+        self.__parser.add_argument('plugin', type=str,
+                                   help='Plugin to run. Format: MODULE or MODULE:CLASS')
+        self.__parser.add_argument('arguments', nargs=argparse.REMAINDER, help='Arguments for the plugin')
+
+    def configure(self, args):
+        self.__socket_path = args.socket
+        self.__timeout = args.runnertimeout
+        self.__plugin = args.plugin
+        self.__arguments = args.arguments
+        if 0 != len(self.__arguments) and '--' == self.__arguments[0]:
+            self.__arguments = self.__arguments[1:]
+
+    def run(self):
+        request = json.dumps({'plugin': self.__plugin, 'arguments': self.__arguments}) + '\n'
+        data = b''
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(self.__timeout)
+                connection.connect(self.__socket_path)
+                connection.sendall(request.encode('utf-8'))
+                while True:
+                    chunk = connection.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+        except socket.timeout:
+            print('UNKNOWN: No result from check runner within ' + str(self.__timeout) + ' seconds')
+            sys.exit(3)
+        except OSError as e:
+            print('UNKNOWN: Can\'t connect to check runner on "' + self.__socket_path + '": ' + str(e))
+            sys.exit(3)
+
+        try:
+            response = json.loads(data.decode('utf-8'))
+        except ValueError:
+            print('UNKNOWN: Check runner closed connection without result')
+            sys.exit(3)
+
+        sys.stdout.write(response['stdout'])
+        sys.stderr.write(response['stderr'])
+        sys.exit(response['exit_code'])
+
+
+if __name__ == '__main__':
+    CheckRunnerClient()
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import importlib
+
+
+class PluginLoader:
+
+    def __init__(self, logger, allowed_prefixes, plugin_classes):
+        self.__logger = logger
+        self.__allowed_prefixes = allowed_prefixes
+        self.__plugin_classes = plugin_classes
+        self.__plugins = {}
+
+    def get_plugin(self, plugin_name):
+        plugin_class = self.__plugins.get(plugin_name, None)
+        if None is not plugin_class:
+            return plugin_class
+
+        allowed = False
+        for prefix in self.__allowed_prefixes:
+            if plugin_name.startswith(prefix):
+                allowed = True
+                break
+        if not allowed:
+            raise ValueError('Plugin "' + plugin_name + '" is not allowed')
+
+        module_name, separator, class_name = plugin_name.partition(':')
+        if '' == class_name:
+            # plugin classes are named like their module
+            class_name = module_name.split('.')[-1]
+
+        self.__logger.debug('Import class "' + class_name + '" from module "' + module_name + '"')
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ValueError('Can\'t import plugin "' + plugin_name + '": ' + str(e))
+
+        plugin_class = getattr(module, class_name, None)
+        if not isinstance(plugin_class, type) or not issubclass(plugin_class, self.__plugin_classes):
+            raise ValueError('"' + plugin_name + '" is not a plugin')
+
+        self.__plugins[plugin_name] = plugin_class
+        return plugin_class
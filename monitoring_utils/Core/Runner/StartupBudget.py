@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import importlib.util
+import pkgutil
+import subprocess
+import sys
+
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+
+
+class StartupBudget(Plugin):
+
+    def __init__(self):
+        self.__logger = None
+        self.__status_builder = None
+
+        self.__modules = None
+        self.__warning = None
+        self.__critical = None
+        self.__python = None
+        self.__top = None
+
+        Plugin.__init__(self, 'Check the import time of plugin modules in a fresh interpreter')
+
+    def add_args(self):
+        self.__parser = self.get_parser()
+        self.__parser.add_argument('-m', '--module', dest='modules', action='append', default=[],
+                                   help='Module or package to measure. Packages are measured module by module. '
+                                        'Default: monitoring_utils.Checks')
+        self.__parser.add_argument('-w', '--warning', dest='warning', type=float, default=150,
+                                   help='Import time budget in ms to exit in warning state. Default: 150')
+        self.__parser.add_argument('-c', '--critical', dest='critical', type=float, default=300,
+                                   help='Import time budget in ms to exit in critical state. Default: 300')
+        self.__parser.add_argument('--python', dest='python', type=str, default=sys.executable,
+                                   help='Python interpreter to measure with. Default: current interpreter')
+        self.__parser.add_argument('--top', dest='top', type=int, default=3,
+                                   help='Number of slowest imports to list per module. Default: 3')
+
+    def configure(self, args):
+        self.__logger = self.get_logger()
+        self.__status_builder = self.get_status_builder()
+
+        self.__modules = args.modules if 0 != len(args.modules) else ['monitoring_utils.Checks']
+        self.__warning = args.warning
+        self.__critical = args.critical
+        self.__python = args.python
+        self.__top = args.top
+
+        if self.__warning > self.__critical:
+            self.__status_builder.unknown(Output('Warning budget can\'t be greater than critical budget'))
+            self.__status_builder.exit()
+
+    def run(self):
+        # modules imported by the interpreter itself are not part of the budget
+        baseline = self.measure(None)
+        if None is baseline:
+            self.__status_builder.exit()
+
+        for module in self.find_modules():
+            imports = self.measure(module)
+            if None is imports:
+                continue
+
+            own_imports = [(name, times[0]) for name, times in imports.items() if name not in baseline]
+            total = round(sum([self_time for name, self_time in own_imports]) / 1000, 2)
+            own_imports.sort(key=lambda own_import: own_import[1], reverse=True)
+            slowest = ', '.join([name + ' ' + str(round(self_time / 1000, 2)) + ' ms'
+                                 for name, self_time in own_imports[:self.__top]])
+
+            output = Output(f'Import of "{module}" takes {total} ms (slowest: {slowest})', [
+                Perfdata(module, total, unit='ms', warning=self.__warning, critical=self.__critical, min=0)
+            ])
+            if self.__critical <= total:
+                self.__status_builder.critical(output)
+            elif self.__warning <= total:
+                self.__status_builder.warning(output)
+            else:
+                self.__status_builder.success(output)
+
+    def find_modules(self):
+        modules = []
+        for name in self.__modules:
+            spec = importlib.util.find_spec(name)
+            if None is spec:
+                self.__status_builder.unknown(Output(f'Module "{name}" does not exist'))
+                continue
+
+            if None is spec.submodule_search_locations:
+                modules.append(name)
+                continue
+
+            for module in pkgutil.walk_packages(spec.submodule_search_locations, name + '.'):
+                if not module.ispkg:
+                    modules.append(module.name)
+
+        return modules
+
+    def measure(self, module):
+        code = 'pass' if None is module else 'import ' + module
+        self.__logger.debug(f'Measure import time of "{code}"')
+
+        process = subprocess.Popen([self.__python, '-X', 'importtime', '-c', code],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        stderr = stderr.decode('utf-8')
+        if 0 != process.returncode:
+            errors = [line for line in stderr.strip().split('\n')
+                      if '' != line.strip() and not line.startswith('import time:')]
+            # e.g. killed without any message
+            error = errors[-1] if 0 != len(errors) else f'Interpreter exited with return code {process.returncode}'
+            self.__logger.info(f'Can\'t import "{module}": {error}')
+            self.__status_builder.unknown(Output(f'Can\'t import "{module}": {error}'))
+            return None
+
+        imports = {}
+        for line in stderr.split('\n'):
+            if not line.startswith('import time:'):
+                continue
+            columns = line[len('import time:'):].split('|')
+            if 3 != len(columns):
+                continue
+            try:
+                # self and cumulative time in us
+                imports[columns[2].strip()] = (int(columns[0]), int(columns[1]))
+            except ValueError:
+                # header line
+                continue
+
+        return imports
+
+
+if __name__ == '__main__':
+    StartupBudget()
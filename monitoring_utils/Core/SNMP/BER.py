@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+class BER:
+    INTEGER = 0x02
+    OCTET_STRING = 0x04
+    NULL = 0x05
+    OBJECT_IDENTIFIER = 0x06
+    SEQUENCE = 0x30
+
+    IP_ADDRESS = 0x40
+    COUNTER32 = 0x41
+    GAUGE32 = 0x42
+    TIMETICKS = 0x43
+    OPAQUE = 0x44
+    COUNTER64 = 0x46
+
+    NO_SUCH_OBJECT = 0x80
+    NO_SUCH_INSTANCE = 0x81
+    END_OF_MIB_VIEW = 0x82
+
+    GET_REQUEST = 0xa0
+    GET_NEXT_REQUEST = 0xa1
+    RESPONSE = 0xa2
+    GET_BULK_REQUEST = 0xa5
+    REPORT = 0xa8
+
+    @staticmethod
+    def encode_length(length):
+        if length < 0x80:
+            return bytes([length])
+        encoded = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+        return bytes([0x80 | len(encoded)]) + encoded
+
+    @staticmethod
+    def encode(tag, value):
+        return bytes([tag]) + BER.encode_length(len(value)) + value
+
+    @staticmethod
+    def encode_integer(value, tag=INTEGER):
+        length = 1
+        while not -(1 << (8 * length - 1)) <= value < (1 << (8 * length - 1)):
+            length += 1
+        return BER.encode(tag, value.to_bytes(length, 'big', signed=True))
+
+    @staticmethod
+    def encode_octet_string(value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        return BER.encode(BER.OCTET_STRING, value)
+
+    @staticmethod
+    def encode_null():
+        return BER.encode(BER.NULL, b'')
+
+    @staticmethod
+    def encode_oid(oid):
+        arcs = [int(arc) for arc in oid.strip('.').split('.')]
+        if 2 > len(arcs):
+            raise ValueError('OID "' + oid + '" needs at least two arcs')
+
+        encoded = bytearray()
+        for arc in [arcs[0] * 40 + arcs[1]] + arcs[2:]:
+            chunk = [arc & 0x7f]
+            arc >>= 7
+            while arc:
+                chunk.append(0x80 | (arc & 0x7f))
+                arc >>= 7
+            encoded += bytes(reversed(chunk))
+        return BER.encode(BER.OBJECT_IDENTIFIER, bytes(encoded))
+
+    @staticmethod
+    def encode_sequence(*values, tag=SEQUENCE):
+        return BER.encode(tag, b''.join(values))
+
+    @staticmethod
+    def decode(data, offset=0):
+        # returns tag, value, start of the value and offset of the next element
+        if offset + 2 > len(data):
+            raise ValueError('Truncated BER data')
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            size = length & 0x7f
+            if 0 == size or offset + size > len(data):
+                raise ValueError('Invalid BER length')
+            length = int.from_bytes(data[offset:offset + size], 'big')
+            offset += size
+        if offset + length > len(data):
+            raise ValueError('Truncated BER data')
+        return tag, data[offset:offset + length], offset, offset + length
+
+    @staticmethod
+    def decode_sequence(data):
+        values = []
+        offset = 0
+        while offset < len(data):
+            tag, value, start, offset = BER.decode(data, offset)
+            values.append((tag, value))
+        return values
+
+    @staticmethod
+    def decode_integer(value):
+        return int.from_bytes(value, 'big', signed=True)
+
+    @staticmethod
+    def decode_unsigned(value):
+        return int.from_bytes(value, 'big', signed=False)
+
+    @staticmethod
+    def decode_oid(value):
+        arcs = []
+        arc = 0
+        for byte in value:
+            arc = (arc << 7) | (byte & 0x7f)
+            if not byte & 0x80:
+                arcs.append(arc)
+                arc = 0
+        if 0 == len(arcs):
+            return ''
+        first = min(arcs[0] // 40, 2)
+        return '.'.join([str(first), str(arcs[0] - first * 40)] + [str(arc) for arc in arcs[1:]])
@@ -0,0 +1,358 @@
+#!/usr/bin/python3
+# -*- coding: utf-8
+
+#  Monitoring monitoring-utils
+#
+#  Monitoring monitoring-utils are the background magic for my plugins, scripts and more
+#
+#  Copyright (c) 2020 Fabian Fröhlich <mail@confgen.org> <https://icinga2.confgen.org>
+#
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Affero General Public License as
+#  published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Affero General Public License for more details.
+#
+#  You should have received a copy of the GNU Affero General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  For all license terms see README.md and LICENSE Files in root directory of this Project.
+#
+#  Checkout this project on github <https://github.com/f-froehlich/monitoring-utils>
+#  and also my other projects <https://github.com/f-froehlich>
+
+
+import hashlib
+import hmac
+import random
+import socket
+import time
+
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.SNMP.BER import BER
+
+
+class SNMPError(Exception):
+    pass
+
+
+class SNMPClient:
+    USM_STATS = {
+        '1.3.6.1.6.3.15.1.1.1.0': 'Unsupported security level',
+        '1.3.6.1.6.3.15.1.1.2.0': 'Not in time window',
+        '1.3.6.1.6.3.15.1.1.3.0': 'Unknown user name',
+        '1.3.6.1.6.3.15.1.1.4.0': 'Unknown engine ID',
+        '1.3.6.1.6.3.15.1.1.5.0': 'Wrong digest (authentication failure)',
+        '1.3.6.1.6.3.15.1.1.6.0': 'Decryption error',
+    }
+
+    def __init__(self, logger, host, version='2c', community=None, username=None, password=None, port=161,
+                 timeout=1, retries=2, max_repetitions=25, auth_protocol='MD5', context=''):
+        self.__logger = logger
+        self.__host = host
+        self.__port = port
+        self.__version = version
+        self.__community = community if None is not community else 'public'
+        self.__username = username
+        self.__password = password
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__max_repetitions = max_repetitions
+        self.__auth_protocol = auth_protocol
+        self.__context = context
+        self.__socket = None
+
+        self.__engine_id = None
+        self.__engine_boots = 0
+        self.__engine_time = 0
+        self.__engine_time_received = 0
+        self.__auth_key = None
+
+    def close(self):
+        if None is not self.__socket:
+            self.__socket.close()
+            self.__socket = None
+
+    def get(self, oid):
+        return self.__request(BER.GET_REQUEST, [oid])
+
+    def walk(self, oid):
+        oid = oid.strip('.')
+        prefix = oid + '.'
+        varbinds = []
+        last_oid = oid
+        last_arcs = None
+        while True:
+            if '1' == self.__version:
+                response = self.__request(BER.GET_NEXT_REQUEST, [last_oid])
+            else:
+                response = self.__request(BER.GET_BULK_REQUEST, [last_oid], 0, self.__max_repetitions)
+
+            if 0 == len(response):
+                break
+
+            for varbind in response:
+                if BER.END_OF_MIB_VIEW == varbind[1] or not varbind[0].startswith(prefix):
+                    return self.__finish_walk(oid, varbinds)
+
+                arcs = [int(arc) for arc in varbind[0].split('.')]
+                if None is not last_arcs and arcs <= last_arcs:
+                    raise SNMPError('OID not increasing: ' + varbind[0])
+                last_arcs = arcs
+                varbinds.append(varbind)
+            last_oid = response[-1][0]
+
+        return self.__finish_walk(oid, varbinds)
+
+    def __finish_walk(self, oid, varbinds):
+        if 0 != len(varbinds):
+            return varbinds
+
+        # like snmpwalk, ask for the OID itself if the subtree is empty
+        return self.get(oid)
+
+    def __get_socket(self):
+        if None is self.__socket:
+            try:
+                address = socket.getaddrinfo(self.__host, self.__port, type=socket.SOCK_DGRAM)[0]
+            except socket.gaierror as e:
+                raise SNMPError('Can\'t resolve ' + self.__host + ': ' + str(e))
+            connection = socket.socket(address[0], socket.SOCK_DGRAM)
+            try:
+                connection.connect(address[4])
+            except OSError as e:
+                connection.close()
+                raise SNMPError('Can\'t connect to ' + self.__host + ': ' + str(e))
+            self.__socket = connection
+        return self.__socket
+
+    def __request(self, pdu_type, oids, non_repeaters=0, max_repetitions=0):
+        if '3' == self.__version and None is self.__engine_id:
+            self.__discover()
+
+        for synchronize in [True, False]:
+            request_id = random.randint(1, 0x7fffffff)
+            pdu = BER.encode_sequence(
+                BER.encode_integer(request_id),
+                BER.encode_integer(non_repeaters),
+                BER.encode_integer(max_repetitions),
+                BER.encode_sequence(*[BER.encode_sequence(BER.encode_oid(oid), BER.encode_null()) for oid in oids]),
+                tag=pdu_type
+            )
+
+            response_type, response_id, error_status, error_index, varbinds = self.__send(pdu, request_id)
+
+            if BER.REPORT == response_type:
+                report = varbinds[0][0] if 0 != len(varbinds) else ''
+                if '1.3.6.1.6.3.15.1.1.2.0' == report and synchronize:
+                    # engine boots or time changed -> retry with the values of the report
+                    self.__logger.debug('Not in time window, synchronize engine time')
+                    continue
+                raise SNMPError('Got report: ' + self.USM_STATS.get(report, report))
+
+            if 0 != error_status:
+                if '1' == self.__version and 2 == error_status and BER.GET_NEXT_REQUEST == pdu_type:
+                    # noSuchName -> end of MIB
+                    return []
+                raise SNMPError('Got error status ' + str(error_status) + ' at index ' + str(error_index))
+
+            return varbinds
+
+        raise SNMPError('Can\'t synchronize engine time')
+
+    def __send(self, pdu, request_id):
+        connection = self.__get_socket()
+        ignored = None
+        for attempt in range(0, self.__retries + 1):
+            message_id = random.randint(1, 0x7fffffff)
+            timeout = Deadline.remaining(self.__timeout)
+            if timeout <= 0:
+                break
+            try:
+                connection.send(self.__encode_message(pdu, message_id))
+            except OSError as e:
+                # e.g. network unreachable
+                raise SNMPError('Can\'t send request to ' + self.__host + ': ' + str(e))
+            end = time.monotonic() + min(self.__timeout, timeout)
+            while True:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                connection.settimeout(remaining)
+                try:
+                    data = connection.recv(65535)
+                except socket.timeout:
+                    break
+                except ConnectionRefusedError:
+                    raise SNMPError('Connection refused by ' + self.__host)
+                except OSError as e:
+                    raise SNMPError('Can\'t receive response from ' + self.__host + ': ' + str(e))
+
+                try:
+                    response = self.__decode_message(data, message_id)
+                except ValueError as e:
+                    self.__logger.debug('Ignore invalid response: ' + str(e))
+                    ignored = str(e)
+                    continue
+                if None is not response and response[1] in [request_id, 0]:
+                    return response
+
+            self.__logger.debug('No response from ' + self.__host + ' in attempt ' + str(attempt + 1))
+
+        raise SNMPError('Timeout: No Response from ' + self.__host + '.'
+                        + ('' if None is ignored else ' Ignored invalid response: ' + ignored))
+
+    def __encode_message(self, pdu, message_id):
+        if '3' != self.__version:
+            return BER.encode_sequence(
+                BER.encode_integer(0 if '1' == self.__version else 1),
+                BER.encode_octet_string(self.__community),
+                pdu
+            )
+
+        authenticated = None is not self.__auth_key
+        header = BER.encode_sequence(
+            BER.encode_integer(message_id),
+            BER.encode_integer(65507),
+            BER.encode_octet_string(bytes([0x05 if authenticated else 0x04])),
+            BER.encode_integer(3)
+        )
+
+        engine_time = self.__engine_time
+        if 0 != self.__engine_time_received:
+            engine_time += int(time.monotonic() - self.__engine_time_received)
+
+        security_prefix = BER.encode_octet_string(self.__engine_id if None is not self.__engine_id else b'') \
+            + BER.encode_integer(self.__engine_boots) \
+            + BER.encode_integer(engine_time) \
+            + BER.encode_octet_string(self.__username if authenticated else '')
+        security = BER.encode_sequence(
+            security_prefix,
+            BER.encode_octet_string(b'\x00' * 12 if authenticated else b''),
+            BER.encode_octet_string(b'')
+        )
+        security_parameters = BER.encode_octet_string(security)
+        scoped_pdu = BER.encode_sequence(
+            BER.encode_octet_string(self.__engine_id if None is not self.__engine_id else b''),
+            BER.encode_octet_string(self.__context),
+            pdu
+        )
+        version = BER.encode_integer(3)
+        message = BER.encode_sequence(version, header, security_parameters, scoped_pdu)
+        if not authenticated:
+            return message
+
+        offset = self.__get_digest_offset(message)
+        digest = hmac.new(self.__auth_key, message, self.__get_hash()).digest()[:12]
+        return message[:offset] + digest + message[offset + 12:]
+
+    def __decode_message(self, data, message_id):
+        tag, message, start, end = BER.decode(data)
+        if BER.SEQUENCE != tag:
+            raise ValueError('Message is not a sequence')
+        fields = BER.decode_sequence(message)
+        version = BER.decode_integer(fields[0][1])
+
+        if 3 != version:
+            pdu_tag, pdu = fields[2]
+            return self.__decode_pdu(pdu_tag, pdu)
+
+        header = BER.decode_sequence(fields[1][1])
+        if BER.decode_integer(header[0][1]) != message_id:
+            return None
+        security = BER.decode_sequence(BER.decode(fields[2][1])[1])
+
+        flags = header[2][1][0] if 0 != len(header[2][1]) else 0
+        if flags & 0x01:
+            if None is self.__auth_key:
+                raise ValueError('Got authenticated message before discovery')
+            received_digest = security[4][1]
+            position = self.__get_digest_offset(data)
+            unsigned = data[:position] + b'\x00' * 12 + data[position + 12:]
+            digest = hmac.new(self.__auth_key, unsigned, self.__get_hash()).digest()[:12]
+            if 12 != len(received_digest) or not hmac.compare_digest(digest, received_digest):
+                raise ValueError('Wrong digest')
+        elif None is not self.__auth_key:
+            # authNoPriv -> after the discovery every response must be authenticated
+            pdu_tag, pdu = BER.decode_sequence(fields[3][1])[2]
+            varbinds = self.__decode_pdu(pdu_tag, pdu)[4] if BER.REPORT == pdu_tag else []
+            report = varbinds[0][0] if 0 != len(varbinds) else None
+            raise ValueError('Got unauthenticated ' + (
+                'message' if None is report else 'report: ' + self.USM_STATS.get(report, report)))
+
+        if None is not self.__auth_key and security[0][1] != self.__engine_id:
+            # the key is localized with the discovered engine ID -> it never changes afterwards
+            raise ValueError('Wrong engine ID')
+
+        # only the discovery or a verified message may set the engine ID, boots and time
+        self.__engine_id = security[0][1]
+        self.__engine_boots = BER.decode_integer(security[1][1])
+        self.__engine_time = BER.decode_integer(security[2][1])
+        self.__engine_time_received = time.monotonic()
+
+        scoped_pdu = BER.decode_sequence(fields[3][1])
+        pdu_tag, pdu = scoped_pdu[2]
+        return self.__decode_pdu(pdu_tag, pdu)
+
+    def __get_digest_offset(self, data):
+        tag, value, offset, end = BER.decode(data)
+        # skip version and header
+        offset = BER.decode(data, BER.decode(data, offset)[3])[3]
+        # security parameters are an octet string containing a sequence
+        offset = BER.decode(data, BER.decode(data, offset)[2])[2]
+        # skip engine ID, boots, time and user name
+        for field in range(0, 4):
+            offset = BER.decode(data, offset)[3]
+        return BER.decode(data, offset)[2]
+
+    def __get_hash(self):
+        return 'sha1' if 'SHA' == self.__auth_protocol else 'md5'
+
+    def __decode_pdu(self, pdu_tag, pdu):
+        fields = BER.decode_sequence(pdu)
+        varbinds = []
+        for varbind_tag, varbind in BER.decode_sequence(fields[3][1]):
+            name, value = BER.decode_sequence(varbind)
+            varbinds.append((BER.decode_oid(name[1]), value[0], self.__decode_value(value[0], value[1])))
+
+        return (pdu_tag, BER.decode_integer(fields[0][1]), BER.decode_integer(fields[1][1]),
+                BER.decode_integer(fields[2][1]), varbinds)
+
+    def __decode_value(self, tag, value):
+        if BER.INTEGER == tag:
+            return BER.decode_integer(value)
+        if tag in [BER.COUNTER32, BER.GAUGE32, BER.TIMETICKS, BER.COUNTER64]:
+            return BER.decode_unsigned(value)
+        if BER.OBJECT_IDENTIFIER == tag:
+            return BER.decode_oid(value)
+        if BER.IP_ADDRESS == tag:
+            return '.'.join([str(byte) for byte in value])
+        return value
+
+    def __discover(self):
+        self.__logger.debug('Discover engine ID of ' + self.__host)
+        self.__send(BER.encode_sequence(
+            BER.encode_integer(0),
+            BER.encode_integer(0),
+            BER.encode_integer(0),
+            BER.encode_sequence(),
+            tag=BER.GET_REQUEST
+        ), 0)
+        if None is self.__engine_id or 0 == len(self.__engine_id):
+            raise SNMPError('Can\'t discover engine ID of ' + self.__host)
+
+        self.__auth_key = self.__localize_key(self.__password, self.__engine_id)
+
+    def __localize_key(self, password, engine_id):
+        # RFC 3414 A.2: hash 1 MB of the repeated password, then localize it with the engine ID
+        password = password.encode('utf-8')
+        if 0 == len(password):
+            raise SNMPError('Password must not be empty')
+        repeated = (password * (1048576 // len(password) + 1))[:1048576]
+        key = hashlib.new(self.__get_hash(), repeated).digest()
+        return hashlib.new(self.__get_hash(), key + engine_id + key).digest()
@@ -29,15 +29,20 @@
 
 import signal
 
+from monitoring_utils.Core.Deadline import Deadline
+
 
 class Signals:
 
-    def __init__(self, parser, logger, status_builder):
+    def __init__(self, parser, logger, status_builder, alarm=True):
         self.__status_builder = status_builder
         self.__logger = logger
         self.__parser = parser
-        signal.signal(signal.SIGALRM, self.timeout_handler)
+        self.__alarm = alarm
+        if self.__alarm:
+            signal.signal(signal.SIGALRM, self.timeout_handler)
         self.__timeout = 10
+        self.__previous_deadline = Deadline.get_current()
         self.add_args()
 
     def add_args(self):
@@ -46,13 +51,33 @@ class Signals:
 
     def configure(self, args):
         self.__timeout = args.timeout
+        self.__previous_deadline = Deadline.get_current()
         if self.__timeout < 0:
             self.__logger.debug('Ignoring timeout because it is set to "' + str(self.__timeout) + '"')
             return
 
+        if not self.__alarm:
+            # signals can't be used outside of the main thread -> executors check the deadline instead
+            self.__logger.debug('Setting up deadline to ' + str(self.__timeout) + ' seconds.')
+            timeout = self.__timeout
+            if None is not self.__previous_deadline:
+                # check is executed by another check -> don't run longer than the outer one
+                timeout = min(timeout, self.__previous_deadline.get_remaining())
+            Deadline.set_current(Deadline(timeout))
+            return
+
         self.__logger.debug('Setting up timeout signal to ' + str(self.__timeout) + ' seconds.')
         signal.alarm(self.__timeout)
 
+    def get_timeout(self):
+        return self.__timeout
+
+    def cancel(self):
+        if self.__alarm:
+            signal.alarm(0)
+        else:
+            Deadline.set_current(self.__previous_deadline)
+
     def timeout_handler(self, signum, frame):
         self.__logger.info('Timeout of ' + str(self.__timeout) + ' seconds reached.')
         self.__status_builder.unknown('Timeout of ' + str(self.__timeout) + ' seconds reached.')
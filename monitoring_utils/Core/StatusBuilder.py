@@ -31,13 +31,24 @@ import logging
 import os
 import sys
 
-import psutil
+from monitoring_utils.Core.CheckResult import CheckResult
+
+
+class CheckExit(SystemExit):
+
+    def __init__(self, result):
+        SystemExit.__init__(self, result.get_exit_code())
+        self.__result = result
+
+    def get_result(self):
+        return self.__result
 
 
 class StatusBuilder:
 
-    def __init__(self, logger):
+    def __init__(self, logger, raise_on_exit=False):
         self.__logger = logger
+        self.__raise_on_exit = raise_on_exit
         self.__success = []
         self.__warning = []
         self.__critical = []
@@ -60,6 +71,9 @@ class StatusBuilder:
         self.__unknown.append(message)
 
     def __exit(self, status_code):
+        # only needed once per process -> don't load it on startup
+        import psutil
+
         kill = False
         parent = psutil.Process(os.getpid())
         for child in parent.children(recursive=True):
@@ -76,24 +90,28 @@ class StatusBuilder:
         else:
             sys.exit(status_code)
 
-    def exit(self, all_outputs=True):
+    def __result(self, exit_code, output):
+        return CheckResult(exit_code, output, list(self.__success), list(self.__warning), list(self.__critical),
+                           list(self.__unknown))
+
+    def get_result(self, all_outputs=True):
 
         exit_code = None
+        output = []
         if 0 != len(self.__critical):
             for message in self.__critical:
-                print('CRITICAL: ' + str(message))
+                output.append('CRITICAL: ' + str(message))
             if not all_outputs:
-                self.__exit(2)
-            else:
-                exit_code = 2
+                return self.__result(2, output)
+            exit_code = 2
         else:
             self.__logger.debug('No critical messages found')
 
         if 0 != len(self.__warning):
             for message in self.__warning:
-                print('WARNING: ' + str(message))
+                output.append('WARNING: ' + str(message))
             if not all_outputs:
-                self.__exit(1)
+                return self.__result(1, output)
             elif None == exit_code:
                 exit_code = 1
         else:
@@ -101,9 +119,9 @@ class StatusBuilder:
 
         if 0 != len(self.__unknown):
             for message in self.__unknown:
-                print('UNKNOWN: ' + str(message))
+                output.append('UNKNOWN: ' + str(message))
             if not all_outputs:
-                self.__exit(3)
+                return self.__result(3, output)
             elif None == exit_code:
                 exit_code = 3
         else:
@@ -111,15 +129,26 @@ class StatusBuilder:
 
         if 0 != len(self.__success) and None == exit_code or all_outputs:
             for message in self.__success:
-                print('SUCCESS: ' + str(message))
+                output.append('SUCCESS: ' + str(message))
             if not all_outputs:
-                self.__exit(0)
+                return self.__result(0, output)
             elif None == exit_code:
                 exit_code = 0
 
         if None != exit_code:
-            self.__exit(exit_code)
+            return self.__result(exit_code, output)
         self.__logger.debug('No success messages found, exit with unknown')
 
-        print('UNKNOWN: No status message found')
-        self.__exit(3)
+        output.append('UNKNOWN: No status message found')
+        return self.__result(3, output)
+
+    def finish(self, result):
+        for line in result.get_output():
+            print(line)
+        self.__exit(result.get_exit_code())
+
+    def exit(self, all_outputs=True):
+        result = self.get_result(all_outputs)
+        if self.__raise_on_exit:
+            raise CheckExit(result)
+        self.finish(result)
@@ -49,6 +49,9 @@ class HostNotification(Notification):
         Notification.configure(self, args)
         self.__web_executor.configure(args)
 
+    def get_web_executor(self):
+        return self.__web_executor
+
     def run(self):
         self.__web_executor.run_post(json=self.get_data())
         self.__status_builder.success('Send host notification successful')
@@ -32,9 +32,9 @@ from monitoring_utils.Notification.HttpPost.ServiceNotification import ServiceNo
 class ServiceNotification(HttpPostServiceNotification):
 
     def __init__(self):
-        self.__web_executor = None
         HttpPostServiceNotification.__init__(self, 'Send a service-notification via matrix')
         self.__user = None
+        self.__args = None
 
     def add_args(self):
         HttpPostServiceNotification.add_args(self)
@@ -44,13 +44,29 @@ class ServiceNotification(HttpPostServiceNotification):
         self.__parser.add_argument('-U', '--user', dest='user', type=str, required=True, action='append', default=[],
                                    help='Username to send to')
 
+        from monitoring_utils.Core.Executor.AsyncWebExecutor import AsyncWebExecutor
+        AsyncWebExecutor.add_args(self.__parser)
+
     def configure(self, args):
         HttpPostServiceNotification.configure(self, args)
         self.__user = args.user
+        self.__args = args
 
     def run(self):
         data = self.get_data()
+        # asyncio and aiohttp are only loaded when sending to several users
+        from monitoring_utils.Core.Executor.AsyncWebExecutor import AsyncWebExecutor, WebRequestError
+        if 1 < len(self.__user) and AsyncWebExecutor.is_available():
+            # send to all users at the same time
+            executor = AsyncWebExecutor(self.__logger, self.__status_builder, self.get_web_executor())
+            executor.configure(self.__args)
+            results = executor.run_all([executor.post(json=dict(data, user=user)) for user in self.__user], False)
+            for user, result in zip(self.__user, results):
+                if not isinstance(result, WebRequestError):
+                    self.__status_builder.success(f'Send service notification to user {user} successful')
+            return
+
         for user in self.__user:
             data["user"] = user
-            self.__web_executor.run_post(json=data)
+            self.get_web_executor().run_post(json=data)
             self.__status_builder.success(f'Send service notification to user {user} successful')
@@ -0,0 +1,25 @@
+import time
+
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+
+
+class SamplePlugin(Plugin):
+    # logs and sleeps without any network access, for the runner tests
+
+    def __init__(self):
+        self.__sleep = 0
+        Plugin.__init__(self, 'Sample plugin')
+
+    def add_args(self):
+        self.get_parser().add_argument('--sleep', dest='sleep', type=float, default=0,
+                                       help='Seconds to sleep')
+
+    def configure(self, args):
+        self.__sleep = args.sleep
+
+    def run(self):
+        self.get_logger().info('Sleep ' + str(self.__sleep) + ' seconds')
+        self.get_logger().debug('Debug message')
+        time.sleep(self.__sleep)
+        self.get_status_builder().success('Slept ' + str(self.__sleep) + ' seconds')
+        self.get_status_builder().exit()
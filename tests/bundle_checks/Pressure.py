@@ -0,0 +1,6 @@
+from bundle_checks.Usage import Usage
+
+
+class Pressure(Usage):
+    # another check with the same perfdata label
+    pass
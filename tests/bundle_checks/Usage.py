@@ -0,0 +1,31 @@
+from monitoring_utils.Core.Executor.SNMPExecutor import SNMPExecutor
+from monitoring_utils.Core.Outputs.Output import Output
+from monitoring_utils.Core.Outputs.Perfdata import Perfdata
+from monitoring_utils.Core.Plugin.Plugin import Plugin
+
+
+class Usage(Plugin):
+    # reports the value of a walked OID with the same perfdata label for each value, for the bundle tests
+
+    def __init__(self):
+        self.__snmp_executor = None
+        self.__index = None
+        Plugin.__init__(self, 'Sample SNMP check')
+
+    def add_args(self):
+        self.__snmp_executor = SNMPExecutor(self.get_logger(), self.get_status_builder(), self.get_parser(),
+                                            '1.3.6.1.4.1.2021.10.1.5')
+        self.__snmp_executor.add_args()
+        self.get_parser().add_argument('-i', '--index', dest='index', type=str, required=True,
+                                       help='Index of the value')
+
+    def configure(self, args):
+        self.__snmp_executor.configure(args)
+        self.__index = args.index
+
+    def run(self):
+        for row in self.__snmp_executor.run():
+            if self.__index == row['oid']:
+                self.get_status_builder().success(Output(f'Value is {row["value"]}',
+                                                         [Perfdata('load', row['value'], min=0)]))
+        self.get_status_builder().exit()
@@ -0,0 +1,31 @@
+import contextlib
+import http.server
+import logging
+import socket
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger('monitoring_utils.tests')
+
+
+def get_free_port(type=socket.SOCK_DGRAM):
+    with socket.socket(socket.AF_INET, type) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve_http(handler):
+    # handler is a http.server.BaseHTTPRequestHandler, the port is server.server_port
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
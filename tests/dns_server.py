@@ -0,0 +1,122 @@
+import contextlib
+import socketserver
+import struct
+import threading
+
+import dns.message
+import dns.rdatatype
+import pytest
+
+
+class DNSServer:
+    # answers queries over UDP and TCP (or TLS) with resolve(query) -> response.
+    # the answers of pipelined TCP queries are sent when they are ready -> maybe in another order than the queries
+
+    def __init__(self, resolve, address, port, ssl_context=None, idle_timeout=None, tcp=True):
+        self.resolve = resolve
+        self.address = address
+        self.ssl_context = ssl_context
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # (transport, name, type) of each query
+        self.queries = []
+        self.connections = 0
+        self.__servers = []
+
+        server = self
+
+        class StreamHandler(socketserver.BaseRequestHandler):
+
+            def setup(self):
+                with server.lock:
+                    server.connections += 1
+                if None is not server.ssl_context:
+                    self.request = server.ssl_context.wrap_socket(self.request, server_side=True)
+                self.request.settimeout(server.idle_timeout)
+                self.send_lock = threading.Lock()
+
+            def handle(self):
+                transport = 'tcp' if None is server.ssl_context else 'tls'
+                while True:
+                    try:
+                        wire = self.__receive(2)
+                        wire = self.__receive(struct.unpack('!H', wire)[0])
+                    except (EOFError, OSError):
+                        # closed by the client or idle for too long
+                        return
+                    threading.Thread(target=self.__reply, args=(transport, wire), daemon=True).start()
+
+            def __receive(self, length):
+                data = b''
+                while len(data) < length:
+                    part = self.request.recv(length - len(data))
+                    if b'' == part:
+                        raise EOFError()
+                    data += part
+                return data
+
+            def __reply(self, transport, wire):
+                response = server.answer(transport, wire)
+                with self.send_lock:
+                    try:
+                        self.request.sendall(struct.pack('!H', len(response)) + response)
+                    except OSError:
+                        pass
+
+        class DatagramHandler(socketserver.BaseRequestHandler):
+
+            def handle(self):
+                wire, sock = self.request
+                sock.sendto(server.answer('udp', wire), self.client_address)
+
+        class StreamServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # e.g. the client rejected the certificate
+                pass
+
+        class DatagramServer(socketserver.ThreadingMixIn, socketserver.UDPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        if tcp:
+            self.__servers.append(StreamServer((address, port), StreamHandler))
+        if None is ssl_context:
+            self.__servers.append(DatagramServer((address, port), DatagramHandler))
+
+    def answer(self, transport, wire):
+        query = dns.message.from_wire(wire)
+        question = query.question[0]
+        with self.lock:
+            self.queries.append((transport, question.name.to_text(), dns.rdatatype.to_text(question.rdtype)))
+        return self.resolve(query).to_wire()
+
+    def get_queries(self, transport=None, name=None, rdtype=None):
+        with self.lock:
+            return [query for query in self.queries if (None is transport or transport == query[0])
+                    and (None is name or name == query[1]) and (None is rdtype or rdtype == query[2])]
+
+    def start(self):
+        for server in self.__servers:
+            threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def stop(self):
+        for server in self.__servers:
+            server.shutdown()
+            server.server_close()
+
+
+@contextlib.contextmanager
+def serve_dns(resolve, address='127.0.0.1', port=53, ssl_context=None, idle_timeout=None, tcp=True):
+    # the executors ask port 53 of the resolver -> needs the permission to bind it
+    try:
+        server = DNSServer(resolve, address, port, ssl_context, idle_timeout, tcp)
+    except PermissionError:
+        pytest.skip(f'Not allowed to bind port {port}')
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENVIRONMENT = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]))
+
+
+def run_batch(tmp_path, checks, *arguments):
+    path = tmp_path / 'checks.jsonl'
+    path.write_text(''.join(json.dumps(check) + '\n' for check in checks))
+    result = subprocess.run([sys.executable, '-m', 'monitoring_utils.Core.Runner.BatchRunner', '-f', str(path),
+                             '--allowed-prefix', 'SamplePlugin'] + list(arguments), env=ENVIRONMENT, cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=60)
+    return result, [json.loads(line) for line in result.stdout.splitlines()]
+
+
+def test_results(tmp_path):
+    result, records = run_batch(tmp_path, [{'id': 'first', 'plugin': 'SamplePlugin'},
+                                           {'id': 'second', 'plugin': 'SamplePlugin', 'pool': 'process'}])
+    assert 0 == result.returncode, result.stderr
+    assert {'first': 0, 'second': 0} == {record['id']: record['exit_code'] for record in records}
+    assert ['SUCCESS: Slept 0 seconds'] == records[0]['output']
+
+
+def test_queued_checks_run_after_a_check_overran_its_deadline(tmp_path):
+    # the slow check keeps the only thread after its deadline while the other checks are queued
+    result, records = run_batch(tmp_path, [
+        {'id': 'slow', 'plugin': 'SamplePlugin', 'arguments': ['--sleep', '2'], 'timeout': 1},
+        {'id': 'queued1', 'plugin': 'SamplePlugin'},
+        {'id': 'queued2', 'plugin': 'SamplePlugin'},
+    ], '--threads', '1', '--grace', '0.2')
+    assert 0 == result.returncode, result.stderr
+    assert ['slow', 'queued1', 'queued2'] == [record['id'] for record in records]
+    assert 3 == records[0]['exit_code']
+    assert ['UNKNOWN: Timeout of 1 seconds reached.'] == records[0]['output']
+    # the queued checks start when the thread is free again
+    assert [0, 0] == [record['exit_code'] for record in records[1:]]
@@ -0,0 +1,28 @@
+import pytest
+
+from monitoring_utils.Checks.SNMP.Bundle import Bundle
+from monitoring_utils.Core.Executor.SNMPExecutor import SNMPExecutor
+
+ROWS = [('1.3.6.1.4.1.2021.10.1.5.1', 'integer', 12), ('1.3.6.1.4.1.2021.10.1.5.2', 'integer', 34)]
+
+
+@pytest.fixture
+def family(monkeypatch):
+    # the sample checks in tests/bundle_checks on a walk without agent
+    monkeypatch.setattr(Bundle, 'FAMILIES', {'test': ('1.3.6.1.4.1.2021', 'bundle_checks')})
+
+    def walk(executor, oid):
+        return [row for row in ROWS if row[0].startswith(oid.strip('.') + '.')]
+
+    monkeypatch.setattr(SNMPExecutor, 'walk', walk)
+
+
+def test_perfdata_labels_are_prefixed(family):
+    result = Bundle.check(['-H', '127.0.0.1', '--version', '2c', '-f', 'test', '--check', 'Usage -i 1',
+                           '--check', 'Pressure -i 2', '--check', 'Missing'])
+    assert 3 == result.get_exit_code()
+    assert ['Usage: Value is 12', 'Pressure: Value is 34'] == [str(message).split(' |')[0]
+                                                              for message in result.get_success()]
+    assert ['Missing: Check not found in family "test"'] == [str(message) for message in result.get_unknown()]
+    assert [("'Usage load'", 12, 0), ("'Pressure load'", 34, 0)] == [
+        (perfdata.get_label(), perfdata.get_value(), perfdata.get_min()) for perfdata in result.get_perfdata()]
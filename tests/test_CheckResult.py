@@ -0,0 +1,13 @@
+from monitoring_utils.Core.CheckResult import CheckResult
+
+
+def test_default_lists_are_not_shared():
+    result = CheckResult(3)
+    result.get_output().append('UNKNOWN: changed by a caller')
+    result.get_unknown().append('changed by a caller')
+
+    other = CheckResult(0)
+    assert [] == other.get_output()
+    assert [] == other.get_unknown()
+    assert {'exit_code': 0, 'state': 'OK', 'output': [], 'success': [], 'warning': [], 'critical': [], 'unknown': [],
+            'perfdata': []} == other.to_dict()
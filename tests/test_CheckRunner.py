@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENVIRONMENT = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]))
+
+
+@pytest.fixture
+def runner(tmp_path):
+    socket_path = str(tmp_path / 'runner.sock')
+    process = subprocess.Popen([sys.executable, '-m', 'monitoring_utils.Core.Runner.CheckRunner', '-S', socket_path,
+                                '--allowed-prefix', 'SamplePlugin'], env=ENVIRONMENT, cwd=ROOT,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for i in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    try:
+        yield process, socket_path
+    finally:
+        process.terminate()
+        process.communicate(timeout=10)
+
+
+def run_client(socket_path, *arguments):
+    return subprocess.run([sys.executable, '-m', 'monitoring_utils.Core.Runner.CheckRunnerClient', '-S', socket_path,
+                           'SamplePlugin'] + list(arguments), env=ENVIRONMENT, cwd=ROOT,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30)
+
+
+def test_result(runner):
+    process, socket_path = runner
+    result = run_client(socket_path)
+    assert 0 == result.returncode
+    assert 'SUCCESS: Slept 0 seconds' in result.stdout
+    assert '' == result.stderr
+
+
+@pytest.mark.parametrize('flag, messages, missing', [
+    ('--verbose', ['Sleep 0 seconds'], ['Debug message']),
+    ('--debug', ['Sleep 0 seconds', 'Debug message'], []),
+])
+def test_logging_is_returned_to_the_client(runner, flag, messages, missing):
+    process, socket_path = runner
+    result = run_client(socket_path, flag)
+    assert 0 == result.returncode, result.stdout + result.stderr
+    for message in messages:
+        assert message in result.stderr
+    for message in missing:
+        assert message not in result.stderr
+
+    # like running the plugin directly, nothing is logged by the runner
+    process.terminate()
+    stdout, stderr = process.communicate(timeout=10)
+    assert 'Sleep 0 seconds' not in stderr
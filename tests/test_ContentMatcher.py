@@ -0,0 +1,40 @@
+import pytest
+
+from monitoring_utils.Core.ContentMatcher import ContentMatcher
+
+
+@pytest.fixture(params=['substrings', 'automaton'])
+def mode(request, monkeypatch):
+    if 'automaton' == request.param:
+        monkeypatch.setattr(ContentMatcher, 'MIN_AUTOMATON_PATTERNS', 1)
+    return request.param
+
+
+def match(patterns, *chunks, regex=False):
+    matcher = ContentMatcher(patterns, regex)
+    for chunk in chunks:
+        matcher.feed(chunk)
+    return matcher
+
+
+def test_first_match(mode):
+    matcher = match(['ab', 'abc', 'bc', 'x'], 'xx abc ', 'abc')
+    assert {'ab': 3, 'abc': 3, 'bc': 4, 'x': 0} == matcher.get_matches()
+    assert matcher.is_finished()
+
+
+def test_match_across_chunks(mode):
+    matcher = match(['needle', 'missing'], 'hay nee', 'd', 'le hay')
+    assert {'needle': 4} == matcher.get_matches()
+    assert not matcher.is_finished()
+
+
+def test_found_patterns_are_dropped_from_the_search(mode, monkeypatch):
+    monkeypatch.setattr(ContentMatcher, 'MAX_WASTED_MATCHES', 2)
+    matcher = match(['a', 'ab', 'b'], 'a ' * 10, 'ab', ' a' * 10 + 'b')
+    assert {'a': 0, 'ab': 20, 'b': 21} == matcher.get_matches()
+
+
+def test_regex():
+    matcher = match(['^first', r'\d+ items', 'missing'], 'first line: 1', '2 items', regex=True)
+    assert {'^first': 0, r'\d+ items': 12} == matcher.get_matches()
@@ -0,0 +1,154 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+
+# dnspython is not a dependency of the package
+pytest.importorskip('dns')
+
+import dns.flags
+import dns.message
+import dns.rdatatype
+import dns.rrset
+
+from conftest import get_free_port
+from dns_server import serve_dns
+from monitoring_utils.Core.Executor.DNSConnection import DNSConnection
+from monitoring_utils.Core.Executor.DNSExecutor import DNSExecutor
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
+
+# seconds until the answer of a name is sent
+DELAYS = {'slow.test.': 0.5}
+
+
+def resolve(query):
+    # an A record for every name
+    question = query.question[0]
+    time.sleep(DELAYS.get(question.name.to_text(), 0))
+    response = dns.message.make_response(query)
+    response.flags |= dns.flags.AA
+    if dns.rdatatype.A == question.rdtype:
+        response.answer.append(dns.rrset.from_text(question.name, 300, 'IN', 'A', '192.0.2.1'))
+    return response
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    DNSExecutor.clear_cache()
+    yield
+    DNSExecutor.close_connections()
+    DNSExecutor.clear_cache()
+
+
+@pytest.fixture(scope='module')
+def certificate(tmp_path_factory):
+    # self-signed certificate of "dns.test"
+    if None is shutil.which('openssl'):
+        pytest.skip('openssl is not installed')
+    directory = tmp_path_factory.mktemp('tls')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1',
+                    '-nodes', '-keyout', str(directory / 'key.pem'), '-out', str(directory / 'cert.pem'),
+                    '-days', '2', '-subj', '/CN=dns.test', '-addext', 'subjectAltName=DNS:dns.test'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return str(directory / 'cert.pem'), str(directory / 'key.pem')
+
+
+def get_ssl_context(certificate):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    return context
+
+
+def get_address(response):
+    return response.answer[0][0].address
+
+
+def query(connection, name, query_id=None):
+    request = dns.message.make_query(name, dns.rdatatype.A)
+    if None is not query_id:
+        request.id = query_id
+    return connection.query(request, 5)
+
+
+def test_pipelining():
+    port = get_free_port(socket.SOCK_STREAM)
+    with serve_dns(resolve, port=port) as server:
+        connection = DNSConnection('127.0.0.1', port)
+        try:
+            answers = {}
+
+            def ask(name):
+                # the same ID for all queries -> the connection makes them unique
+                answers[name] = query(connection, name, 1)
+
+            names = ['slow.test.', 'fast1.test.', 'fast2.test.']
+            threads = [threading.Thread(target=ask, args=(name,)) for name in names]
+            for thread in threads:
+                thread.start()
+                time.sleep(0.05)
+            for thread in threads:
+                thread.join()
+        finally:
+            connection.close()
+
+    # the fast queries are answered before the slow one on the same connection
+    assert ['fast1.test.', 'fast2.test.', 'slow.test.'] == list(answers)
+    assert 1 == server.connections
+    assert 3 == len(server.get_queries(transport='tcp'))
+    assert 3 == len({answer.id for answer in answers.values()})
+    for name, answer in answers.items():
+        assert name == answer.question[0].name.to_text()
+        assert '192.0.2.1' == get_address(answer)
+
+
+def test_reconnect_after_idle_close():
+    port = get_free_port(socket.SOCK_STREAM)
+    with serve_dns(resolve, port=port, idle_timeout=0.2) as server:
+        connection = DNSConnection('127.0.0.1', port)
+        try:
+            assert '192.0.2.1' == get_address(query(connection, 'first.test.'))
+            # closed by the server meanwhile
+            time.sleep(0.5)
+            assert '192.0.2.1' == get_address(query(connection, 'second.test.'))
+        finally:
+            connection.close()
+    assert 2 == server.connections
+
+
+def test_tls(logger, certificate):
+    port = get_free_port(socket.SOCK_STREAM)
+    with serve_dns(resolve, port=port, ssl_context=get_ssl_context(certificate), idle_timeout=0.2) as server:
+        executor = DNSExecutor(logger, None, StatusBuilder(logger, True), '127.0.0.1', transport='tls', tls_port=port,
+                               tls_hostname='dns.test', tls_ca_file=certificate[0])
+        assert '192.0.2.1' == get_address(executor.resolve_A('first.test'))
+        time.sleep(0.5)
+        assert '192.0.2.1' == get_address(executor.resolve_A('second.test'))
+    assert 2 == len(server.get_queries(transport='tls'))
+
+
+def test_tls_does_not_fall_back_to_udp(logger, certificate):
+    port = get_free_port(socket.SOCK_STREAM)
+    with serve_dns(resolve) as udp, serve_dns(resolve, port=port, ssl_context=get_ssl_context(certificate)):
+        # the certificate is not valid for the address of the nameserver
+        executor = DNSExecutor(logger, None, StatusBuilder(logger, True), '127.0.0.1', transport='tls', tls_port=port,
+                               tls_ca_file=certificate[0])
+        with pytest.raises(CheckExit) as e:
+            executor.resolve_A('www.test')
+    unknown = [str(message) for message in e.value.get_result().get_unknown()]
+    assert 1 == len(unknown)
+    assert unknown[0].startswith('Resolving A record for domain "www.test" failed: Connection to nameserver '
+                                 '"127.0.0.1" failed: ')
+    assert 'certificate verify failed' in unknown[0]
+    assert [] == udp.get_queries()
+
+
+def test_tcp_pipeline_falls_back_to_udp(logger):
+    # TCP is refused -> UDP
+    with serve_dns(resolve, tcp=False) as server:
+        executor = DNSExecutor(logger, None, StatusBuilder(logger, True), '127.0.0.1', transport='tcp-pipeline')
+        assert '192.0.2.1' == get_address(executor.resolve_A('www.test'))
+    assert 1 == len(server.get_queries(transport='udp'))
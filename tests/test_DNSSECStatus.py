@@ -0,0 +1,105 @@
+import datetime
+
+import pytest
+
+# dnspython is not a dependency of the package
+pytest.importorskip('dns')
+
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+from dns_server import serve_dns
+from monitoring_utils.Checks.DNS.DNSSECStatus import DNSSECStatus
+from monitoring_utils.Core.Executor.DNSExecutor import DNSExecutor
+
+ZONES = ['.', 'test.', 'ok.test.', 'other.test.']
+CNAMES = {'alias.test.': 'ok.test.'}
+FAILING = dns.name.from_text('fail.test.')
+DNSKEY = '257 3 13 mdsswUyr3DPW132mOi8V9xESWE8jTo0dxCjjnopKl+GqJxpVXckHAeF+KkxLbxILfDLUT0rAK9iUzy1L53eKGQ=='
+
+
+def get_date(days):
+    return (datetime.datetime.now() + datetime.timedelta(days=days)).strftime('%Y%m%d%H%M%S')
+
+
+def resolve(query):
+    # signed zones, every name below "fail.test." answers with SERVFAIL. CNAMEs are followed like a resolver does
+    question = query.question[0]
+    name = question.name.to_text()
+    response = dns.message.make_response(query)
+    response.flags |= dns.flags.AA
+    while name in CNAMES and dns.rdatatype.CNAME != question.rdtype:
+        response.answer.append(dns.rrset.from_text(name, 300, 'IN', 'CNAME', CNAMES[name]))
+        name = CNAMES[name]
+    if question.name.is_subdomain(FAILING):
+        response.set_rcode(dns.rcode.SERVFAIL)
+    elif name in ZONES and dns.rdatatype.DNSKEY == question.rdtype:
+        response.answer.append(dns.rrset.from_text(name, 3600, 'IN', 'DNSKEY', DNSKEY))
+        labels = len(dns.name.from_text(name)) - 1
+        response.answer.append(dns.rrset.from_text(
+            name, 3600, 'IN', 'RRSIG', f'DNSKEY 13 {labels} 3600 {get_date(30)} {get_date(-10)} 2371 {name} '
+                                       + 'A' * 88))
+    else:
+        zone = dns.name.from_text(name)
+        while zone.to_text() not in ZONES:
+            zone = zone.parent()
+        if name not in ZONES:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        response.authority.append(dns.rrset.from_text(
+            zone, 3600, 'IN', 'SOA', f'ns.{zone} host.{zone} 1 7200 3600 1209600 300'))
+    return response
+
+
+@pytest.fixture
+def server():
+    DNSExecutor.clear_cache()
+    with serve_dns(resolve) as server:
+        yield server
+    DNSExecutor.close_connections()
+    DNSExecutor.clear_cache()
+
+
+def check(*domains, transport='tcp'):
+    arguments = ['-r', '127.0.0.1', '--workers', '4', '--dns-transport', transport]
+    for domain in domains:
+        arguments += ['-d', domain]
+    return DNSSECStatus.check(arguments)
+
+
+@pytest.mark.parametrize('transport', ['tcp', 'udp', 'tcp-pipeline'])
+def test_valid_zones(server, transport):
+    result = check('ok.test', 'other.test', transport=transport)
+    assert 0 == result.get_exit_code()
+    assert ['Zone "." is valid', 'Zone "test." is valid', 'Zone "ok.test." is valid', 'Zone "other.test." is valid'] \
+        == [str(message).split(';')[0] for message in result.get_success()]
+
+
+@pytest.mark.parametrize('transport', ['tcp', 'udp', 'tcp-pipeline'])
+def test_failed_zone_does_not_stop_other_domains(server, transport):
+    result = check('fail.test', 'ok.test', 'www.fail.test', 'other.test', transport=transport)
+    assert 3 == result.get_exit_code()
+    unknown = [str(message) for message in result.get_unknown()]
+    assert 1 == len(unknown), unknown
+    assert unknown[0].startswith('Resolving DNSKEY record for domain "fail.test." failed: ')
+    assert 'SERVFAIL' in unknown[0]
+    # the domains after the failed one are still checked
+    assert ['Zone "." is valid', 'Zone "test." is valid', 'Zone "ok.test." is valid', 'Zone "other.test." is valid'] \
+        == [str(message).split(';')[0] for message in result.get_success()]
+
+
+@pytest.mark.parametrize('transport', ['tcp', 'udp', 'tcp-pipeline'])
+def test_one_query_per_name(server, transport):
+    result = check('ok.test', 'www.ok.test', 'other.test', 'alias.test', transport=transport)
+    assert 0 == result.get_exit_code(), result.get_output()
+    # the shared parent zones are asked once for all domains, the zone cuts are taken from the SOA of the answers
+    # and the CNAME targets from the DNSKEY answers -> no SOA and CNAME queries
+    names = ['.', 'test.', 'ok.test.', 'www.ok.test.', 'other.test.', 'alias.test.']
+    assert sorted(names) == sorted(name for transport, name, rdtype in server.get_queries(rdtype='DNSKEY'))
+    assert len(names) == len(server.get_queries())
+    assert ['Zone "." is valid', 'Zone "test." is valid', 'Zone "ok.test." is valid',
+            'Zone "www.ok.test." is valid', 'Zone "other.test." is valid', 'Zone "alias.test." is valid'] \
+        == [str(message).split(';')[0] for message in result.get_success()]
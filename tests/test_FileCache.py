@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from monitoring_utils.Core.Cache.FileCache import FileCache
+
+
+def test_cache(logger, tmp_path):
+    directory = str(tmp_path / 'cache')
+    cache = FileCache(logger, directory, 'test')
+    cache.set('key', {'value': 1}, 60)
+    assert {'value': 1} == cache.get('key')
+    assert 0o700 == os.stat(directory).st_mode & 0o777
+    with cache.lock('key') as locked:
+        assert locked
+
+
+def test_symlink(logger, tmp_path):
+    target = tmp_path / 'target'
+    target.mkdir(mode=0o700)
+    os.symlink(str(target), str(tmp_path / 'cache'))
+    cache = FileCache(logger, str(tmp_path / 'cache'), 'test')
+    cache.set('key', 1, 60)
+    assert None is cache.get('key')
+    assert [] == os.listdir(str(target))
+    with cache.lock('key') as locked:
+        assert not locked
+
+
+def test_mode(logger, tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir()
+    os.chmod(str(directory), 0o777)
+    cache = FileCache(logger, str(directory), 'test')
+    cache.set('key', 1, 60)
+    assert None is cache.get('key')
+    assert [] == os.listdir(str(directory))
+
+
+def test_namespace_mode(logger, tmp_path):
+    directory = tmp_path / 'cache'
+    (directory / 'test').mkdir(parents=True)
+    os.chmod(str(directory), 0o700)
+    os.chmod(str(directory / 'test'), 0o755)
+    cache = FileCache(logger, str(directory), 'test')
+    cache.set('key', 1, 60)
+    assert None is cache.get('key')
+
+
+@pytest.mark.skipif(0 != os.getuid(), reason='changing the owner requires root')
+def test_owner(logger, tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir(mode=0o700)
+    os.chown(str(directory), 65534, 65534)
+    cache = FileCache(logger, str(directory), 'test')
+    cache.set('key', 1, 60)
+    assert None is cache.get('key')
+    assert [] == os.listdir(str(directory))
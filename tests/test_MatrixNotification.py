@@ -0,0 +1,97 @@
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import serve_http
+from monitoring_utils.Core.Executor.AsyncWebExecutor import AsyncWebExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS = ['alice', 'bob', 'carol']
+
+
+class MatrixHandler(http.server.BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    users = []
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with MatrixHandler.lock:
+            MatrixHandler.running += 1
+            MatrixHandler.max_running = max(MatrixHandler.max_running, MatrixHandler.running)
+            MatrixHandler.users.append(data['user'])
+        time.sleep(0.2)
+        with MatrixHandler.lock:
+            MatrixHandler.running -= 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    MatrixHandler.max_running = 0
+    MatrixHandler.users = []
+    with serve_http(MatrixHandler) as server:
+        yield server
+
+
+def notify(notification, server, users, *arguments):
+    # notifications parse sys.argv, send and exit in their constructor -> run them in another process
+    code = 'import atexit, sys\n' \
+           'atexit.register(lambda: print("asyncio loaded" if "asyncio" in sys.modules else "asyncio not loaded"))\n' \
+           f'from monitoring_utils.Notification.Matrix.{notification} import {notification}\n' \
+           f'{notification}()\n'
+    arguments = ['-d', '127.0.0.1', '-p', str(server.server_port), '-D', '2026-10-18 10:00:00', '-l', 'host',
+                 '-n', 'Host', '-o', 'output', '-a', 'DOWN', '-t', 'PROBLEM'] + list(arguments)
+    if 'ServiceNotification' == notification:
+        arguments += ['-e', 'http', '-E', 'HTTP']
+    for user in users:
+        arguments += ['-U', user]
+    return subprocess.run([sys.executable, '-c', code] + arguments, cwd=ROOT, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT)
+
+
+@pytest.mark.skipif(not AsyncWebExecutor.is_available(), reason='aiohttp is not installed')
+@pytest.mark.parametrize('notification', ['HostNotification', 'ServiceNotification'])
+def test_concurrent(notification, server):
+    result = notify(notification, server, USERS)
+    assert 0 == result.returncode, result.stdout
+    assert USERS == sorted(MatrixHandler.users)
+    assert 3 == MatrixHandler.max_running
+
+
+@pytest.mark.skipif(not AsyncWebExecutor.is_available(), reason='aiohttp is not installed')
+@pytest.mark.parametrize('notification', ['HostNotification', 'ServiceNotification'])
+def test_max_concurrency(notification, server):
+    result = notify(notification, server, USERS, '--max-concurrency', '1')
+    assert 0 == result.returncode, result.stdout
+    assert USERS == sorted(MatrixHandler.users)
+    assert 1 == MatrixHandler.max_running
+
+
+@pytest.mark.skipif(not AsyncWebExecutor.is_available(), reason='aiohttp is not installed')
+def test_invalid_max_concurrency(server):
+    result = notify('HostNotification', server, USERS, '--max-concurrency', '0')
+    assert 3 == result.returncode
+    assert b'Maximum concurrency must be at least 1' in result.stdout
+    assert [] == MatrixHandler.users
+
+
+@pytest.mark.parametrize('notification', ['HostNotification', 'ServiceNotification'])
+def test_single_user_without_asyncio(notification, server):
+    result = notify(notification, server, ['alice'])
+    assert 0 == result.returncode, result.stdout
+    assert ['alice'] == MatrixHandler.users
+    assert b'asyncio not loaded' in result.stdout
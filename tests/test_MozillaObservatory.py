@@ -0,0 +1,89 @@
+import http.server
+import json
+from urllib.parse import parse_qs, urlparse
+
+from conftest import serve_http
+from monitoring_utils.Checks.SecurityObservers.MozillaObservatory import MozillaObservatory
+from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
+
+SCANS = {
+    'good.example': {'scan_id': 1, 'score': 100, 'grade': 'A+'},
+    'weak.example': {'scan_id': 2, 'score': 80, 'grade': 'B+'},
+}
+TESTS = {
+    'content-security-policy': {
+        'expectation': 'csp-implemented-with-no-unsafe', 'name': 'content-security-policy', 'pass': True,
+        'result': 'csp-implemented-with-no-unsafe', 'score_description': 'Content Security Policy (CSP) implemented',
+        'score_modifier': 0, 'output': {'data': {}},
+    },
+}
+
+
+class ObservatoryHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if '/api/v1/getScanResults' == url.path:
+            return self.__respond(TESTS)
+        return self.__respond(self.__get_scan(query['host'][0]))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        host = parse_qs(urlparse(self.path).query)['host'][0]
+        if host not in SCANS:
+            return self.__respond({'error': 'invalid-hostname-lookup', 'text': f'{host} can not be resolved'})
+        return self.__respond(self.__get_scan(host))
+
+    @staticmethod
+    def __get_scan(host):
+        scan = {'end_time': 'Sun, 18 Oct 2026 10:00:00 GMT', 'hidden': True, 'likelihood_indicator': 'LOW',
+                'start_time': 'Sun, 18 Oct 2026 09:59:00 GMT', 'state': 'FINISHED', 'tests_failed': 0,
+                'tests_passed': 1, 'tests_quantity': 1}
+        scan.update(SCANS[host])
+        return scan
+
+    def __respond(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check(*hosts):
+    with serve_http(ObservatoryHandler) as server:
+        arguments = ['-d', '127.0.0.1', '-p', str(server.server_port)]
+        for host in hosts:
+            arguments += ['-H', host]
+        try:
+            return MozillaObservatory.check(arguments)
+        finally:
+            WebExecutor.close_sessions()
+
+
+def test_scan():
+    result = check('good.example')
+    assert 0 == result.get_exit_code()
+    assert 'All checks passed.' == str(result.get_success()[0])
+
+
+def test_failed_scan_does_not_stop_other_hosts():
+    result = check('good.example', 'unknown.example', 'weak.example')
+    assert 2 == result.get_exit_code()
+    assert ['unknown.example: unknown.example can not be resolved'] == [
+        str(message) for message in result.get_critical()]
+    # the hosts after the failed one are still scanned and checked
+    assert ['weak.example: Score of scan is lower than warning score. Expected higher than 90 got 80'] == [
+        str(message) for message in result.get_warning()]
+    assert 'All checks passed.' not in [str(message) for message in result.get_success()]
+
+
+def test_failed_scan():
+    result = check('unknown.example')
+    assert 2 == result.get_exit_code()
+    assert ['unknown.example can not be resolved'] == [str(message) for message in result.get_critical()]
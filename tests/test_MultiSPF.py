@@ -0,0 +1,158 @@
+import pytest
+
+# dnspython is not a dependency of the package
+pytest.importorskip('dns')
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+from dns_server import serve_dns
+from monitoring_utils.Checks.DNS.MultiSPF import MultiSPF
+from monitoring_utils.Core.Executor.DNSExecutor import DNSExecutor
+
+POLICIES = {
+    'ok.test.': 'include:_spf.ok.test ip4:192.0.2.0/24 -all',
+    '_spf.ok.test.': 'a mx ~all',
+    # a redirect next to "all" is ignored
+    'redirect.test.': 'redirect=_spf.ok.test -all',
+    'redirect-only.test.': 'redirect=_spf.ok.test',
+    'loop1.test.': 'include:loop2.test -all',
+    'loop2.test.': 'include:loop1.test -all',
+    # the domain of a macro is only known when a mail is checked
+    'macro.test.': 'include:%{d}._spf.test exists:%{i}.%{h}.test -all',
+    'broken-include.test.': 'include:servfail.test -all',
+    'missing-include.test.': 'include:missing.test -all',
+}
+# deep.test includes level1.test, which includes level2.test and so on
+POLICIES['deep.test.'] = 'include:level1.test -all'
+for level in range(1, 12):
+    POLICIES[f'level{level}.test.'] = f'include:level{level + 1}.test -all'
+POLICIES['level12.test.'] = '-all'
+FAILING = ['servfail.test.']
+
+
+def resolve(query):
+    # each name with a policy is a zone
+    question = query.question[0]
+    name = question.name.to_text()
+    response = dns.message.make_response(query)
+    response.flags |= dns.flags.AA
+    soa = dns.rrset.from_text('test.', 3600, 'IN', 'SOA', 'ns.test. host.test. 1 7200 3600 1209600 300')
+    if name in FAILING:
+        response.set_rcode(dns.rcode.SERVFAIL)
+    elif name not in POLICIES:
+        response.set_rcode(dns.rcode.NXDOMAIN)
+        response.authority.append(soa)
+    elif dns.rdatatype.TXT == question.rdtype:
+        response.answer.append(dns.rrset.from_text(name, 300, 'IN', 'TXT', f'"v=spf1 {POLICIES[name]}"'))
+    elif dns.rdatatype.SOA == question.rdtype:
+        response.answer.append(dns.rrset.from_text(
+            name, 3600, 'IN', 'SOA', f'ns.{name} host.{name} 1 7200 3600 1209600 300'))
+    else:
+        response.authority.append(soa)
+    return response
+
+
+@pytest.fixture
+def server():
+    DNSExecutor.clear_cache()
+    with serve_dns(resolve) as server:
+        yield server
+    DNSExecutor.close_connections()
+    DNSExecutor.clear_cache()
+
+
+def check(*domains):
+    arguments = ['-r', '127.0.0.1', '--workers', '4']
+    for domain in domains:
+        arguments += ['-d', domain]
+    return MultiSPF.check(arguments)
+
+
+def get_messages(messages, domain):
+    return [str(message) for message in messages if str(message).startswith(domain + ': ')]
+
+
+def test_get_terms():
+    assert [('include', '_spf.example.com', True), ('ip4', '192.0.2.0', True), ('a', None, True),
+            ('mx', 'mail.example.com', True), ('redirect', '_spf.example.com', False),
+            ('exp', 'explain.example.com', False), ('all', None, True)] == MultiSPF.get_terms(
+        '-Include:_spf.example.com ip4:192.0.2.0/24 a/24 ~mx:mail.example.com/24 redirect=_spf.example.com '
+        'exp=explain.example.com ?all')
+
+
+def test_get_targets():
+    plugin = MultiSPF.create()
+    assert ['_spf.example.com'] == plugin.get_targets('include:_SPF.example.com. redirect=other.example.com -all')
+    assert ['other.example.com'] == plugin.get_targets('ip4:192.0.2.1 redirect=other.example.com')
+    assert [] == plugin.get_targets('include:%{d}._spf.example.com redirect=%{d}.example.com')
+
+
+def test_expand():
+    plugin = MultiSPF.create()
+    # a, mx, ptr and exists need a lookup, ip4 and all don't
+    assert (4, 6, []) == plugin.expand('a mx ptr exists:%{i}.example.com ip4:192.0.2.1 -all')
+    # the domain of a macro is not known -> only the lookup of the include itself
+    assert (1, 2, []) == plugin.expand('include:%{d}._spf.example.com -all')
+    # a redirect next to "all" is ignored
+    assert (0, 1, []) == plugin.expand('redirect=_spf.example.com -all')
+
+
+def test_includes(server):
+    result = check('ok.test', 'redirect.test', 'redirect-only.test', 'macro.test')
+    assert 0 == result.get_exit_code(), result.get_output()
+    assert get_messages(result.get_success(), 'ok.test')[0].startswith(
+        'ok.test: SPF policy "include:_spf.ok.test ip4:192.0.2.0/24 -all" needs 3 of 10 DNS lookups with 6 mechanisms')
+    assert get_messages(result.get_success(), 'redirect.test')[0].startswith(
+        'redirect.test: SPF policy "redirect=_spf.ok.test -all" needs 0 of 10 DNS lookups with 1 mechanisms')
+    assert get_messages(result.get_success(), 'redirect-only.test')[0].startswith(
+        'redirect-only.test: SPF policy "redirect=_spf.ok.test" needs 3 of 10 DNS lookups with 3 mechanisms')
+    assert get_messages(result.get_success(), 'macro.test')[0].startswith(
+        'macro.test: SPF policy "include:%{d}._spf.test exists:%{i}.%{h}.test -all" needs 2 of 10 DNS lookups')
+    # the included policy is resolved once for all domains, the domains of macros never
+    assert 1 == len(server.get_queries(name='_spf.ok.test.', rdtype='TXT'))
+    assert [] == [query for query in server.get_queries() if '%' in query[1]]
+
+
+def test_include_cycle(server):
+    result = check('loop1.test')
+    assert 2 == result.get_exit_code()
+    assert ['loop1.test: SPF policy of "loop1.test" includes itself'] == get_messages(
+        result.get_critical(), 'loop1.test')[:1]
+
+
+def test_lookup_limit(server):
+    result = check('deep.test')
+    assert 2 == result.get_exit_code()
+    assert ['deep.test: SPF policy "include:level1.test -all" needs 11 of 10 DNS lookups with 22 mechanisms, '
+            'more than allowed by RFC 7208'] == [str(message).split(' |')[0] for message in result.get_critical()]
+    # the includes deeper than the limit are not resolved
+    assert [] == server.get_queries(name='level11.test.')
+    assert [] == server.get_queries(name='level12.test.')
+
+
+def test_lookup_limit_reached(server):
+    result = check('level2.test')
+    # more than 8 lookups are a warning
+    assert 1 == result.get_exit_code(), result.get_output()
+    assert ['level2.test: SPF policy "include:level3.test -all" needs 10 of 10 DNS lookups with 21 mechanisms'] \
+        == [str(message).split(' |')[0] for message in result.get_warning()]
+
+
+def test_dns_errors_are_reported_per_domain(server):
+    result = check('servfail.test', 'broken-include.test', 'missing-include.test', 'ok.test')
+    assert 2 == result.get_exit_code()
+    unknown = get_messages(result.get_unknown(), 'servfail.test')
+    assert 1 == len(unknown), unknown
+    assert unknown[0].startswith('servfail.test: Resolving SOA record for domain "servfail.test" failed: ')
+    assert 'SERVFAIL' in unknown[0]
+    assert get_messages(result.get_critical(), 'broken-include.test')[0].startswith(
+        'broken-include.test: Can not resolve SPF policy of "servfail.test": Resolving TXT record for domain '
+        '"servfail.test" failed: ')
+    assert ['missing-include.test: No SPF policy found for included domain "missing.test"'] == get_messages(
+        result.get_critical(), 'missing-include.test')[:1]
+    # the other domains are still checked
+    assert 1 == len(get_messages(result.get_success(), 'ok.test'))
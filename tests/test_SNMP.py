@@ -0,0 +1,206 @@
+import argparse
+import logging
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from conftest import get_free_port
+from monitoring_utils.Core.Executor.SNMPExecutor import SNMPExecutor
+from monitoring_utils.Core.SNMP.BER import BER
+from monitoring_utils.Core.SNMP.SNMPClient import SNMPClient, SNMPError
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'snmp')
+LOAD_FLOAT = '1.3.6.1.4.1.2021.10.1.6'
+
+
+def find_simulator():
+    binary = os.path.join(os.path.dirname(sys.executable), 'snmpsim-command-responder')
+    return binary if os.path.exists(binary) else shutil.which('snmpsim-command-responder')
+
+
+@pytest.fixture(scope='module')
+def agent(tmp_path_factory):
+    binary = find_simulator()
+    if None is binary:
+        pytest.skip('snmpsim is not installed')
+
+    directory = tmp_path_factory.mktemp('snmpsim')
+    port = get_free_port()
+    environment = dict(os.environ, SNMPSIM_ALLOW_ROOT='true')
+    process = subprocess.Popen([
+        binary, '--data-dir=' + FIXTURES, '--cache-dir=' + str(directory), '--logging-method=null',
+        '--agent-udpv4-endpoint=127.0.0.1:' + str(port),
+        '--v3-user=monitor', '--v3-auth-key=monitoring', '--v3-auth-proto=MD5',
+    ], env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # the simulator indexes the data files before it answers
+    client = SNMPClient(logging.getLogger(), '127.0.0.1', port=port, timeout=0.5, retries=0)
+    for attempt in range(0, 60):
+        try:
+            client.get('1.3.6.1.2.1.1.3.0')
+            break
+        except SNMPError:
+            if None is not process.poll():
+                pytest.skip('snmpsim did not start')
+            time.sleep(0.25)
+        finally:
+            client.close()
+    else:
+        process.kill()
+        pytest.skip('snmpsim did not answer')
+
+    yield port
+    process.terminate()
+    process.wait()
+
+
+def create_executor(logger, port, *arguments):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--timeout', dest='timeout', default=1, type=int)
+    executor = SNMPExecutor(logger, StatusBuilder(logger, True), parser, LOAD_FLOAT)
+    executor.add_args()
+    executor.configure(parser.parse_args(['-H', '127.0.0.1', '--port', str(port)] + list(arguments)))
+    return executor
+
+
+def test_format_opaque():
+    assert 'Float: 0.320000' == SNMPExecutor.format_opaque(b'\x9f\x78\x04' + struct.pack('>f', 0.32))
+    assert 'Double: 1.500000' == SNMPExecutor.format_opaque(b'\x9f\x79\x08' + struct.pack('>d', 1.5))
+    assert '01 02' == SNMPExecutor.format_opaque(b'\x01\x02')
+    assert '9F 78 02 00 00' == SNMPExecutor.format_opaque(b'\x9f\x78\x02\x00\x00')
+
+
+@pytest.mark.parametrize('arguments', [
+    ['--version', '2c', '--community', 'public'],
+    ['--version', '1', '--community', 'public'],
+    ['--version', '3', '-u', 'monitor', '-p', 'monitoring', '--context', 'public'],
+])
+def test_walk_opaque(logger, agent, arguments):
+    # same values as snmpwalk prints them: "Opaque: Float: 0.320000"
+    assert [
+        {'oid': '1', 'value': 'Float: 0.320000', 'type': 'opaque'},
+        {'oid': '2', 'value': 'Double: 1.500000', 'type': 'opaque'},
+        {'oid': '3', 'value': '01 02', 'type': 'opaque'},
+    ] == create_executor(logger, agent, *arguments).run()
+
+
+def test_walk_system(logger, agent):
+    client = SNMPClient(logger, '127.0.0.1', port=agent, version='3', username='monitor', password='monitoring',
+                        context='public')
+    try:
+        assert [
+            ('1.3.6.1.2.1.1.1.0', BER.OCTET_STRING, b'Linux test 5.10'),
+            ('1.3.6.1.2.1.1.3.0', BER.TIMETICKS, 123456),
+        ] == client.walk('1.3.6.1.2.1.1')
+    finally:
+        client.close()
+
+
+def test_wrong_password(logger, agent):
+    executor = create_executor(logger, agent, '--version', '3', '-u', 'monitor', '-p', 'wrongpassword',
+                               '--context', 'public')
+    with pytest.raises(CheckExit) as e:
+        executor.run()
+    # the report of the agent isn't authenticated -> ignored, but named in the error
+    assert 'Wrong digest' in e.value.get_result().get_output()[0]
+    assert 3 == e.value.get_result().get_exit_code()
+
+
+class UnauthenticatedAgent(threading.Thread):
+    ENGINE_ID = b'\x80\x00\x1f\x88\x04test'
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        # engine time of each request after the discovery
+        self.engine_times = []
+
+    def run(self):
+        while True:
+            try:
+                data, address = self.socket.recvfrom(65535)
+            except OSError:
+                return
+            fields = BER.decode_sequence(BER.decode(data)[1])
+            message_id = BER.decode_integer(BER.decode_sequence(fields[1][1])[0][1])
+            security = BER.decode_sequence(BER.decode(fields[2][1])[1])
+            pdu = BER.decode_sequence(BER.decode_sequence(fields[3][1])[2][1])
+            request_id = BER.decode_integer(pdu[0][1])
+            if 0 == len(security[0][1]):
+                # discovery -> report with engine ID, boots and time
+                self.socket.sendto(self.encode(message_id, 100, BER.REPORT, request_id, '1.3.6.1.6.3.15.1.1.4.0'),
+                                   address)
+            else:
+                self.engine_times.append(BER.decode_integer(security[2][1]))
+                # a response without the authentication flag and another engine time
+                self.socket.sendto(self.encode(message_id, 99999, BER.RESPONSE, request_id, '1.3.6.1.2.1.1.3.0'),
+                                   address)
+
+    def encode(self, message_id, engine_time, pdu_type, request_id, oid):
+        return BER.encode_sequence(
+            BER.encode_integer(3),
+            BER.encode_sequence(BER.encode_integer(message_id), BER.encode_integer(65507),
+                                BER.encode_octet_string(b'\x00'), BER.encode_integer(3)),
+            BER.encode_octet_string(BER.encode_sequence(
+                BER.encode_octet_string(self.ENGINE_ID), BER.encode_integer(1), BER.encode_integer(engine_time),
+                BER.encode_octet_string(b''), BER.encode_octet_string(b''), BER.encode_octet_string(b'')
+            )),
+            BER.encode_sequence(
+                BER.encode_octet_string(self.ENGINE_ID), BER.encode_octet_string(b''),
+                BER.encode_sequence(
+                    BER.encode_integer(request_id), BER.encode_integer(0), BER.encode_integer(0),
+                    BER.encode_sequence(BER.encode_sequence(BER.encode_oid(oid), BER.encode_integer(1, BER.COUNTER32))),
+                    tag=pdu_type
+                )
+            )
+        )
+
+    def close(self):
+        self.socket.close()
+
+
+def test_reject_unauthenticated_response(logger):
+    agent = UnauthenticatedAgent()
+    agent.start()
+    client = SNMPClient(logger, '127.0.0.1', port=agent.port, version='3', username='monitor', password='monitoring',
+                        timeout=0.5, retries=0)
+    try:
+        for attempt in range(0, 2):
+            with pytest.raises(SNMPError, match='unauthenticated message'):
+                client.get('1.3.6.1.2.1.1.3.0')
+        # only the discovery may set the engine time without a verified digest -> the next request doesn't use the
+        # time of the rejected response
+        assert 2 == len(agent.engine_times)
+        assert all(100 <= engine_time < 110 for engine_time in agent.engine_times), agent.engine_times
+    finally:
+        client.close()
+        agent.close()
+
+
+def test_unknown_host(logger):
+    client = SNMPClient(logger, 'nonexistent.invalid', timeout=0.5, retries=0)
+    with pytest.raises(SNMPError, match='Can\'t resolve nonexistent.invalid: '):
+        client.walk('1.3.6.1.2.1.1')
+    client.close()
+
+
+def test_unknown_host_is_unknown(logger):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--timeout', dest='timeout', default=1, type=int)
+    executor = SNMPExecutor(logger, StatusBuilder(logger, True), parser, LOAD_FLOAT)
+    executor.add_args()
+    executor.configure(parser.parse_args(['-H', 'nonexistent.invalid', '--version', '2c']))
+    with pytest.raises(CheckExit) as e:
+        executor.run()
+    assert 3 == e.value.get_result().get_exit_code()
+    assert str(e.value.get_result().get_unknown()[0]).startswith('Can\'t resolve nonexistent.invalid: ')
@@ -0,0 +1,31 @@
+import stat
+
+from monitoring_utils.Core.Runner.StartupBudget import StartupBudget
+
+
+def get_interpreter(tmp_path, script):
+    path = tmp_path / 'python'
+    path.write_text('#!/bin/sh\n' + script + '\n')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def test_module():
+    result = StartupBudget.check(['-m', 'monitoring_utils.Core.Outputs.Output', '-w', '10000', '-c', '20000'])
+    assert 0 == result.get_exit_code(), result.get_output()
+    assert str(result.get_success()[0]).startswith('Import of "monitoring_utils.Core.Outputs.Output" takes ')
+
+
+def test_interpreter_killed_without_message(tmp_path):
+    result = StartupBudget.check(['--python', get_interpreter(tmp_path, 'kill -9 $$')])
+    assert 3 == result.get_exit_code()
+    assert ['Can\'t import "None": Interpreter exited with return code -9'] == [
+        str(message) for message in result.get_unknown()]
+
+
+def test_interpreter_failed_with_import_times_only(tmp_path):
+    result = StartupBudget.check(['--python', get_interpreter(
+        tmp_path, 'echo "import time: self [us] | cumulative | imported package" >&2; exit 1')])
+    assert 3 == result.get_exit_code()
+    assert ['Can\'t import "None": Interpreter exited with return code 1'] == [
+        str(message) for message in result.get_unknown()]
@@ -0,0 +1,137 @@
+import argparse
+import http.server
+import socket
+
+import pytest
+
+from conftest import serve_http
+from monitoring_utils.Checks.Web.MultiPageContent import MultiPageContent
+from monitoring_utils.Checks.Web.PageContent import PageContent
+from monitoring_utils.Core.Deadline import Deadline
+from monitoring_utils.Core.Executor.WebExecutor import WebExecutor
+from monitoring_utils.Core.StatusBuilder import CheckExit, StatusBuilder
+
+
+class PageHandler(http.server.BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        PageHandler.requests += 1
+        body = b'<html><body>status: ok</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PageHandler.requests = 0
+    with serve_http(PageHandler) as server:
+        yield server
+    WebExecutor.close_sessions()
+
+
+def create_executor(logger, port):
+    parser = argparse.ArgumentParser()
+    executor = WebExecutor(logger, parser, StatusBuilder(logger, True))
+    executor.add_args()
+    executor.configure(parser.parse_args(['-d', '127.0.0.1', '-p', str(port)]))
+    return executor
+
+
+def test_get(logger, server):
+    assert 'status: ok' in create_executor(logger, server.server_port).run_get()
+    assert 1 == PageHandler.requests
+
+
+def test_deadline_reached(logger, server):
+    executor = create_executor(logger, server.server_port)
+    Deadline.set_current(Deadline(0))
+    try:
+        with pytest.raises(CheckExit) as e:
+            executor.run_get()
+    finally:
+        Deadline.set_current(None)
+
+    result = e.value.get_result()
+    assert 3 == result.get_exit_code()
+    assert 'Timeout of 0 seconds reached.' == str(result.get_unknown()[0])
+    # no request with a timeout of 0 is sent
+    assert 0 == PageHandler.requests
+
+
+def test_multi_page_content_failing_target(server, monkeypatch):
+    check = PageContent.check
+
+    def fail(argv, alarm=False):
+        if 'broken.invalid' in argv:
+            raise ValueError('Timeout value connect was 0')
+        return check(argv, alarm)
+
+    monkeypatch.setattr(PageContent, 'check', fail)
+    result = MultiPageContent.check(['-t', f'127.0.0.1:{server.server_port}/', '-t', 'broken.invalid/',
+                                     '-o', 'status: ok'])
+
+    assert 3 == result.get_exit_code()
+    assert ['broken.invalid/: Plugin failed with ValueError: Timeout value connect was 0'] == [
+        str(message) for message in result.get_unknown()]
+    # the other page is still checked
+    assert f"127.0.0.1:{server.server_port}/: Found content 'status: ok' in response" == str(result.get_success()[0])
+
+
+def resolve_to(monkeypatch, *addresses):
+    def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port)) for address in addresses]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+
+
+def create_named_executor(logger, port):
+    parser = argparse.ArgumentParser()
+    executor = WebExecutor(logger, parser, StatusBuilder(logger, True))
+    executor.add_args()
+    executor.configure(parser.parse_args(['-d', 'multi.test', '-p', str(port)]))
+    return executor
+
+
+def test_next_address(logger, server, monkeypatch):
+    # nothing listens on 127.0.0.2 -> the connection is refused and the next address is used
+    resolve_to(monkeypatch, '127.0.0.2', '127.0.0.1')
+    assert 'status: ok' in create_named_executor(logger, server.server_port).run_get()
+    assert 1 == PageHandler.requests
+
+
+def test_all_addresses_fail(logger, server, monkeypatch):
+    resolve_to(monkeypatch, '127.0.0.2', '127.0.0.3')
+    with pytest.raises(CheckExit) as e:
+        create_named_executor(logger, server.server_port).run_get()
+    assert 'Connection refused' in str(e.value.get_result().get_unknown()[0])
+    assert 0 == PageHandler.requests
+
+
+class EncodingHandler(PageHandler):
+    accept_encoding = None
+
+    def do_GET(self):
+        EncodingHandler.accept_encoding = self.headers.get('Accept-Encoding')
+        PageHandler.do_GET(self)
+
+
+def test_accept_encoding(logger, monkeypatch):
+    import requests.utils
+
+    # like requests with brotli and zstandard installed
+    monkeypatch.setattr(requests.utils, 'DEFAULT_ACCEPT_ENCODING', 'gzip, deflate, br, zstd')
+    WebExecutor.close_sessions()
+    with serve_http(EncodingHandler) as server:
+        try:
+            create_executor(logger, server.server_port).run_get()
+        finally:
+            WebExecutor.close_sessions()
+    # only encodings decompressed with the size limits of the executor
+    assert 'gzip, deflate' == EncodingHandler.accept_encoding